@@ -1,5 +1,4 @@
 import logging
-import sys
 from os import getenv
 
 import json_logging
@@ -33,22 +32,51 @@ def create_app(deploy_env: str = ENV) -> Flask:
     __configure_logger(app=app)
     __register_blueprints(app=app)
 
-    db.init_app(app)
+    __configure_database(app=app)
     Migrate(app, db)
+    __configure_cache(app=app)
+    __register_commands(app=app)
 
     return app
 
 
 def __configure_logger(app: Flask) -> None:
+    from api.infrastructure.logs import log_pipeline
+
     if not json_logging.ENABLE_JSON_LOGGING:
         json_logging.init_flask(enable_json=True)
         json_logging.init_request_instrument(app=app)
+        log_pipeline.attach_requests(json_logging.get_request_logger())
+
+    log_pipeline.configure(
+        sample_rate=app.config["LOGS_SUCCESS_SAMPLE_RATE"],
+        queue_size=app.config["LOGS_QUEUE_SIZE"])
 
     logger = logging.getLogger("agro")
     logger.setLevel(app.config["LOGS_LEVEL"])
+    log_pipeline.attach(logger)
+
+
+def __configure_database(app: Flask) -> None:
+    from api.infrastructure import metrics
+    from api.infrastructure.database.pool import engine_options, pool_metrics
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
+    db.init_app(app)
+    with app.app_context():
+        pool_metrics.init_app(app, db.engine)
+        metrics.init_app(app, db.engine)
+
+
+def __configure_cache(app: Flask) -> None:
+    from api.infrastructure.cache import farmer_cache, farmers_page_cache, shared_store
+    store = shared_store(app)
+    farmer_cache.init_app(app, store=store)
+    farmers_page_cache.init_app(app, store=store)
+
 
-    if not logger.hasHandlers():
-        logger.addHandler(logging.StreamHandler(sys.stdout))
+def __register_commands(app: Flask) -> None:
+    from api.commands import farmers_cli
+    app.cli.add_command(farmers_cli)
 
 
 def __register_blueprints(app: Flask) -> None:
@@ -0,0 +1,182 @@
+"""ASGI deployment serving the farmers contract with the async repository.
+
+The endpoints answer like the Flask ones in ``api.views.farmer`` but every
+database call is awaited, so one process keeps hundreds of requests and queries
+in flight instead of blocking a worker per request.
+"""
+import importlib
+import json
+import logging
+from contextlib import asynccontextmanager
+from os import getenv
+
+from dotenv import load_dotenv
+from marshmallow import ValidationError
+from starlette.applications import Starlette
+from starlette.endpoints import HTTPEndpoint
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from api.domain.entities.farmer import Farmer, FarmerNotFound
+from api.domain.repositories.async_farmer_repository import AsyncSQLAlchemyFarmerRepository
+from api.infrastructure.database.async_engine import async_db
+from api.infrastructure.logs import log_pipeline
+from api.infrastructure import metrics
+from api.infrastructure.database.models import FarmingOptions
+from api.views.schemas import FARMERS_FILTERS, FarmerCreateRequestSchema, FarmerUpdateRequestSchema
+from api.views.serializers import serialize_farmer
+
+
+load_dotenv()
+
+ENV = getenv("DEPLOY_ENV", default="Development")
+
+VERSION = "0.0.1"
+DOC = "Agro API"
+
+MISSING_CPF_CNPJ = {
+    "errors": {"cpf_cnpj": "Missing required parameter in the query string"},
+    "message": "Input payload validation failed"
+}
+BAD_REQUEST = ("The browser (or proxy) sent a request that this server "
+               "could not understand.")
+
+
+async def _payload(request: Request):
+    try:
+        return await request.json()
+    except json.JSONDecodeError:
+        return None
+
+
+def _filters(query_args) -> dict:
+    filters = {name: query_args[name] for name in FARMERS_FILTERS if name in query_args}
+    for name in ("min_total_area", "max_total_area"):
+        if name in filters:
+            filters[name] = int(filters[name])
+    if "farming_option" in filters and not FarmingOptions.get(filters["farming_option"]):
+        raise ValueError(f"Wrong farming options value. The options are {FarmingOptions.get_all_values()}")
+    return filters
+
+
+class Health(HTTPEndpoint):
+    async def get(self, request: Request) -> JSONResponse:
+        return JSONResponse(dict(service=DOC, version=VERSION), 200)
+
+
+class Metrics(HTTPEndpoint):
+    async def get(self, request: Request) -> Response:
+        output, content_type = metrics.render()
+        return Response(output, media_type=content_type)
+
+
+class Farmers(HTTPEndpoint):
+    async def get(self, request: Request) -> JSONResponse:
+        config = request.app.state.config
+        query_args = request.query_params
+        try:
+            filters = _filters(query_args)
+            if "cursor" in query_args:
+                limit = int(query_args.get("limit") or config.FARMERS_PAGE_SIZE)
+                limit = max(1, min(limit, config.FARMERS_MAX_PAGE_SIZE))
+                farmers, next_cursor = await Farmer.get_page_async(
+                    limit=limit,
+                    cursor=query_args["cursor"],
+                    repository=AsyncSQLAlchemyFarmerRepository,
+                    filters=filters)
+                return JSONResponse({
+                    "items": serialize_farmer(farmers),
+                    "next_cursor": next_cursor
+                }, 200)
+
+            farmers = await Farmer.get_all(
+                limit=int(query_args.get("limit", 20)),
+                offset=int(query_args.get("offset", 0)),
+                repository=AsyncSQLAlchemyFarmerRepository,
+                filters=filters)
+        except Exception as e:
+            return JSONResponse({"message": str(e)}, 400)
+
+        return JSONResponse(serialize_farmer(farmers), 200)
+
+    async def post(self, request: Request) -> JSONResponse:
+        try:
+            validated_data = FarmerCreateRequestSchema().load(await _payload(request))
+        except ValidationError as err:
+            return JSONResponse({"message": str(err)}, 400)
+
+        try:
+            farmer = await Farmer.create(
+                data=validated_data,
+                repository=AsyncSQLAlchemyFarmerRepository)
+        except Exception as e:
+            return JSONResponse({"message": str(e)}, 400)
+
+        return JSONResponse(serialize_farmer(farmer), 201)
+
+    async def delete(self, request: Request) -> JSONResponse:
+        cpf_cnpj = request.query_params.get("cpf_cnpj")
+        if cpf_cnpj is None:
+            return JSONResponse(MISSING_CPF_CNPJ, 400)
+        try:
+            await Farmer.delete(
+                cpf_cnpj=cpf_cnpj,
+                repository=AsyncSQLAlchemyFarmerRepository)
+        except FarmerNotFound as e:
+            return JSONResponse({"message": str(e)}, 404)
+        except Exception as e:
+            return JSONResponse({"message": str(e)}, 400)
+        return JSONResponse({"message": "OK"}, 200)
+
+    async def patch(self, request: Request) -> JSONResponse:
+        cpf_cnpj = request.query_params.get("cpf_cnpj")
+        if cpf_cnpj is None:
+            return JSONResponse(MISSING_CPF_CNPJ, 400)
+        payload = await _payload(request)
+        if payload is None:
+            return JSONResponse({"message": BAD_REQUEST}, 400)
+        try:
+            validated_data = FarmerUpdateRequestSchema().load(payload)
+        except ValidationError as err:
+            return JSONResponse({"message": str(err)}, 400)
+
+        try:
+            farmer = await Farmer.update_async(
+                cpf_cnpj=cpf_cnpj,
+                data=validated_data,
+                repository=AsyncSQLAlchemyFarmerRepository)
+        except FarmerNotFound as e:
+            return JSONResponse({"message": str(e)}, 404)
+        except Exception as e:
+            return JSONResponse({"message": str(e)}, 400)
+        return JSONResponse(serialize_farmer(farmer), 200)
+
+
+def create_asgi_app(deploy_env: str = ENV) -> Starlette:
+    config = getattr(importlib.import_module("api.config"), f"{deploy_env}Config")
+
+    log_pipeline.configure(
+        sample_rate=config.LOGS_SUCCESS_SAMPLE_RATE,
+        queue_size=config.LOGS_QUEUE_SIZE)
+    logger = logging.getLogger("agro")
+    logger.setLevel(config.LOGS_LEVEL)
+    log_pipeline.attach(logger)
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        async_db.init(config)
+        yield
+        await async_db.dispose()
+
+    app = Starlette(
+        debug=config.DEBUG,
+        routes=[
+            Route("/health", Health),
+            Route("/metrics", Metrics),
+            Route("/api/v1/farmers", Farmers),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.config = config
+    return app
@@ -0,0 +1,3 @@
+from .farmers import farmers_cli
+
+__all__ = ["farmers_cli"]
@@ -0,0 +1,104 @@
+import csv
+import json
+import time
+from itertools import islice
+from typing import Iterator
+
+import click
+from flask.cli import AppGroup
+from marshmallow import ValidationError
+
+from api.domain.report import build_report, collect_columns, report_rows
+from api.domain.repositories.farmer_repository import SQLAlchemyFarmerRepository
+from api.infrastructure.database.models import FARMING_OPTIONS_MASK
+from api.views.exporters import FARMING_OPTIONS_SEPARATOR
+from api.views.schemas import FarmerCreateRequestSchema
+
+
+farmers_cli = AppGroup("farmers", help="Farmers registry commands.")
+
+
+def _parse_rows(reader: csv.DictReader, rejected: csv.writer, totals: dict, chunk_size: int) -> Iterator[list]:
+    """Yield the valid rows of the file in chunks, validating the documents
+    of each chunk in one call."""
+    while True:
+        rows = list(islice(reader, chunk_size))
+        if not rows:
+            return
+        totals["read"] += len(rows)
+        schema = FarmerCreateRequestSchema.for_batch(rows)
+        valid_rows = []
+        for row in rows:
+            data = dict(row)
+            options = data.get("farming_options") or ""
+            data["farming_options"] = [option for option in options.split(FARMING_OPTIONS_SEPARATOR) if option]
+            try:
+                valid_rows.append(schema.load(data))
+            except ValidationError as err:
+                totals["rejected"] += 1
+                rejected.writerow([row.get(field) for field in reader.fieldnames] + [str(err)])
+        yield valid_rows
+
+
+@farmers_cli.command("import")
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--rejected-file", type=click.Path(dir_okay=False),
+              help="Where the rejected rows are written. Defaults to <file>.rejected.csv")
+@click.option("--chunk-size", default=50000, show_default=True,
+              help="Rows sent to the database in each COPY.")
+def import_farmers(file: str, rejected_file: str, chunk_size: int) -> None:
+    """Import farmers from a CSV file with the same columns of the export.
+
+    The rows are validated like the creation endpoint. The valid ones are
+    loaded with COPY and merged into the farmer table, and the invalid ones
+    are written in the rejected file with the reason in the last column.
+    """
+    rejected_file = rejected_file or f"{file}.rejected.csv"
+    totals = dict(read=0, inserted=0, updated=0, unchanged=0, rejected=0)
+
+    with open(file, newline="", encoding="utf-8") as source, \
+            open(rejected_file, "w", newline="", encoding="utf-8") as rejected_output:
+        reader = csv.DictReader(source)
+        rejected = csv.writer(rejected_output)
+        rejected.writerow((reader.fieldnames or []) + ["error"])
+        for chunk in _parse_rows(reader, rejected, totals, chunk_size):
+            if not chunk:
+                continue
+            result = SQLAlchemyFarmerRepository.copy_merge(chunk)
+            for key, value in result.items():
+                totals[key] += value
+            click.echo(f"{totals['read']} rows read: {result}")
+
+    click.echo(f"Import finished: {totals}. Rejected rows in {rejected_file}")
+
+
+@farmers_cli.command("report")
+@click.option("--output", type=click.Path(dir_okay=False),
+              help="Where the report is written. Defaults to the standard output.")
+@click.option("--format", "output_format", type=click.Choice(["json", "csv"]), default="json", show_default=True)
+@click.option("--chunk-size", default=50000, show_default=True,
+              help="Rows fetched from the server-side cursor at a time.")
+@click.option("--bins", default=10, show_default=True, help="Bins of the histograms.")
+@click.option("--reserve", default=0.2, show_default=True,
+              help="Minimum share of vegetation area, the farms below it are counted.")
+def report_farmers(output: str, output_format: str, chunk_size: int, bins: int, reserve: float) -> None:
+    """Write the analytics report of the whole registry.
+
+    Area percentiles and histograms, preservation ratios and the breakdowns
+    by state and by crop, computed with NumPy over the streamed columns. The
+    CSV has one ``section, group, metric, value`` row per figure.
+    """
+    start = time.perf_counter()
+    columns = collect_columns(SQLAlchemyFarmerRepository.iter_report_columns(batch_size=chunk_size))
+    report = build_report(columns, FARMING_OPTIONS_MASK.bits, bins=bins, reserve=reserve)
+
+    with click.open_file(output or "-", "w", encoding="utf-8") as destination:
+        if output_format == "csv":
+            writer = csv.writer(destination)
+            writer.writerow(["section", "group", "metric", "value"])
+            writer.writerows(report_rows(report))
+        else:
+            json.dump(report, destination, ensure_ascii=False, indent=2)
+            destination.write("\n")
+
+    click.echo(f"Report of {report['farmers']} farmers built in {time.perf_counter() - start:.1f}s", err=True)
@@ -9,22 +9,57 @@ class BaseConfig(object):
     TESTING = True
     DEPLOY_ENV = getenv("DEPLOY_ENV", default="Development")
     LOGS_LEVEL = logging.INFO
+    LOGS_SUCCESS_SAMPLE_RATE = float(getenv("LOGS_SUCCESS_SAMPLE_RATE", default=1.0))
+    LOGS_QUEUE_SIZE = int(getenv("LOGS_QUEUE_SIZE", default=10000))
+    # statements and database time of each request in the X-DB-* response headers
+    DB_STATS_HEADER = getenv("DB_STATS_HEADER", default="false").lower() == "true"
 
     SQLALCHEMY_DATABASE_URI = getenv("SQLALCHEMY_DATABASE_URI", default="")
     SQLALCHEMY_TRACK_MODIFICATIONS = True
     SQLALCHEMY_MODEL_DIR = path.join(path.dirname(path.dirname(__file__)), 'api', 'infrastructure', 'database')
     SQLALCHEMY_MIGRATE_REPO = path.join(path.dirname(path.dirname(__file__)), 'migrations')
+    SQLALCHEMY_POOL_SIZE = int(getenv("SQLALCHEMY_POOL_SIZE", default=5))
+    SQLALCHEMY_MAX_OVERFLOW = int(getenv("SQLALCHEMY_MAX_OVERFLOW", default=10))
+    SQLALCHEMY_POOL_TIMEOUT = float(getenv("SQLALCHEMY_POOL_TIMEOUT", default=30))
+    SQLALCHEMY_POOL_RECYCLE = int(getenv("SQLALCHEMY_POOL_RECYCLE", default=1800))
+    SQLALCHEMY_POOL_PRE_PING = getenv("SQLALCHEMY_POOL_PRE_PING", default="true").lower() == "true"
+    SQLALCHEMY_POOL_WAIT_WARNING_MS = float(getenv("SQLALCHEMY_POOL_WAIT_WARNING_MS", default=100))
 
+    BULK_INSERT_BATCH_SIZE = int(getenv("BULK_INSERT_BATCH_SIZE", default=1000))
+    BULK_MAX_ITEMS = int(getenv("BULK_MAX_ITEMS", default=10000))
+    FARMERS_PAGE_SIZE = 20
+    FARMERS_MAX_PAGE_SIZE = int(getenv("FARMERS_MAX_PAGE_SIZE", default=100))
+    FARMERS_SEARCH_THRESHOLD = float(getenv("FARMERS_SEARCH_THRESHOLD", default=0.5))
+    FARMERS_SEARCH_MAX_RESULTS = int(getenv("FARMERS_SEARCH_MAX_RESULTS", default=50))
+    EXPORT_BATCH_SIZE = int(getenv("EXPORT_BATCH_SIZE", default=1000))
+    FARMERS_CHANGES_PAGE_SIZE = int(getenv("FARMERS_CHANGES_PAGE_SIZE", default=500))
+    FARMERS_CHANGES_MAX_PAGE_SIZE = int(getenv("FARMERS_CHANGES_MAX_PAGE_SIZE", default=5000))
 
+    ASYNC_DB_POOL_SIZE = int(getenv("ASYNC_DB_POOL_SIZE", default=20))
+    ASYNC_DB_MAX_OVERFLOW = int(getenv("ASYNC_DB_MAX_OVERFLOW", default=80))
+
+    FARMER_CACHE_ENABLED = getenv("FARMER_CACHE_ENABLED", default="true").lower() == "true"
+    FARMER_CACHE_MAXSIZE = int(getenv("FARMER_CACHE_MAXSIZE", default=10000))
+    FARMER_CACHE_TTL = float(getenv("FARMER_CACHE_TTL", default=30))
+    # keep SHARED_CACHE_COUNTERS_NAME items in uwsgi.ini above it
+    FARMER_CACHE_SHARDS = int(getenv("FARMER_CACHE_SHARDS", default=1024))
+    FARMERS_PAGE_CACHE_ENABLED = getenv("FARMERS_PAGE_CACHE_ENABLED", default="true").lower() == "true"
+    FARMERS_PAGE_CACHE_TTL = float(getenv("FARMERS_PAGE_CACHE_TTL", default=60))
+    # uwsgi caches from uwsgi.ini, SHARED_CACHE_BYTES only sizes the local stand-in
+    SHARED_CACHE_NAME = getenv("SHARED_CACHE_NAME", default="agro")
+    SHARED_CACHE_COUNTERS_NAME = getenv("SHARED_CACHE_COUNTERS_NAME", default="agro_counters")
+    SHARED_CACHE_BYTES = int(getenv("SHARED_CACHE_BYTES", default=64 * 1024 * 1024))
 
 
 class DevelopmentConfig(BaseConfig):
     DEBUG = True
+    DB_STATS_HEADER = True
 
 
 class TestingConfig(BaseConfig):
     DEBUG = True
     TESTING = True
+    DB_STATS_HEADER = True
 
     JWT_CACHE_EXPIRATION_SECONDS = 3600
     SQLALCHEMY_DATABASE_URI = getenv("SQLALCHEMY_DATABASE_URI_TEST", default="")
@@ -36,3 +71,10 @@ class StagingConfig(BaseConfig):
 
 class ProductionConfig(BaseConfig):
     LOGS_LEVEL = getenv("LOGS_LEVEL", default=logging.INFO)
+
+    # uwsgi runs 4 processes with 100 gevent cores each, so keep
+    # processes * (pool size + overflow) below Postgres max_connections.
+    SQLALCHEMY_POOL_SIZE = int(getenv("SQLALCHEMY_POOL_SIZE", default=10))
+    SQLALCHEMY_MAX_OVERFLOW = int(getenv("SQLALCHEMY_MAX_OVERFLOW", default=15))
+    SQLALCHEMY_POOL_TIMEOUT = float(getenv("SQLALCHEMY_POOL_TIMEOUT", default=10))
+    SQLALCHEMY_POOL_RECYCLE = int(getenv("SQLALCHEMY_POOL_RECYCLE", default=900))
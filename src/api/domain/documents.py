@@ -0,0 +1,74 @@
+"""CPF and CNPJ check digit validation over whole lists of documents.
+
+The documents are turned into a matrix of digits and the weighted sums of the
+check digits are computed for all of them at once with NumPy. The rules are the
+same used by ``validate_docbr``: CPF accepts only digits and CNPJ may have the
+``.``, ``/`` and ``-`` mask characters, documents with all digits equal are
+invalid.
+"""
+from typing import Sequence
+
+import numpy as np
+
+
+CPF_LENGTH = 11
+CNPJ_LENGTH = 14
+
+CPF_WEIGHTS = (np.arange(10, 1, -1), np.arange(11, 1, -1))
+CNPJ_WEIGHTS = (
+    np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]),
+    np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]),
+)
+
+CNPJ_MASK = str.maketrans("", "", "./-")
+
+
+def _check_digit(weighted_sum: np.ndarray) -> np.ndarray:
+    remainder = weighted_sum % 11
+    return np.where(remainder < 2, 0, 11 - remainder)
+
+
+def _validate_digits(documents: list, weights: tuple) -> np.ndarray:
+    length = len(weights[1]) + 1
+    digits = (np.frombuffer("".join(documents).encode("ascii"), dtype=np.uint8)
+              .reshape(-1, length).astype(np.int32) - ord("0"))
+    first = _check_digit(digits[:, :length - 2] @ weights[0])
+    second = _check_digit(digits[:, :length - 1] @ weights[1])
+    repeated = (digits == digits[:, :1]).all(axis=1)
+    return (first == digits[:, -2]) & (second == digits[:, -1]) & ~repeated
+
+
+def validate_documents(documents: Sequence[str]) -> np.ndarray:
+    """Validate a list of CPFs and CNPJs returning a boolean array.
+
+    Values with 11 characters are checked as CPF and the others as CNPJ.
+    """
+    result = np.zeros(len(documents), dtype=bool)
+    cpf_indexes, cpfs, cnpj_indexes, cnpjs = [], [], [], []
+    for index, document in enumerate(documents):
+        if not isinstance(document, str):
+            continue
+        if len(document) == CPF_LENGTH:
+            if document.isascii() and document.isdigit():
+                cpf_indexes.append(index)
+                cpfs.append(document)
+            continue
+        document = document.translate(CNPJ_MASK)
+        if len(document) == CNPJ_LENGTH and document.isascii() and document.isdigit():
+            cnpj_indexes.append(index)
+            cnpjs.append(document)
+
+    if cpfs:
+        result[cpf_indexes] = _validate_digits(cpfs, CPF_WEIGHTS)
+    if cnpjs:
+        result[cnpj_indexes] = _validate_digits(cnpjs, CNPJ_WEIGHTS)
+    return result
+
+
+def validate_document(document: str) -> bool:
+    return bool(validate_documents([document])[0])
+
+
+def normalize_document(document: str) -> str:
+    """The document as stored, a CNPJ without its mask characters."""
+    return document.translate(CNPJ_MASK)
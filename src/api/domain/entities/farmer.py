@@ -1,11 +1,17 @@
+import binascii
+import json
 import logging
-from typing import List
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
 from api.domain.repositories.farmer_repository import FarmerRepository
 
 
+AREA_FIELDS = {"total_area", "agricultural_area", "vegetation_area"}
+
+
 class FarmerNotFound(Exception):
     pass
 
@@ -18,7 +24,11 @@ class FarmerAreaInvalid(Exception):
     pass
 
 
-@dataclass
+class InvalidCursor(Exception):
+    pass
+
+
+@dataclass(slots=True)
 class Farmer:
     cpf_cnpj: str
     name: str
@@ -33,36 +43,147 @@ class Farmer:
     insert_at: datetime
 
     @classmethod
-    def get_all(cls, limit: int, offset: int, repository: FarmerRepository):
-        return repository.get_all(limit=limit, offset=offset)
+    def get_all(cls, limit: int, offset: int, repository: FarmerRepository, filters: Optional[dict] = None):
+        return repository.get_all(limit=limit, offset=offset, filters=filters)
+
+    @classmethod
+    def get_page(cls, limit: int, cursor: Optional[str], repository: FarmerRepository,
+                 filters: Optional[dict] = None) -> Tuple[list, Optional[str]]:
+        farmers = repository.get_page(limit=limit + 1, after=cls.decode_cursor(cursor), filters=filters)
+        return cls._split_page(farmers, limit)
+
+    @classmethod
+    async def get_page_async(cls, limit: int, cursor: Optional[str], repository: FarmerRepository,
+                             filters: Optional[dict] = None) -> Tuple[list, Optional[str]]:
+        farmers = await repository.get_page(limit=limit + 1, after=cls.decode_cursor(cursor), filters=filters)
+        return cls._split_page(farmers, limit)
+
+    @classmethod
+    def _split_page(cls, farmers: list, limit: int) -> Tuple[list, Optional[str]]:
+        if len(farmers) <= limit:
+            return farmers, None
+        farmers = farmers[:limit]
+        return farmers, cls.encode_cursor(farmers[-1].cpf_cnpj)
+
+    @staticmethod
+    def encode_cursor(cpf_cnpj: str) -> str:
+        return urlsafe_b64encode(json.dumps({"cpf_cnpj": cpf_cnpj}).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: Optional[str]) -> Optional[str]:
+        if not cursor:
+            return None
+        try:
+            return json.loads(urlsafe_b64decode(cursor.encode()))["cpf_cnpj"]
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise InvalidCursor("Invalid cursor.")
+
+    @classmethod
+    def get_changes(cls, since: Optional[str], limit: int,
+                    repository: FarmerRepository) -> Tuple[list, Optional[str], bool]:
+        """Changes after the ``since`` token, the token to resume from and
+        whether there are more changes already.
+
+        Changes are read in the order of the transactions writing them, up to
+        the oldest one still running: it may commit after the changes of the
+        newer ones, so they are held back for the next call.
+        """
+        after = cls.decode_since(since)
+        until = repository.get_changes_until()
+        changes = repository.get_changes(limit=limit + 1, after=after, until=until)
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        if not changes:
+            return changes, since, has_more
+        return changes, cls.encode_since(changes[-1]), has_more
+
+    @staticmethod
+    def encode_since(change: "FarmerChange") -> str:
+        watermark = {"change_xid": change.change_xid, "cpf_cnpj": change.cpf_cnpj}
+        return urlsafe_b64encode(json.dumps(watermark).encode()).decode()
+
+    @staticmethod
+    def decode_since(since: Optional[str]) -> Optional[Tuple[int, str]]:
+        if not since:
+            return None
+        try:
+            watermark = json.loads(urlsafe_b64decode(since.encode()))
+            return int(watermark["change_xid"]), str(watermark["cpf_cnpj"])
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise InvalidCursor("Invalid since token.")
+
+    @classmethod
+    def search(cls, query: str, limit: int, repository: FarmerRepository):
+        return repository.search(query=query, limit=limit)
+
+    @classmethod
+    def get_summary(cls, repository: FarmerRepository):
+        return repository.get_summary()
+
+    @classmethod
+    def get_version(cls, repository: FarmerRepository):
+        return repository.get_version()
+
+    @classmethod
+    def get_by_cpf_cnpj(cls, cpf_cnpj: str, repository: FarmerRepository):
+        return repository.get_by_cpf_cnpj(cpf_cnpj)
+
+    @classmethod
+    def export(cls, batch_size: int, repository: FarmerRepository):
+        return repository.iter_all(batch_size=batch_size)
 
     @classmethod
     def create(cls, data: dict, repository: FarmerRepository):
         return repository.create(data)
 
+    @classmethod
+    def bulk_create(cls, data: List[dict], repository: FarmerRepository):
+        return repository.bulk_create(data)
+
     @classmethod
     def delete(cls, cpf_cnpj: str, repository: FarmerRepository):
         return repository.delete(cpf_cnpj)
-    
+
+    @classmethod
+    def bulk_delete(cls, cpf_cnpjs: List[str], repository: FarmerRepository):
+        return repository.bulk_delete(cpf_cnpjs)
+
     @classmethod
     def update(cls, cpf_cnpj: str, data: dict, repository: FarmerRepository):
-        farmer = repository.get_by_cpf_cnpj(cpf_cnpj)
-        cls.validate_total_area(data.get("total_area", farmer.total_area),
-                            data.get("agricultural_area", farmer.agricultural_area),
-                            data.get("vegetation_area", farmer.vegetation_area))
-        cls.adjust_farming_options(farmer, data.get("farming_options"))
-        return repository.update(farmer=farmer, data=data)
-    
+        cls.validate_areas_given(data)
+        return repository.update(cpf_cnpj=cpf_cnpj, data=data)
+
+    @classmethod
+    async def update_async(cls, cpf_cnpj: str, data: dict, repository: FarmerRepository):
+        cls.validate_areas_given(data)
+        return await repository.update(cpf_cnpj=cpf_cnpj, data=data)
+
+    @classmethod
+    def validate_areas_given(cls, data: dict):
+        """Validates the areas when the update has all of them.
+
+        Partial updates are checked against the stored areas by the database.
+        """
+        if AREA_FIELDS <= data.keys():
+            cls.validate_total_area(data["total_area"], data["agricultural_area"], data["vegetation_area"])
+
     @staticmethod
     def validate_total_area(total_area, agricultural_area, vegetation_area):
         if agricultural_area + vegetation_area > total_area:
-            raise FarmerAreaInvalid(f"Agricultural area {agricultural_area} plus "+ 
-                                    f"vegetation area {vegetation_area} cannot be "+
+            raise FarmerAreaInvalid(f"Agricultural area {agricultural_area} plus " +
+                                    f"vegetation area {vegetation_area} cannot be " +
                                     f"greater than total area {total_area}")
-    
-    @staticmethod
-    def adjust_farming_options(farmer, new_farming_options):
-        if new_farming_options:
-            temp_options = farmer.farming_options
-            temp_options.extend(new_farming_options)
-            new_farming_options = list(set(temp_options))
+
+
+@dataclass(slots=True)
+class FarmerChange:
+    """A farmer created or updated at ``changed_at``, or deleted then when
+    ``farmer`` is None, by the transaction ``change_xid``."""
+    cpf_cnpj: str
+    changed_at: datetime
+    farmer: Optional[Farmer] = None
+    change_xid: int = 0
+
+    @property
+    def deleted(self) -> bool:
+        return self.farmer is None
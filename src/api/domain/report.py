@@ -0,0 +1,175 @@
+"""Analytics report of the farmers registry computed with NumPy.
+
+The report columns are streamed in chunks, kept as one array per column and
+every figure is computed over the whole arrays: area percentiles and
+histograms, the preservation ratio (vegetation over total area) and the
+breakdowns by state and by crop. The breakdowns use ``np.bincount`` over the
+state codes and a mask per farming option bit, so the cost does not depend on
+the number of groups.
+"""
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+AREA_COLUMNS = ("total_area", "agricultural_area", "vegetation_area")
+
+
+ROW_DTYPE = np.dtype([
+    ("state", "U2"),
+    ("total_area", np.int32),
+    ("agricultural_area", np.int32),
+    ("vegetation_area", np.int32),
+    ("farming_options", np.int16),
+])
+
+
+def collect_columns(chunks: Iterable[list]) -> dict:
+    """Turn chunks of ``(state, total_area, agricultural_area,
+    vegetation_area, farming_options)`` tuples into one array per column."""
+    parts = [np.fromiter(chunk, dtype=ROW_DTYPE, count=len(chunk)) for chunk in chunks]
+    rows = np.concatenate(parts) if parts else np.empty(0, dtype=ROW_DTYPE)
+    return {name: np.ascontiguousarray(rows[name]) for name in ROW_DTYPE.names}
+
+
+def _describe(values: np.ndarray) -> dict:
+    if not len(values):
+        return dict(mean=None, min=None, max=None, percentiles={f"p{p}": None for p in PERCENTILES})
+    return dict(
+        mean=round(values.mean().item(), 4),
+        min=round(values.min().item(), 4),
+        max=round(values.max().item(), 4),
+        percentiles={f"p{p}": round(value, 4)
+                     for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES).tolist())},
+    )
+
+
+def _histogram(values: np.ndarray, bins, range_: Optional[tuple] = None) -> dict:
+    counts, edges = np.histogram(values, bins=bins, range=range_)
+    return dict(edges=np.round(edges, 4).tolist(), counts=counts.tolist())
+
+
+def _ratio(numerator, denominator):
+    """``numerator / denominator`` rounded, None where the denominator is 0."""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    ratio = np.divide(numerator, denominator, out=np.full(numerator.shape, np.nan), where=denominator > 0)
+    return [None if np.isnan(value) else round(value, 4) for value in ratio.tolist()]
+
+
+def _group_medians(codes: np.ndarray, values: np.ndarray, groups: int) -> np.ndarray:
+    """Median of ``values`` for every code in ``range(groups)``, NaN for the
+    codes without values. One sort for all the groups."""
+    counts = np.bincount(codes, minlength=groups)
+    ordered = values[np.lexsort((values, codes))].astype(np.float64)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    medians = np.full(groups, np.nan)
+    present = counts > 0
+    low = starts[present] + (counts[present] - 1) // 2
+    high = starts[present] + counts[present] // 2
+    medians[present] = (ordered[low] + ordered[high]) / 2
+    return medians
+
+
+def build_report(columns: dict, options: dict, bins: int = 10, reserve: float = 0.2) -> dict:
+    """The report of the arrays returned by ``collect_columns``.
+
+    ``options`` maps every farming option name to its bit in the mask. The
+    preservation ratio of a farm is its vegetation area over its total area,
+    farms without area are left out of it; the ratio of a state or crop is
+    weighted by area. ``reserve`` is the minimum ratio a farm should keep, the
+    farms below it are counted.
+    """
+    total = columns["total_area"]
+    agricultural = columns["agricultural_area"]
+    vegetation = columns["vegetation_area"]
+    with_area = total > 0
+    preservation = vegetation[with_area] / total[with_area]
+    below_reserve = np.zeros(len(total), dtype=bool)
+    below_reserve[with_area] = preservation < reserve
+
+    states, codes = np.unique(columns["state"], return_inverse=True)
+    groups = len(states)
+    farmers_by_state = np.bincount(codes, minlength=groups)
+    total_by_state = np.bincount(codes, weights=total, minlength=groups)
+    agricultural_by_state = np.bincount(codes, weights=agricultural, minlength=groups)
+    vegetation_by_state = np.bincount(codes, weights=vegetation, minlength=groups)
+    below_by_state = np.bincount(codes, weights=below_reserve, minlength=groups)
+    medians = _group_medians(codes, total, groups)
+
+    crops = []
+    for name, bit in options.items():
+        grown = (columns["farming_options"] & bit) != 0
+        crop_total = total[grown].sum().item()
+        crops.append(dict(
+            farming_option=name,
+            farmers=int(np.count_nonzero(grown)),
+            total_area=crop_total,
+            agricultural_area=agricultural[grown].sum().item(),
+            vegetation_area=vegetation[grown].sum().item(),
+            preservation_ratio=_ratio([vegetation[grown].sum()], [crop_total])[0],
+        ))
+
+    return dict(
+        farmers=len(total),
+        areas={column: dict(sum=columns[column].sum().item(), **_describe(columns[column]))
+               for column in AREA_COLUMNS},
+        total_area_histogram=_histogram(total, bins) if len(total) else dict(edges=[], counts=[]),
+        preservation=dict(
+            **_describe(preservation),
+            reserve=reserve,
+            below_reserve=int(np.count_nonzero(below_reserve)),
+            histogram=_histogram(preservation, bins, (0, 1)),
+        ),
+        states=[
+            dict(
+                state=state,
+                farmers=farmers,
+                total_area=int(total_area),
+                agricultural_area=int(agricultural_area),
+                vegetation_area=int(vegetation_area),
+                median_total_area=median,
+                preservation_ratio=ratio,
+                below_reserve=int(below),
+            )
+            for state, farmers, total_area, agricultural_area, vegetation_area, median, ratio, below in zip(
+                states.tolist(), farmers_by_state.tolist(), total_by_state.tolist(),
+                agricultural_by_state.tolist(), vegetation_by_state.tolist(), medians.tolist(),
+                _ratio(vegetation_by_state, total_by_state), below_by_state.tolist(),
+            )
+        ],
+        crops=crops,
+    )
+
+
+def _histogram_rows(section: str, histogram: dict) -> Iterator[tuple]:
+    edges = histogram["edges"]
+    for low, high, count in zip(edges, edges[1:], histogram["counts"]):
+        yield section, f"{low}-{high}", "farmers", count
+
+
+def report_rows(report: dict) -> Iterator[tuple]:
+    """The report flattened in ``(section, group, metric, value)`` rows, the
+    layout of the CSV output."""
+    yield "registry", "", "farmers", report["farmers"]
+    for column, described in report["areas"].items():
+        for metric in ("sum", "mean", "min", "max"):
+            yield "areas", column, metric, described[metric]
+        for metric, value in described["percentiles"].items():
+            yield "areas", column, metric, value
+    yield from _histogram_rows("total_area_histogram", report["total_area_histogram"])
+    preservation = report["preservation"]
+    for metric in ("mean", "min", "max", "reserve", "below_reserve"):
+        yield "preservation", "", metric, preservation[metric]
+    for metric, value in preservation["percentiles"].items():
+        yield "preservation", "", metric, value
+    yield from _histogram_rows("preservation_histogram", preservation["histogram"])
+    for state in report["states"]:
+        for metric, value in state.items():
+            if metric != "state":
+                yield "state", state["state"], metric, value
+    for crop in report["crops"]:
+        for metric, value in crop.items():
+            if metric != "farming_option":
+                yield "crop", crop["farming_option"], metric, value
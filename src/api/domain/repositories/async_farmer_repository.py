@@ -0,0 +1,326 @@
+import logging
+from typing import TYPE_CHECKING, List, Optional
+
+from sqlalchemy import and_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+from api.domain.repositories.farmer_repository import (
+    CHECK_VIOLATION,
+    FARMER_COLUMNS,
+    FarmerRepository,
+    delete_with_tombstones,
+    farmer_filters,
+    farmer_key,
+    moved_by_concurrent_update
+)
+from api.infrastructure.database.async_engine import async_db
+from api.infrastructure.database.models import Farmer as FarmerTable, current_xid, utc_now
+from api.infrastructure.metrics import timed
+
+if TYPE_CHECKING:
+    from api.domain.entities.farmer import Farmer
+
+logger = logging.getLogger("agro")
+
+
+async def execute_by_key(statement):
+    """Executes a write keyed by ``farmer_key`` in its own transaction, once
+    more when it was ``moved_by_concurrent_update``. The result is buffered."""
+    for attempt in range(2):
+        try:
+            async with async_db.session() as session, session.begin():
+                return await session.execute(statement)
+        except DBAPIError as e:
+            if attempt or not moved_by_concurrent_update(e):
+                raise e
+
+
+class AsyncSQLAlchemyFarmerRepository(FarmerRepository):
+    """Async implementation of ``FarmerRepository`` on top of asyncpg.
+
+    Every method is a coroutine running Core statements and returning detached
+    ``Farmer`` entities, so a single process keeps many queries in flight.
+    """
+
+    @staticmethod
+    def _build_farmer(row) -> "Farmer":
+        from api.domain.entities.farmer import Farmer
+        return Farmer(*row)
+
+    @classmethod
+    @timed("create")
+    async def create(
+        cls,
+        data: dict
+    ) -> "Farmer":
+        from api.domain.entities.farmer import FarmerAlreadyRegistered
+        logger.info(
+            "Creating farmer.",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "create",
+                    "data": data
+                }
+            },
+        )
+        statement = (
+            insert(FarmerTable)
+            .values(**data, insert_at=utc_now(), update_at=utc_now(), change_xid=current_xid())
+            .on_conflict_do_nothing()
+            .returning(*FARMER_COLUMNS)
+        )
+        try:
+            async with async_db.session() as session, session.begin():
+                row = (await session.execute(statement)).one_or_none()
+        except IntegrityError as e:
+            logger.exception(
+                "Error while trying to create farmer. Integrity error.",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "create",
+                        "data": data,
+                        "error": str(e)
+                    }
+                },
+            )
+            raise FarmerAlreadyRegistered("Farmer already registered")
+        except Exception as e:
+            logger.exception(
+                "Error while trying to create farmer",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "create",
+                        "data": data,
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+
+        if row is None:
+            raise FarmerAlreadyRegistered("Farmer already registered")
+        return cls._build_farmer(row)
+
+    @classmethod
+    @timed("delete")
+    async def delete(
+        cls,
+        cpf_cnpj: str
+    ) -> None:
+        from api.domain.entities.farmer import FarmerNotFound
+        logger.info(
+            "Deleting farmer.",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "delete",
+                    "cpf_cnpj": cpf_cnpj
+                }
+            },
+        )
+        try:
+            statement = delete_with_tombstones(and_(*farmer_key(cpf_cnpj)))
+            deleted = (await execute_by_key(statement)).scalar_one_or_none()
+        except Exception as e:
+            logger.exception(
+                "Error while trying to delete farmer",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "delete",
+                        "cpf_cnpj": cpf_cnpj,
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+        if deleted is None:
+            raise FarmerNotFound("Farmer not found.")
+        return None
+
+    @classmethod
+    @timed("get_by_cpf_cnpj")
+    async def get_by_cpf_cnpj(
+        cls,
+        cpf_cnpj: str
+    ) -> "Farmer":
+        from api.domain.entities.farmer import FarmerNotFound
+        logger.info(
+            "Getting farmer by cpf_cnpj.",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "get_by_cpf_cnpj",
+                    "cpf_cnpj": cpf_cnpj
+                }
+            },
+        )
+        try:
+            async with async_db.session() as session:
+                statement = select(*FARMER_COLUMNS).where(*farmer_key(cpf_cnpj))
+                row = (await session.execute(statement)).one_or_none()
+        except Exception as e:
+            logger.exception(
+                "Error while trying to get farmer by cpf_cnpj",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "get_by_cpf_cnpj",
+                        "cpf_cnpj": cpf_cnpj,
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+        if row is None:
+            raise FarmerNotFound("Farmer not found.")
+        return cls._build_farmer(row)
+
+    @classmethod
+    @timed("update")
+    async def update(
+        cls,
+        cpf_cnpj: str,
+        data: dict
+    ) -> "Farmer":
+        from api.domain.entities.farmer import FarmerNotFound
+        logger.info(
+            "Updateing farmer.",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "update",
+                    "data": data,
+                    "cpf_cnpj": cpf_cnpj
+                }
+            },
+        )
+        try:
+            statement = (
+                update(FarmerTable)
+                .where(*farmer_key(cpf_cnpj))
+                .values(**data, update_at=utc_now(), change_xid=current_xid())
+                .returning(*FARMER_COLUMNS)
+            )
+            row = (await execute_by_key(statement)).one_or_none()
+        except Exception as e:
+            if isinstance(e, IntegrityError) and getattr(e.orig, "pgcode", None) == CHECK_VIOLATION:
+                await cls._raise_area_invalid(cpf_cnpj, data)
+            logger.exception(
+                "Error while trying to update farmer",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "update",
+                        "data": data,
+                        "cpf_cnpj": cpf_cnpj,
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+        if row is None:
+            raise FarmerNotFound("Farmer not found.")
+        return cls._build_farmer(row)
+
+    @classmethod
+    async def _raise_area_invalid(cls, cpf_cnpj: str, data: dict) -> None:
+        from api.domain.entities.farmer import Farmer, FarmerAreaInvalid
+        current = await cls.get_by_cpf_cnpj(cpf_cnpj)
+        Farmer.validate_total_area(data.get("total_area", current.total_area),
+                                   data.get("agricultural_area", current.agricultural_area),
+                                   data.get("vegetation_area", current.vegetation_area))
+        raise FarmerAreaInvalid("Agricultural area plus vegetation area cannot be greater than total area")
+
+    @classmethod
+    @timed("get_all")
+    async def get_all(
+        cls,
+        limit: int,
+        offset: int,
+        filters: Optional[dict] = None
+    ) -> List["Farmer"]:
+        logger.info(
+            "Getting farmers",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "get_all",
+                    "limit": limit,
+                    "offset": offset,
+                    "filters": filters
+                }
+            },
+        )
+        statement = (select(*FARMER_COLUMNS)
+                     .where(*farmer_filters(filters))
+                     .limit(limit).offset(offset))
+        try:
+            async with async_db.session() as session:
+                rows = (await session.execute(statement)).all()
+        except Exception as e:
+            logger.exception(
+                "Error while trying to get farmers",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "get_all",
+                        "limit": limit,
+                        "offset": offset,
+                        "filters": filters,
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+
+        return [cls._build_farmer(row) for row in rows]
+
+    @classmethod
+    async def get_page(
+        cls,
+        limit: int,
+        after: Optional[str] = None,
+        filters: Optional[dict] = None
+    ) -> List["Farmer"]:
+        logger.info(
+            "Getting farmers page",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "get_page",
+                    "limit": limit,
+                    "after": after,
+                    "filters": filters
+                }
+            },
+        )
+        statement = (select(*FARMER_COLUMNS)
+                     .where(*farmer_filters(filters))
+                     .order_by(FarmerTable.cpf_cnpj).limit(limit))
+        if after is not None:
+            statement = statement.where(FarmerTable.cpf_cnpj > after)
+        try:
+            async with async_db.session() as session:
+                rows = (await session.execute(statement)).all()
+        except Exception as e:
+            logger.exception(
+                "Error while trying to get farmers page",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "get_page",
+                        "limit": limit,
+                        "after": after,
+                        "filters": filters,
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+
+        return [cls._build_farmer(row) for row in rows]
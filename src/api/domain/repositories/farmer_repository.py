@@ -1,13 +1,127 @@
 from abc import ABC
+import csv
+import io
 import logging
-from typing import Union, Optional
-from sqlalchemy.exc import IntegrityError
+from dataclasses import replace
+from datetime import datetime
+from typing import TYPE_CHECKING, Union, Optional, List, Iterator, Tuple
+from flask import current_app
+from sqlalchemy import (
+    SmallInteger, String, and_, any_, bindparam, delete, func, literal_column, or_, select, tuple_, update
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import DBAPIError, IntegrityError
 
 from api.app import db
-from api.infrastructure.database.models import Farmer as FarmerTable
+from api.infrastructure.cache import farmer_cache, farmers_page_cache
+from api.infrastructure.database.prepared import execute_prepared
+from api.infrastructure.database.models import (
+    FARMING_OPTIONS_MASK,
+    Farmer as FarmerTable,
+    FarmerStateSummary,
+    FarmerDocument,
+    FarmerOptionSummary,
+    FarmerTombstone,
+    FarmerVersion,
+    CURRENT_XID,
+    current_xid,
+    current_xmin,
+    utc_now
+)
+from api.infrastructure.metrics import timed
+
+if TYPE_CHECKING:
+    from api.domain.entities.farmer import Farmer, FarmerChange
 
 logger = logging.getLogger("agro")
 
+CHECK_VIOLATION = "23514"
+SERIALIZATION_FAILURE = "40001"
+
+# In the order of the ``Farmer`` entity fields, so a row builds it positionally.
+FARMER_COLUMNS = [
+    FarmerTable.__table__.c[name] for name in (
+        "cpf_cnpj", "name", "farm_name", "city", "state", "total_area",
+        "agricultural_area", "vegetation_area", "farming_options", "update_at", "insert_at",
+    )
+]
+
+
+def farmer_filters(filters: Optional[dict]) -> list:
+    """Conditions for the farmers listing filters.
+
+    ``farming_option`` tests its bit with the mask rendered inline, so the
+    condition matches the predicate of the option partial index whatever the
+    driver does with bound parameters. ``state``/``city`` and the area range
+    use the B-tree indexes.
+    """
+    filters = filters or {}
+    conditions = []
+    if filters.get("state") is not None:
+        conditions.append(FarmerTable.state == filters["state"])
+    if filters.get("city") is not None:
+        conditions.append(FarmerTable.city == filters["city"])
+    if filters.get("farming_option") is not None:
+        mask = FARMING_OPTIONS_MASK.mask([filters["farming_option"]])
+        conditions.append(
+            FarmerTable.farming_options.op("&", return_type=SmallInteger)(literal_column(str(mask)))
+            != literal_column("0"))
+    if filters.get("min_total_area") is not None:
+        conditions.append(FarmerTable.total_area >= filters["min_total_area"])
+    if filters.get("max_total_area") is not None:
+        conditions.append(FarmerTable.total_area <= filters["max_total_area"])
+    return conditions
+
+
+def farmer_key(cpf_cnpj: str) -> list:
+    """Conditions matching one farmer. Filtered by the document alone, a
+    statement is planned and run on every partition. The state read from
+    ``farmer_document`` in a subquery of the same statement lets the executor
+    prune it to one partition at run time, in a single round trip.
+    """
+    state = select(FarmerDocument.state).where(FarmerDocument.cpf_cnpj == cpf_cnpj).scalar_subquery()
+    return [FarmerTable.cpf_cnpj == cpf_cnpj, FarmerTable.state == state]
+
+
+def moved_by_concurrent_update(error: Exception) -> bool:
+    """Whether a write keyed by ``farmer_key`` failed because a concurrent
+    update moved the farmer to another state partition after the statement
+    read its state. Running the statement again reads the new one."""
+    return isinstance(error, DBAPIError) and getattr(error.orig, "pgcode", None) == SERIALIZATION_FAILURE
+
+
+def execute_by_key(statement):
+    """Executes a statement keyed by ``farmer_key`` on the session, once more
+    when it was ``moved_by_concurrent_update``.
+
+    It runs prepared, otherwise planning it for every partition would cost
+    more than the round trip the subquery saves.
+    """
+    try:
+        return execute_prepared(db.session, statement)
+    except DBAPIError as e:
+        if not moved_by_concurrent_update(e):
+            raise e
+        db.session.rollback()
+        return execute_prepared(db.session, statement)
+
+
+def delete_with_tombstones(condition):
+    """``DELETE ... RETURNING`` in a CTE feeding the insert of a tombstone per
+    deleted farmer, so a deletion and its record for the changes feed are a
+    single statement. Returns the deleted cpf_cnpj."""
+    # On the Table, the ORM would take the execute parameters for a bulk insert.
+    tombstones = FarmerTombstone.__table__
+    deleted = delete(FarmerTable).where(condition).returning(FarmerTable.cpf_cnpj).cte("deleted")
+    statement = insert(tombstones).from_select(
+        ["cpf_cnpj", "delete_at", "change_xid"],
+        select(deleted.c.cpf_cnpj, utc_now(), current_xid()),
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[tombstones.c.cpf_cnpj],
+        set_={"delete_at": statement.excluded.delete_at, "change_xid": statement.excluded.change_xid},
+    ).returning(tombstones.c.cpf_cnpj)
+
 
 class FarmerRepository(ABC):
     @classmethod
@@ -15,17 +129,66 @@ class FarmerRepository(ABC):
         raise NotImplementedError
 
     @classmethod
-    def update(cls, cpf_cnpj: str, data: dict) -> "User":
+    def bulk_create(cls, data: List[dict]) -> List[str]:
+        raise NotImplementedError
+
+    @classmethod
+    def update(cls, cpf_cnpj: str, data: dict) -> "Farmer":
         raise NotImplementedError
 
     @classmethod
     def delete(cls, cpf_cnpj: str) -> "Farmer":
         raise NotImplementedError
+
+    @classmethod
+    def bulk_delete(cls, cpf_cnpjs: List[str]) -> List[str]:
+        raise NotImplementedError
     
     @classmethod
     def get_by_cpf_cnpj(cls, cpf_cnpj: str) -> "Farmer":
         raise NotImplementedError
 
+    @classmethod
+    def get_all(cls, limit: int, offset: int, filters: Optional[dict] = None) -> List["Farmer"]:
+        raise NotImplementedError
+
+    @classmethod
+    def get_page(cls, limit: int, after: Optional[str] = None, filters: Optional[dict] = None) -> List["Farmer"]:
+        raise NotImplementedError
+
+    @classmethod
+    def search(cls, query: str, limit: int) -> List["Farmer"]:
+        raise NotImplementedError
+
+    @classmethod
+    def get_summary(cls) -> dict:
+        raise NotImplementedError
+
+    @classmethod
+    def get_version(cls) -> Tuple[int, Optional[datetime]]:
+        raise NotImplementedError
+
+    @classmethod
+    def get_changes(cls, limit: int, after: Optional[Tuple[int, str]] = None,
+                    until: Optional[int] = None) -> List["FarmerChange"]:
+        raise NotImplementedError
+
+    @classmethod
+    def get_changes_until(cls) -> Optional[int]:
+        raise NotImplementedError
+
+    @classmethod
+    def iter_all(cls, batch_size: int) -> Iterator["Farmer"]:
+        raise NotImplementedError
+
+    @classmethod
+    def iter_report_columns(cls, batch_size: int) -> Iterator[list]:
+        raise NotImplementedError
+
+    @classmethod
+    def copy_merge(cls, rows: List[dict]) -> dict:
+        raise NotImplementedError
+
 
 class SQLAlchemyFarmerRepository(FarmerRepository):
     @staticmethod
@@ -40,16 +203,26 @@ class SQLAlchemyFarmerRepository(FarmerRepository):
             total_area=farmer.total_area,
             agricultural_area=farmer.agricultural_area,
             vegetation_area=farmer.vegetation_area,
-            farming_options=farmer.farming_options,
+            farming_options=list(farmer.farming_options or []),
             insert_at=farmer.insert_at,
             update_at=farmer.update_at,
         )
 
+    @staticmethod
+    def _build_farmers(rows) -> List["Farmer"]:
+        """Entities straight from ``FARMER_COLUMNS`` rows, no ORM instances or
+        identity map involved."""
+        from api.domain.entities.farmer import Farmer
+        return [Farmer(*row) for row in rows]
+
     @classmethod
+    @timed("create")
     def create(
         cls,
         data: dict
     ) -> "Farmer":
+        """Inserts the farmer. The insert of a document registered in any state
+        is skipped by the ``farmer_document`` trigger, so no row comes back."""
         from api.domain.entities.farmer import FarmerAlreadyRegistered
         logger.info(
             "Creating farmer.",
@@ -61,9 +234,14 @@ class SQLAlchemyFarmerRepository(FarmerRepository):
                 }
             },
         )
+        statement = (
+            insert(FarmerTable)
+            .values(**data, insert_at=utc_now(), update_at=utc_now(), change_xid=current_xid())
+            .on_conflict_do_nothing()
+            .returning(*FARMER_COLUMNS)
+        )
         try:
-            farmer = FarmerTable(**data)
-            db.session.add(farmer)
+            farmer = next(iter(cls._build_farmers(db.session.execute(statement))), None)
             db.session.commit()
         except IntegrityError as e:
             db.session.rollback()
@@ -95,9 +273,75 @@ class SQLAlchemyFarmerRepository(FarmerRepository):
             )
             raise e
 
+        if farmer is None:
+            raise FarmerAlreadyRegistered("Farmer already registered")
         return farmer
 
     @classmethod
+    def bulk_create(
+        cls,
+        data: List[dict]
+    ) -> List[str]:
+        """Insert farmers in multi-row INSERT batches skipping the duplicated ones.
+
+        Returns the cpf_cnpj of the farmers actually inserted. Documents already
+        registered, or repeated inside ``data``, are left out of the result.
+        The batches share one transaction, so a failed batch saves no farmer.
+        """
+        batch_size = current_app.config["BULK_INSERT_BATCH_SIZE"]
+        logger.info(
+            "Bulk creating farmers.",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "bulk_create",
+                    "total": len(data),
+                    "batch_size": batch_size
+                }
+            },
+        )
+        created = []
+        seen = set()
+        rows = []
+        for item in data:
+            if item["cpf_cnpj"] in seen:
+                continue
+            seen.add(item["cpf_cnpj"])
+            rows.append(item)
+
+        try:
+            for start in range(0, len(rows), batch_size):
+                # insert_at, update_at and change_xid are the column defaults.
+                batch = rows[start:start + batch_size]
+                statement = (
+                    insert(FarmerTable)
+                    .on_conflict_do_nothing()
+                    .returning(FarmerTable.cpf_cnpj)
+                )
+                created.extend(db.session.execute(
+                    statement, batch,
+                    execution_options={"insertmanyvalues_page_size": batch_size}
+                ).scalars().all())
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(
+                "Error while trying to bulk create farmers",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "bulk_create",
+                        "total": len(data),
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+
+        return created
+
+    @classmethod
+    @timed("delete")
     def delete(
         cls,
         cpf_cnpj: str
@@ -114,28 +358,70 @@ class SQLAlchemyFarmerRepository(FarmerRepository):
             },
         )
         try:
-            farmer = FarmerTable.query.filter_by(cpf_cnpj=cpf_cnpj).first()
-            if farmer:
-                db.session.delete(farmer)
-                db.session.commit()
+            statement = delete_with_tombstones(and_(*farmer_key(cpf_cnpj)))
+            deleted = execute_by_key(statement).scalar_one_or_none()
+            db.session.commit()
         except Exception as e:
             db.session.rollback()
             logger.exception(
-                "Error while trying to create farmer",
+                "Error while trying to delete farmer",
                 extra={
                     "props": {
                         "service": "PostgreSQL",
-                        "service_method": "create",
-                        "data": data
+                        "service_method": "delete",
+                        "cpf_cnpj": cpf_cnpj,
+                        "error": str(e)
                     }
                 },
             )
             raise e
-        if not farmer:
+        if deleted is None:
             raise FarmerNotFound("Farmer not found.")
         return None
+
+    @classmethod
+    def bulk_delete(
+        cls,
+        cpf_cnpjs: List[str]
+    ) -> List[str]:
+        """Delete the farmers in a single ``DELETE ... WHERE cpf_cnpj = ANY(:ids)``.
+
+        Returns the cpf_cnpj of the farmers actually deleted, the documents not
+        registered are left out of the result.
+        """
+        logger.info(
+            "Bulk deleting farmers.",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "bulk_delete",
+                    "total": len(cpf_cnpjs)
+                }
+            },
+        )
+        statement = delete_with_tombstones(
+            FarmerTable.cpf_cnpj == any_(bindparam("cpf_cnpjs", type_=ARRAY(String))))
+        try:
+            deleted = db.session.execute(statement, {"cpf_cnpjs": list(cpf_cnpjs)}).scalars().all()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(
+                "Error while trying to bulk delete farmers",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "bulk_delete",
+                        "total": len(cpf_cnpjs),
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+        return deleted
     
     @classmethod
+    @timed("get_by_cpf_cnpj")
     def get_by_cpf_cnpj(
         cls,
         cpf_cnpj: str
@@ -152,7 +438,8 @@ class SQLAlchemyFarmerRepository(FarmerRepository):
             },
         )
         try:
-            farmer = FarmerTable.query.filter_by(cpf_cnpj=cpf_cnpj).first()
+            statement = select(*FARMER_COLUMNS).where(*farmer_key(cpf_cnpj))
+            farmer = next(iter(cls._build_farmers(execute_by_key(statement))), None)
         except Exception as e:
             db.session.rollback()
             logger.exception(
@@ -172,11 +459,19 @@ class SQLAlchemyFarmerRepository(FarmerRepository):
         return farmer
 
     @classmethod
+    @timed("update")
     def update(
         cls,
-        farmer: "Farmer",
+        cpf_cnpj: str,
         data: dict
     ) -> "Farmer":
+        """Updates the farmer with one ``UPDATE ... RETURNING`` on its state
+        partition, a change of ``state`` moves the row to the new partition.
+
+        The areas are checked by the ``farmer_area_check`` constraint, so a
+        concurrent update can't leave the farm with more area in use than it has.
+        """
+        from api.domain.entities.farmer import FarmerNotFound
         logger.info(
             "Updateing farmer.",
             extra={
@@ -184,39 +479,59 @@ class SQLAlchemyFarmerRepository(FarmerRepository):
                     "service": "PostgreSQL",
                     "service_method": "update",
                     "data": data,
-                    "cpf_cnpj": farmer.cpf_cnpj
+                    "cpf_cnpj": cpf_cnpj
                 }
             },
         )
         try:
-            for field_name, new_value in data.items():
-                setattr(farmer, field_name, new_value)
-            db.session.add(farmer)
+            statement = (
+                update(FarmerTable)
+                .where(*farmer_key(cpf_cnpj))
+                .values(**data, update_at=utc_now(), change_xid=current_xid())
+                .returning(*FarmerTable.__table__.columns)
+            )
+            row = execute_by_key(statement).one_or_none()
             db.session.commit()
         except Exception as e:
             db.session.rollback()
+            if isinstance(e, IntegrityError) and getattr(e.orig, "pgcode", None) == CHECK_VIOLATION:
+                cls._raise_area_invalid(cpf_cnpj, data)
             logger.exception(
-                "Error while trying to create farmer",
+                "Error while trying to update farmer",
                 extra={
                     "props": {
                         "service": "PostgreSQL",
                         "service_method": "update",
                         "data": data,
-                        "cpf_cnpj": farmer.cpf_cnpj,
+                        "cpf_cnpj": cpf_cnpj,
                         "error": str(e)
                     }
                 },
             )
             raise e
 
-        return farmer
+        if row is None:
+            raise FarmerNotFound("Farmer not found.")
+        return cls._build_farmer(row)
+
+    @classmethod
+    def _raise_area_invalid(cls, cpf_cnpj: str, data: dict) -> None:
+        """Raises ``FarmerAreaInvalid`` with the areas the update would leave."""
+        from api.domain.entities.farmer import Farmer, FarmerAreaInvalid
+        current = SQLAlchemyFarmerRepository.get_by_cpf_cnpj(cpf_cnpj)
+        Farmer.validate_total_area(data.get("total_area", current.total_area),
+                                   data.get("agricultural_area", current.agricultural_area),
+                                   data.get("vegetation_area", current.vegetation_area))
+        raise FarmerAreaInvalid("Agricultural area plus vegetation area cannot be greater than total area")
 
     @classmethod
+    @timed("get_all")
     def get_all(
         cls,
         limit: int,
-        offset: int
-    ) -> "Farmer":
+        offset: int,
+        filters: Optional[dict] = None
+    ) -> List["Farmer"]:
         logger.info(
             "Getting farmers",
             extra={
@@ -224,12 +539,18 @@ class SQLAlchemyFarmerRepository(FarmerRepository):
                     "service": "PostgreSQL",
                     "service_method": "get_all",
                     "limit": limit,
-                    "offset": offset
+                    "offset": offset,
+                    "filters": filters
                 }
             },
         )
+        statement = (
+            select(*FARMER_COLUMNS)
+            .where(*farmer_filters(filters))
+            .limit(limit).offset(offset)
+        )
         try:
-            farmers = FarmerTable.query.limit(limit).offset(offset).all()
+            farmers = cls._build_farmers(db.session.execute(statement))
         except Exception as e:
             db.session.rollback()
             logger.exception(
@@ -240,10 +561,558 @@ class SQLAlchemyFarmerRepository(FarmerRepository):
                         "service_method": "get_all",
                         "limit": limit,
                         "offset": offset,
+                        "filters": filters,
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+
+        return farmers
+
+    @classmethod
+    def get_page(
+        cls,
+        limit: int,
+        after: Optional[str] = None,
+        filters: Optional[dict] = None
+    ) -> List["Farmer"]:
+        """Keyset pagination ordered by the primary key.
+
+        Returns up to ``limit`` farmers with ``cpf_cnpj`` greater than ``after``.
+        """
+        logger.info(
+            "Getting farmers page",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "get_page",
+                    "limit": limit,
+                    "after": after,
+                    "filters": filters
+                }
+            },
+        )
+        statement = select(*FARMER_COLUMNS).where(*farmer_filters(filters))
+        if after is not None:
+            statement = statement.where(FarmerTable.cpf_cnpj > after)
+        statement = statement.order_by(FarmerTable.cpf_cnpj).limit(limit)
+        try:
+            farmers = cls._build_farmers(db.session.execute(statement))
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(
+                "Error while trying to get farmers page",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "get_page",
+                        "limit": limit,
+                        "after": after,
+                        "filters": filters,
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+
+        return farmers
+
+    @classmethod
+    def search(
+        cls,
+        query: str,
+        limit: int
+    ) -> List["Farmer"]:
+        """Typo tolerant search on ``name`` and ``farm_name``.
+
+        ``%>`` is the pg_trgm word similarity operator, served by the trigram GIN
+        indexes of both columns. Results are ranked by the best similarity.
+        """
+        logger.info(
+            "Searching farmers",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "search",
+                    "query": query,
+                    "limit": limit
+                }
+            },
+        )
+        score = func.greatest(
+            func.word_similarity(query, FarmerTable.name),
+            func.word_similarity(query, FarmerTable.farm_name),
+        )
+        statement = (
+            select(*FARMER_COLUMNS)
+            .where(or_(FarmerTable.name.op("%>")(query), FarmerTable.farm_name.op("%>")(query)))
+            .order_by(score.desc(), FarmerTable.cpf_cnpj)
+            .limit(limit)
+        )
+        try:
+            db.session.execute(select(func.set_config(
+                "pg_trgm.word_similarity_threshold",
+                str(current_app.config["FARMERS_SEARCH_THRESHOLD"]),
+                True)))
+            farmers = cls._build_farmers(db.session.execute(statement))
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(
+                "Error while trying to search farmers",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "search",
+                        "query": query,
+                        "limit": limit,
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+
+        return farmers
+
+    @classmethod
+    def get_summary(cls) -> dict:
+        """Read the summary tables maintained by the farmer triggers.
+
+        The cost depends on the number of states and farming options, not on
+        the number of farmers.
+        """
+        logger.info(
+            "Getting farmers summary",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "get_summary"
+                }
+            },
+        )
+        try:
+            states = (FarmerStateSummary.query
+                      .filter(FarmerStateSummary.farm_count > 0)
+                      .order_by(FarmerStateSummary.state)
+                      .all())
+            farming_options = (FarmerOptionSummary.query
+                               .filter(FarmerOptionSummary.farm_count > 0)
+                               .order_by(FarmerOptionSummary.farming_option)
+                               .all())
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(
+                "Error while trying to get farmers summary",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "get_summary",
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+
+        return dict(
+            farm_count=sum(state.farm_count for state in states),
+            total_area=sum(state.total_area for state in states),
+            agricultural_area=sum(state.agricultural_area for state in states),
+            vegetation_area=sum(state.vegetation_area for state in states),
+            states=states,
+            farming_options=farming_options,
+        )
+
+    @classmethod
+    def get_version(cls) -> Tuple[int, Optional[datetime]]:
+        """Write counter and last write time of the farmer table.
+
+        Read from the ``farmer_version`` row bumped by the farmer triggers, a
+        primary key lookup whatever the size of the table.
+        """
+        try:
+            row = db.session.execute(
+                select(FarmerVersion.version, FarmerVersion.update_at).where(FarmerVersion.id == 1)
+            ).one_or_none()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(
+                "Error while trying to get farmers version",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "get_version",
                         "error": str(e)
                     }
                 },
             )
             raise e
+        if row is None:
+            return 0, None
+        return row.version, row.update_at
 
-        return farmers
\ No newline at end of file
+    @classmethod
+    @timed("get_changes")
+    def get_changes(
+        cls,
+        limit: int,
+        after: Optional[Tuple[int, str]] = None,
+        until: Optional[int] = None
+    ) -> List["FarmerChange"]:
+        """Farmers written and deleted after the ``(change_xid, cpf_cnpj)``
+        watermark ``after`` by transactions older than ``until``, in that order.
+
+        The farmers and the tombstones are both read by a keyset range on their
+        ``(change_xid, cpf_cnpj)`` indexes, so the cost follows ``limit`` and
+        not the size of the tables.
+        """
+        from api.domain.entities.farmer import FarmerChange
+        logger.info(
+            "Getting farmers changes",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "get_changes",
+                    "limit": limit,
+                    "after": str(after),
+                    "until": str(until)
+                }
+            },
+        )
+        farmers = cls._changes_range(select(*FARMER_COLUMNS, FarmerTable.change_xid), FarmerTable.change_xid,
+                                     FarmerTable.cpf_cnpj, limit, after, until)
+        tombstones = cls._changes_range(
+            select(FarmerTombstone.cpf_cnpj, FarmerTombstone.delete_at, FarmerTombstone.change_xid),
+            FarmerTombstone.change_xid, FarmerTombstone.cpf_cnpj, limit, after, until)
+        try:
+            changes = [FarmerChange(row.cpf_cnpj, row.update_at, cls._build_farmer(row), row.change_xid)
+                       for row in db.session.execute(farmers)]
+            changes.extend(FarmerChange(cpf_cnpj, delete_at, None, change_xid)
+                           for cpf_cnpj, delete_at, change_xid in db.session.execute(tombstones))
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(
+                "Error while trying to get farmers changes",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "get_changes",
+                        "limit": limit,
+                        "after": str(after),
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+        changes.sort(key=lambda change: (change.change_xid, change.cpf_cnpj))
+        return changes[:limit]
+
+    @classmethod
+    def get_changes_until(cls) -> Optional[int]:
+        """Oldest transaction id still running, the ``xmin`` of a snapshot.
+
+        Rows carry the id of the transaction writing them, so every change
+        below it is committed and visible to the statements run after this
+        one, while a transaction still running has an id above it. Only the
+        transactions that wrote get an id, the long reads of the export or
+        the report hold nothing back.
+        """
+        try:
+            return db.session.execute(select(current_xmin())).scalar_one()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(
+                "Error while trying to get farmers changes until",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "get_changes_until",
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+
+    @staticmethod
+    def _changes_range(statement, change_xid, cpf_cnpj, limit: int,
+                       after: Optional[Tuple[int, str]], until: Optional[int]):
+        if after is not None:
+            statement = statement.where(tuple_(change_xid, cpf_cnpj) > tuple_(*after))
+        if until is not None:
+            statement = statement.where(change_xid < until)
+        return statement.order_by(change_xid, cpf_cnpj).limit(limit)
+
+    @classmethod
+    def iter_all(
+        cls,
+        batch_size: int
+    ) -> Iterator["Farmer"]:
+        """Stream every farmer through a server-side cursor.
+
+        The rows are plain column tuples fetched ``batch_size`` at a time, so
+        the memory used does not grow with the table.
+        """
+        logger.info(
+            "Streaming farmers",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "iter_all",
+                    "batch_size": batch_size
+                }
+            },
+        )
+        statement = (
+            select(*FarmerTable.__table__.columns)
+            .order_by(FarmerTable.cpf_cnpj)
+            .execution_options(stream_results=True, yield_per=batch_size)
+        )
+        try:
+            yield from db.session.execute(statement)
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(
+                "Error while trying to stream farmers",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "iter_all",
+                        "batch_size": batch_size,
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+
+    REPORT_COLUMNS = ["state", "total_area", "agricultural_area", "vegetation_area", "farming_options"]
+
+    @classmethod
+    def iter_report_columns(
+        cls,
+        batch_size: int
+    ) -> Iterator[list]:
+        """Stream the columns of the analytics report through a server-side
+        cursor, in lists of up to ``batch_size`` rows.
+
+        Every row is a ``(state, total_area, agricultural_area,
+        vegetation_area, farming_options)`` tuple with the farming options as
+        the raw bitmask, in no particular order. The DBAPI cursor is used
+        directly since building a SQLAlchemy row for each farmer costs more
+        than fetching it.
+        """
+        logger.info(
+            "Streaming farmers report columns",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "iter_report_columns",
+                    "batch_size": batch_size
+                }
+            },
+        )
+        try:
+            cursor = db.session.connection().connection.cursor(name="farmer_report")
+            try:
+                cursor.execute(f"SELECT {', '.join(cls.REPORT_COLUMNS)} FROM farmer")
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        return
+                    yield rows
+            finally:
+                cursor.close()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(
+                "Error while trying to stream farmers report columns",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "iter_report_columns",
+                        "batch_size": batch_size,
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+
+    COPY_COLUMNS = [
+        "cpf_cnpj",
+        "name",
+        "farm_name",
+        "city",
+        "state",
+        "total_area",
+        "agricultural_area",
+        "vegetation_area",
+        "farming_options",
+    ]
+
+    @classmethod
+    def copy_merge(
+        cls,
+        rows: List[dict]
+    ) -> dict:
+        """Load validated farmers with COPY into a staging table and merge them.
+
+        Existing farmers are updated when some value changed and the new ones
+        are inserted. When the same document shows up more than once the last
+        row wins. Returns the amount of inserted, updated and unchanged farmers.
+        """
+        logger.info(
+            "Importing farmers.",
+            extra={
+                "props": {
+                    "service": "PostgreSQL",
+                    "service_method": "copy_merge",
+                    "total": len(rows)
+                }
+            },
+        )
+        columns = ", ".join(cls.COPY_COLUMNS)
+        assignments = ", ".join(f"{column} = source.{column}" for column in cls.COPY_COLUMNS[1:])
+        current = ", ".join(f"farmer.{column}" for column in cls.COPY_COLUMNS[1:])
+        incoming = ", ".join(f"source.{column}" for column in cls.COPY_COLUMNS[1:])
+        source = (f"SELECT DISTINCT ON (cpf_cnpj) {columns} FROM farmer_import "
+                  f"ORDER BY cpf_cnpj, line DESC")
+        try:
+            cursor = db.session.connection().connection.cursor()
+            cursor.execute(
+                f"CREATE TEMP TABLE farmer_import ON COMMIT DROP AS "
+                f"SELECT {columns}, 0::bigint AS line FROM farmer WITH NO DATA"
+            )
+            cursor.copy_expert(
+                f"COPY farmer_import ({columns}, line) FROM STDIN WITH (FORMAT csv)",
+                cls._copy_buffer(rows)
+            )
+            cursor.execute(f"""
+                UPDATE farmer SET {assignments}, update_at = timezone('utc', now()),
+                change_xid = {CURRENT_XID}
+                FROM ({source}) AS source
+                WHERE farmer.cpf_cnpj = source.cpf_cnpj
+                AND ({current}) IS DISTINCT FROM ({incoming})
+            """)
+            updated = cursor.rowcount
+            cursor.execute(f"""
+                INSERT INTO farmer ({columns}, insert_at, update_at, change_xid)
+                SELECT {columns}, timezone('utc', now()), timezone('utc', now()), {CURRENT_XID}
+                FROM ({source}) AS source
+                ON CONFLICT DO NOTHING
+            """)
+            inserted = cursor.rowcount
+            cursor.execute("SELECT count(DISTINCT cpf_cnpj) FROM farmer_import")
+            total = cursor.fetchone()[0]
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(
+                "Error while trying to import farmers",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "copy_merge",
+                        "total": len(rows),
+                        "error": str(e)
+                    }
+                },
+            )
+            raise e
+
+        return dict(inserted=inserted, updated=updated, unchanged=total - inserted - updated)
+
+    @classmethod
+    def _copy_buffer(cls, rows: List[dict]) -> io.StringIO:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for line, row in enumerate(rows):
+            values = [row[column] for column in cls.COPY_COLUMNS]
+            values[-1] = FARMING_OPTIONS_MASK.mask(values[-1])
+            writer.writerow(values + [line])
+        buffer.seek(0)
+        return buffer
+
+
+class CachedFarmerRepository(SQLAlchemyFarmerRepository):
+    """Read-through cache of ``get_by_cpf_cnpj`` on top of the SQLAlchemy repository.
+
+    The cache holds detached ``Farmer`` entities, so the callers receive copies
+    that are safe to use after the session is gone. Every write invalidates the
+    cached farmer and bumps the write generation of the cached pages.
+    """
+    cache = farmer_cache
+    pages = farmers_page_cache
+
+    @classmethod
+    @timed("create")
+    def create(
+        cls,
+        data: dict
+    ) -> "Farmer":
+        try:
+            farmer = super().create(data)
+        finally:
+            cls.pages.bump()
+        cls.cache.delete(farmer.cpf_cnpj)
+        return farmer
+
+    @classmethod
+    def bulk_create(
+        cls,
+        data: List[dict]
+    ) -> List[str]:
+        try:
+            created = super().bulk_create(data)
+        finally:
+            cls.pages.bump()
+        for cpf_cnpj in created:
+            cls.cache.delete(cpf_cnpj)
+        return created
+
+    @classmethod
+    @timed("delete")
+    def delete(
+        cls,
+        cpf_cnpj: str
+    ) -> "Farmer":
+        try:
+            return super().delete(cpf_cnpj)
+        finally:
+            cls.cache.delete(cpf_cnpj)
+            cls.pages.bump()
+
+    @classmethod
+    def bulk_delete(
+        cls,
+        cpf_cnpjs: List[str]
+    ) -> List[str]:
+        try:
+            return super().bulk_delete(cpf_cnpjs)
+        finally:
+            for cpf_cnpj in cpf_cnpjs:
+                cls.cache.delete(cpf_cnpj)
+            cls.pages.bump()
+
+    @classmethod
+    @timed("get_by_cpf_cnpj")
+    def get_by_cpf_cnpj(
+        cls,
+        cpf_cnpj: str
+    ) -> "Farmer":
+        generation = cls.cache.generation(cpf_cnpj)
+        farmer = cls.cache.get(cpf_cnpj)
+        if farmer is None:
+            farmer = super().get_by_cpf_cnpj(cpf_cnpj)
+            cls.cache.set(cpf_cnpj, farmer, generation)
+        return replace(farmer, farming_options=list(farmer.farming_options))
+
+    @classmethod
+    @timed("update")
+    def update(
+        cls,
+        cpf_cnpj: str,
+        data: dict
+    ) -> "Farmer":
+        try:
+            return super().update(cpf_cnpj=cpf_cnpj, data=data)
+        finally:
+            cls.cache.delete(cpf_cnpj)
+            cls.pages.bump()
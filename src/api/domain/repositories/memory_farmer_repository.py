@@ -0,0 +1,128 @@
+from dataclasses import replace
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from api.domain.repositories.farmer_repository import FarmerRepository
+from api.infrastructure.search import TrigramIndex
+
+if TYPE_CHECKING:
+    from api.domain.entities.farmer import Farmer, FarmerChange
+
+
+class InMemoryFarmerRepository(FarmerRepository):
+    """Process local ``FarmerRepository`` for tests and tools without Postgres.
+
+    The search runs on a ``TrigramIndex`` over ``name`` and ``farm_name``,
+    ranking like the pg_trgm search of ``SQLAlchemyFarmerRepository``.
+    """
+
+    farmers: Dict[str, "Farmer"] = {}
+    tombstones: Dict[str, Tuple[datetime, int]] = {}
+    # Each write is a transaction of its own, numbered in order.
+    change_xids: Dict[str, int] = {}
+    last_xid = 0
+    index = TrigramIndex()
+    version = 0
+    version_update_at: Optional[datetime] = None
+
+    @classmethod
+    def reset(cls, threshold: Optional[float] = None) -> None:
+        cls.farmers.clear()
+        cls.tombstones.clear()
+        cls.change_xids.clear()
+        cls.index.clear()
+        cls._bump_version()
+        if threshold is not None:
+            cls.index.threshold = threshold
+
+    @classmethod
+    def create(cls, data: dict) -> "Farmer":
+        from api.domain.entities.farmer import Farmer, FarmerAlreadyRegistered
+        if data["cpf_cnpj"] in cls.farmers:
+            raise FarmerAlreadyRegistered("Farmer already registered")
+        now = datetime.utcnow()
+        farmer = Farmer(**data, insert_at=now, update_at=now)
+        cls._save(farmer)
+        return farmer
+
+    @classmethod
+    def update(cls, cpf_cnpj: str, data: dict) -> "Farmer":
+        from api.domain.entities.farmer import Farmer, FarmerNotFound
+        if cpf_cnpj not in cls.farmers:
+            raise FarmerNotFound("Farmer not found.")
+        farmer = replace(cls.farmers[cpf_cnpj], **data, update_at=datetime.utcnow())
+        Farmer.validate_total_area(farmer.total_area, farmer.agricultural_area, farmer.vegetation_area)
+        cls._save(farmer)
+        return farmer
+
+    @classmethod
+    def delete(cls, cpf_cnpj: str) -> None:
+        from api.domain.entities.farmer import FarmerNotFound
+        if cls.farmers.pop(cpf_cnpj, None) is None:
+            raise FarmerNotFound("Farmer not found.")
+        cls._remove(cpf_cnpj)
+        cls._bump_version()
+
+    @classmethod
+    def bulk_delete(cls, cpf_cnpjs: List[str]) -> List[str]:
+        deleted = [cpf_cnpj for cpf_cnpj in dict.fromkeys(cpf_cnpjs) if cls.farmers.pop(cpf_cnpj, None)]
+        for cpf_cnpj in deleted:
+            cls._remove(cpf_cnpj)
+        cls._bump_version()
+        return deleted
+
+    @classmethod
+    def get_by_cpf_cnpj(cls, cpf_cnpj: str) -> "Farmer":
+        from api.domain.entities.farmer import FarmerNotFound
+        farmer = cls.farmers.get(cpf_cnpj)
+        if farmer is None:
+            raise FarmerNotFound("Farmer not found.")
+        return farmer
+
+    @classmethod
+    def search(cls, query: str, limit: int) -> List["Farmer"]:
+        return [cls.farmers[cpf_cnpj] for cpf_cnpj, _ in cls.index.search(query, limit)]
+
+    @classmethod
+    def get_version(cls) -> Tuple[int, Optional[datetime]]:
+        return cls.version, cls.version_update_at
+
+    @classmethod
+    def get_changes(cls, limit: int, after: Optional[Tuple[int, str]] = None,
+                    until: Optional[int] = None) -> List["FarmerChange"]:
+        from api.domain.entities.farmer import FarmerChange
+        changes = [FarmerChange(farmer.cpf_cnpj, farmer.update_at, farmer, cls.change_xids[farmer.cpf_cnpj])
+                   for farmer in cls.farmers.values()]
+        changes.extend(FarmerChange(cpf_cnpj, delete_at, None, change_xid)
+                       for cpf_cnpj, (delete_at, change_xid) in cls.tombstones.items())
+        changes = [change for change in changes
+                   if (after is None or (change.change_xid, change.cpf_cnpj) > after)
+                   and (until is None or change.change_xid < until)]
+        changes.sort(key=lambda change: (change.change_xid, change.cpf_cnpj))
+        return changes[:limit]
+
+    @classmethod
+    def get_changes_until(cls) -> Optional[int]:
+        return None
+
+    @classmethod
+    def _save(cls, farmer: "Farmer") -> None:
+        cls.farmers[farmer.cpf_cnpj] = farmer
+        cls.change_xids[farmer.cpf_cnpj] = cls._next_xid()
+        cls.index.add(farmer.cpf_cnpj, farmer.name, farmer.farm_name)
+        cls._bump_version()
+
+    @classmethod
+    def _remove(cls, cpf_cnpj: str) -> None:
+        cls.index.remove(cpf_cnpj)
+        cls.tombstones[cpf_cnpj] = (datetime.utcnow(), cls._next_xid())
+
+    @classmethod
+    def _next_xid(cls) -> int:
+        cls.last_xid += 1
+        return cls.last_xid
+
+    @classmethod
+    def _bump_version(cls) -> None:
+        cls.version += 1
+        cls.version_update_at = datetime.utcnow()
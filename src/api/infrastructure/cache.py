@@ -0,0 +1,342 @@
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, NamedTuple, Optional, Tuple
+
+from flask import Flask
+
+try:
+    import uwsgi
+except ImportError:
+    uwsgi = None
+
+
+class LRUCache:
+    """Bounded in-process LRU cache with a TTL per entry.
+
+    The cache is local to each worker process. When a ``store`` is given (any
+    object with ``get(key)``, ``set(key, value, ttl)`` and ``delete(key)``
+    working with bytes, and the ``incr(key)`` and ``number(key)`` counters,
+    like ``UwsgiCacheStore``) it is used as a shared second level.
+
+    The keys are spread over ``shards`` write generations kept in the store.
+    A ``delete`` bumps the generation of its key's shard and the local entries
+    are only served while their shard is at the generation they were stored
+    under. A write in any worker then drops, in all of them, the local entries
+    of that shard alone, and their next reads go to the store, where the
+    written key was deleted.
+    """
+
+    GENERATION_KEY = "generation:"
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30, store: Any = None, prefix: str = "",
+                 shards: int = 1024) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.store = store
+        self.prefix = prefix
+        self.shards = shards
+        self.enabled = True
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._generations = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def init_app(self, app: Flask, store: Any = None) -> None:
+        self.enabled = app.config["FARMER_CACHE_ENABLED"]
+        self.maxsize = app.config["FARMER_CACHE_MAXSIZE"]
+        self.ttl = app.config["FARMER_CACHE_TTL"]
+        self.shards = app.config["FARMER_CACHE_SHARDS"]
+        self.store = store
+        self.clear()
+
+    def generation(self, key: str) -> int:
+        """The write generation of the shard of ``key``, read it before
+        querying the value to ``set``."""
+        shard = self._shard(key)
+        if self.store is None:
+            return self._generations.get(shard, 0)
+        return self.store.number(f"{self.prefix}{self.GENERATION_KEY}{shard}")
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        generation = self.generation(key)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, entry_generation, value = entry
+                if expires_at > time.monotonic() and entry_generation == generation:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+
+        value = self._get_from_store(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._set_local(key, value, generation)
+        return value
+
+    def set(self, key: str, value: Any, generation: Optional[int] = None) -> None:
+        """Cache ``value`` read under ``generation``, the current one when not
+        given. A value read before a write is then never served as local."""
+        if not self.enabled:
+            return
+        self._set_local(key, value, self.generation(key) if generation is None else generation)
+        if self.store is not None:
+            self.store.set(self.prefix + key, pickle.dumps(value), self.ttl)
+
+    def delete(self, key: str) -> None:
+        shard = self._shard(key)
+        with self._lock:
+            self._data.pop(key, None)
+            self._generations[shard] = self._generations.get(shard, 0) + 1
+        if self.store is not None:
+            self.store.delete(self.prefix + key)
+            self.store.incr(f"{self.prefix}{self.GENERATION_KEY}{shard}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return dict(
+                enabled=self.enabled,
+                size=len(self._data),
+                maxsize=self.maxsize,
+                ttl=self.ttl,
+                shards=self.shards,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                expirations=self.expirations,
+                hit_ratio=round(self.hits / requests, 4) if requests else 0.0,
+            )
+
+    def _set_local(self, key: str, value: Any, generation: int) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, generation, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _shard(self, key: str) -> int:
+        # crc32 and not hash(), which is seeded per process
+        return zlib.crc32(key.encode()) % self.shards
+
+    def _get_from_store(self, key: str) -> Optional[Any]:
+        if self.store is None:
+            return None
+        value = self.store.get(self.prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+
+class LocalStore:
+    """Process local stand-in for ``UwsgiCacheStore``, used in the tests and
+    when the app does not run under uwsgi.
+
+    Evicts the least recently used entries to stay under ``max_bytes`` of
+    values. Counters are kept apart and never evicted.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._pop(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (time.monotonic() + ttl, value)
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def number(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(backend="local", items=len(self._data), bytes=self.size,
+                        max_bytes=self.max_bytes, evictions=self.evictions)
+
+    def _pop(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+
+class UwsgiCacheStore:
+    """Store on the uwsgi caches, shared by all the workers of the node.
+
+    The ``cache`` is sized and evicted (``purge_lru``) by its ``cache2`` line
+    in ``uwsgi.ini``. Counters live in a separate ``counters`` cache so the LRU
+    purge never drops them. The caches belong to the master process, so they
+    survive the worker respawns of ``max-requests``.
+    """
+
+    def __init__(self, cache: str, counters: str) -> None:
+        self.cache = cache
+        self.counters = counters
+
+    def get(self, key: str) -> Optional[bytes]:
+        return uwsgi.cache_get(key, self.cache)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        uwsgi.cache_update(key, value, max(int(ttl), 1), self.cache)
+
+    def delete(self, key: str) -> None:
+        uwsgi.cache_del(key, self.cache)
+
+    def incr(self, key: str) -> int:
+        uwsgi.cache_inc(key, 1, 0, self.counters)
+        return self.number(key)
+
+    def number(self, key: str) -> int:
+        return uwsgi.cache_num(key, self.counters) or 0
+
+    def clear(self) -> None:
+        uwsgi.cache_clear(self.cache)
+
+    def stats(self) -> dict:
+        return dict(backend="uwsgi", cache=self.cache)
+
+
+def shared_store(app: Flask):
+    """The uwsgi caches named by ``SHARED_CACHE_NAME`` and
+    ``SHARED_CACHE_COUNTERS_NAME`` when running under uwsgi with both
+    configured, else a ``LocalStore``."""
+    name = app.config["SHARED_CACHE_NAME"]
+    counters = app.config["SHARED_CACHE_COUNTERS_NAME"]
+    if uwsgi is not None and _uwsgi_cache_exists(name) and _uwsgi_cache_exists(counters):
+        return UwsgiCacheStore(name, counters)
+    return LocalStore(app.config["SHARED_CACHE_BYTES"])
+
+
+def _uwsgi_cache_exists(name: str) -> bool:
+    # uwsgi.opt only keeps the last of repeated cache2 options and the cache
+    # functions answer None for an unknown cache, so a write is the only probe
+    return bool(uwsgi.cache_update("__probe__", b"1", 1, name))
+
+
+class CachedPage(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[datetime]
+    body: bytes
+
+
+class PageCache:
+    """Pre-serialized JSON responses in the shared store.
+
+    Entries are keyed by the global write generation, a counter bumped by the
+    repository writes. A bump makes every page cached before it unreachable,
+    and the stale entries are left to the TTL and the LRU eviction of the
+    store. Callers read the generation before querying the database and store
+    the page under it, so a write landing in between is never cached as new.
+    """
+
+    GENERATION_KEY = "generation"
+
+    def __init__(self, prefix: str = "", ttl: float = 60) -> None:
+        self.prefix = prefix
+        self.ttl = ttl
+        self.enabled = True
+        self.store = LocalStore()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app: Flask, store: Any) -> None:
+        self.enabled = app.config["FARMERS_PAGE_CACHE_ENABLED"]
+        self.ttl = app.config["FARMERS_PAGE_CACHE_TTL"]
+        self.store = store
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def generation(self) -> int:
+        return self.store.number(self.prefix + self.GENERATION_KEY)
+
+    def bump(self) -> int:
+        return self.store.incr(self.prefix + self.GENERATION_KEY)
+
+    def get(self, key: str) -> Tuple[int, Optional[CachedPage]]:
+        generation = self.generation()
+        if not self.enabled:
+            return generation, None
+        value = self.store.get(f"{self.prefix}{generation}:{key}")
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return generation, None
+            self.hits += 1
+        return generation, CachedPage(*pickle.loads(value))
+
+    def set(self, key: str, generation: int, page: CachedPage) -> None:
+        if self.enabled:
+            self.store.set(f"{self.prefix}{generation}:{key}", pickle.dumps(tuple(page)), self.ttl)
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return dict(
+                enabled=self.enabled,
+                ttl=self.ttl,
+                generation=self.generation(),
+                hits=self.hits,
+                misses=self.misses,
+                hit_ratio=round(self.hits / requests, 4) if requests else 0.0,
+                store=self.store.stats(),
+            )
+
+
+farmer_cache = LRUCache(prefix="farmer:")
+farmers_page_cache = PageCache(prefix="farmers:")
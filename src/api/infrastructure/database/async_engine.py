@@ -0,0 +1,34 @@
+from typing import Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+
+class AsyncDatabase:
+    """Async engine and session factory used by the ASGI deployment."""
+
+    def __init__(self) -> None:
+        self.engine: Optional[AsyncEngine] = None
+        self.sessionmaker: Optional[async_sessionmaker] = None
+
+    def init(self, config: object) -> None:
+        url = make_url(config.SQLALCHEMY_DATABASE_URI).set(drivername="postgresql+asyncpg")
+        self.engine = create_async_engine(
+            url,
+            pool_size=config.ASYNC_DB_POOL_SIZE,
+            max_overflow=config.ASYNC_DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+        )
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    async def dispose(self) -> None:
+        if self.engine is not None:
+            await self.engine.dispose()
+        self.engine = None
+        self.sessionmaker = None
+
+    def session(self) -> AsyncSession:
+        return self.sessionmaker()
+
+
+async_db = AsyncDatabase()
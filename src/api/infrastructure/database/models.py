@@ -3,7 +3,11 @@ from datetime import datetime
 from enum import Enum
 
 from api.app import db
-from sqlalchemy import Column
+from sqlalchemy import CheckConstraint, Column, Index, func, literal_column, text
+
+from .partitions import register_state_partitions
+from .triggers import register_farmer_triggers
+from .types import EnumMask
 
 
 class FarmingOptions(Enum):
@@ -22,25 +26,145 @@ class FarmingOptions(Enum):
         return [item.name for item in list(cls)]
 
 
+FARMING_OPTIONS_MASK = EnumMask(FarmingOptions)
+
+
+def farming_option_indexes() -> list:
+    """One partial index per farming option, keyed by ``cpf_cnpj`` so the
+    cursor pagination of a filtered listing walks the index in order."""
+    return [
+        Index(f"ix_farmer_option_{name.lower()}", "cpf_cnpj",
+              postgresql_where=text(f"farming_options & {bit} <> 0"))
+        for name, bit in FARMING_OPTIONS_MASK.bits.items()
+    ]
+
+
+def utc_now():
+    """The database clock in UTC at the start of the running transaction, the
+    time stamped on every row it writes."""
+    return func.timezone("utc", func.now())
+
+
+CURRENT_XID = "pg_current_xact_id()::text::bigint"
+
+
+def current_xid():
+    """Id of the running transaction, assigned by its first write. The changes
+    feed reads the rows in the order of the ids of the transactions writing
+    them, up to ``current_xmin``."""
+    return literal_column(CURRENT_XID, db.BigInteger)
+
+
+def current_xmin():
+    """Oldest transaction id still running on the server, every id below it
+    belongs to a finished transaction."""
+    return literal_column("pg_snapshot_xmin(pg_current_snapshot())::text::bigint", db.BigInteger)
+
+
 class Farmer(db.Model):
+    """Farmers list partitioned by ``state``.
+
+    The primary key has to include the partition key, ``cpf_cnpj`` is kept
+    unique across the partitions by ``farmer_document``.
+    """
     __tablename__ = "farmer"
+    __table_args__ = (
+        *farming_option_indexes(),
+        Index("ix_farmer_state_city", "state", "city"),
+        Index("ix_farmer_total_area", "total_area"),
+        Index("ix_farmer_change_xid_cpf_cnpj", "change_xid", "cpf_cnpj"),
+        CheckConstraint("agricultural_area + vegetation_area <= total_area", name="farmer_area_check"),
+        {"postgresql_partition_by": "LIST (state)"},
+    )
 
     cpf_cnpj = Column(db.String(15), nullable=False, primary_key=True)
     name = Column(db.String(200), nullable=False)
     farm_name = Column(db.String(200), nullable=False)
     city = Column(db.String(200), nullable=False)
-    state = Column(db.String(2), nullable=False)
+    state = Column(db.String(2), nullable=False, primary_key=True)
     total_area = Column(db.Integer, nullable=False)
     agricultural_area = Column(db.Integer, nullable=False)
     vegetation_area = Column(db.Integer, nullable=False)
-    farming_options = Column(db.JSON, nullable=True)
-    insert_at = Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    farming_options = Column(FARMING_OPTIONS_MASK, nullable=False, default=list, server_default="0")
+    insert_at = Column(db.DateTime, nullable=False, default=utc_now())
     update_at = Column(
         db.DateTime,
         nullable=False,
-        default=datetime.utcnow,
-        onupdate=datetime.utcnow,
+        default=utc_now(),
+        onupdate=utc_now(),
+    )
+    change_xid = Column(
+        db.BigInteger,
+        nullable=False,
+        default=current_xid(),
+        onupdate=current_xid(),
+        server_default=text(CURRENT_XID),
     )
 
     def __repr__(self) -> str:
-        return f"<Farmer {self.cpf_cnpj}|{self.name}|{self.farm_name}>"
\ No newline at end of file
+        return f"<Farmer {self.cpf_cnpj}|{self.name}|{self.farm_name}>"
+
+
+register_state_partitions(Farmer.__table__)
+register_farmer_triggers(Farmer.__table__, FARMING_OPTIONS_MASK.bits)
+
+
+class FarmerDocument(db.Model):
+    """Registry of the farmer documents and the state holding each of them.
+
+    Filled and emptied by row triggers on ``farmer``: its primary key keeps
+    ``cpf_cnpj`` unique across the state partitions, and an insert of a
+    document already registered in any state is skipped.
+    """
+    __tablename__ = "farmer_document"
+
+    cpf_cnpj = Column(db.String(15), nullable=False, primary_key=True)
+    state = Column(db.String(2), nullable=False)
+
+
+class FarmerStateSummary(db.Model):
+    """Farms and areas per state, kept up to date by the farmer triggers."""
+    __tablename__ = "farmer_state_summary"
+
+    state = Column(db.String(2), nullable=False, primary_key=True)
+    farm_count = Column(db.Integer, nullable=False, default=0)
+    total_area = Column(db.BigInteger, nullable=False, default=0)
+    agricultural_area = Column(db.BigInteger, nullable=False, default=0)
+    vegetation_area = Column(db.BigInteger, nullable=False, default=0)
+
+
+class FarmerOptionSummary(db.Model):
+    """Farms per farming option, kept up to date by the farmer triggers."""
+    __tablename__ = "farmer_option_summary"
+
+    farming_option = Column(db.String(20), nullable=False, primary_key=True)
+    farm_count = Column(db.Integer, nullable=False, default=0)
+
+
+class FarmerVersion(db.Model):
+    """Single row bumped by a trigger when a transaction writing ``farmer``
+    commits.
+
+    ``version`` counts the writing transactions and ``update_at`` is the time
+    of the last one, deletes included, so together they validate the listings.
+    """
+    __tablename__ = "farmer_version"
+
+    id = Column(db.SmallInteger, nullable=False, primary_key=True)
+    version = Column(db.BigInteger, nullable=False, default=0)
+    update_at = Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class FarmerTombstone(db.Model):
+    """Farmers deleted through the repository, read by the changes feed.
+
+    One row per document with the time of its last deletion.
+    """
+    __tablename__ = "farmer_tombstone"
+    __table_args__ = (
+        Index("ix_farmer_tombstone_change_xid_cpf_cnpj", "change_xid", "cpf_cnpj"),
+    )
+
+    cpf_cnpj = Column(db.String(15), nullable=False, primary_key=True)
+    delete_at = Column(db.DateTime, nullable=False, default=utc_now())
+    change_xid = Column(db.BigInteger, nullable=False, default=current_xid(), server_default=text(CURRENT_XID))
@@ -0,0 +1,33 @@
+"""List partitions of ``farmer`` by ``state``.
+
+One partition per Brazilian state plus a default one for any other value, so a
+statement filtering by ``state`` only reads the partition of that state and its
+indexes. The indexes declared on ``farmer`` are created on every partition.
+"""
+from sqlalchemy import DDL, event
+
+
+STATES = (
+    "AC", "AL", "AM", "AP", "BA", "CE", "DF", "ES", "GO", "MA", "MG", "MS", "MT", "PA",
+    "PB", "PE", "PI", "PR", "RJ", "RN", "RO", "RR", "RS", "SC", "SE", "SP", "TO",
+)
+
+
+def partition_names(table: str) -> dict:
+    """Partition name by state, ``None`` for the default partition."""
+    names = {state: f"{table}_{state.lower()}" for state in STATES}
+    names[None] = f"{table}_default"
+    return names
+
+
+def partition_create_statements(table: str) -> list:
+    return [
+        f"CREATE TABLE {name} PARTITION OF {table} DEFAULT" if state is None
+        else f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES IN ('{state}')"
+        for state, name in partition_names(table).items()
+    ]
+
+
+def register_state_partitions(table) -> None:
+    for statement in partition_create_statements(table.name):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
@@ -0,0 +1,132 @@
+import logging
+import os
+import threading
+import time
+
+from flask import Flask
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger("agro")
+
+
+class PoolMetrics:
+    """Connection pool usage of the current worker process.
+
+    Counters are fed by the SQLAlchemy pool events and by ``MeteredQueuePool``,
+    which times how long each checkout waited for a free connection. Every
+    uwsgi worker has its own pool, so the numbers are per process.
+    """
+
+    def __init__(self, wait_warning: float = 0.1) -> None:
+        self.wait_warning = wait_warning
+        self._lock = threading.Lock()
+        self.reset()
+
+    def init_app(self, app: Flask, engine) -> None:
+        self.wait_warning = app.config["SQLALCHEMY_POOL_WAIT_WARNING_MS"] / 1000
+        self.instrument(engine.pool)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.waits = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def instrument(self, pool) -> None:
+        if event.contains(pool, "checkout", self._on_checkout):
+            return
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, pool: QueuePool, elapsed: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_total += elapsed
+            self.wait_max = max(self.wait_max, elapsed)
+            if timed_out:
+                self.timeouts += 1
+
+        if timed_out or elapsed >= self.wait_warning:
+            logger.warning(
+                "Slow database connection checkout.",
+                extra={
+                    "props": {
+                        "service": "PostgreSQL",
+                        "service_method": "pool_checkout",
+                        "wait_ms": round(elapsed * 1000, 3),
+                        "timed_out": timed_out,
+                        "pool": self.stats(pool)
+                    }
+                },
+            )
+
+    def stats(self, pool: QueuePool) -> dict:
+        with self._lock:
+            waits = self.waits
+            return {
+                "pid": os.getpid(),
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / waits * 1000, 3) if waits else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeteredQueuePool(QueuePool):
+    """``QueuePool`` reporting to ``pool_metrics`` how long checkouts waited."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_wait(self, time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record_wait(self, time.perf_counter() - start)
+        return connection
+
+
+def engine_options(config) -> dict:
+    return {
+        "poolclass": MeteredQueuePool,
+        "pool_size": config["SQLALCHEMY_POOL_SIZE"],
+        "max_overflow": config["SQLALCHEMY_MAX_OVERFLOW"],
+        "pool_timeout": config["SQLALCHEMY_POOL_TIMEOUT"],
+        "pool_recycle": config["SQLALCHEMY_POOL_RECYCLE"],
+        "pool_pre_ping": config["SQLALCHEMY_POOL_PRE_PING"],
+    }
@@ -0,0 +1,66 @@
+"""Server side prepared statements over psycopg2.
+
+psycopg2 sends every statement as text, so PostgreSQL plans it on every
+execution. That is cheap on a plain table, but a statement on the partitioned
+``farmer`` whose state is only known when it runs is planned for every
+partition, which costs more than running it. Prepared once per connection,
+the generic plan is kept and pruned to one partition at run time.
+
+asyncpg prepares and caches every statement by itself, so the async
+repository needs none of this. Like asyncpg's cache, it needs the server
+connection to outlive the transaction, so not a transaction pooling pgbouncer.
+"""
+import re
+from typing import NamedTuple
+
+from sqlalchemy import bindparam, text
+
+PLACEHOLDER = re.compile(r"%\((\w+)\)s")
+
+
+class PreparedStatement(NamedTuple):
+    """The compiled statement, to bind the values of each execution, and the
+    ``EXECUTE`` of its prepared statement."""
+    compiled: object
+    execute: object
+
+
+def prepare(connection, statement, cache_key) -> PreparedStatement:
+    """Prepares ``statement`` on ``connection`` and builds the ``EXECUTE``
+    running it, with the parameters typed as in the statement."""
+    dialect = connection.dialect
+    compiled = dialect.statement_compiler(dialect, statement, cache_key=cache_key)
+    names = list(dict.fromkeys(PLACEHOLDER.findall(compiled.string)))
+    prepared = connection.connection.info["prepared_statements"]
+    name = f"agro_{len(prepared) + 1}"
+    positions = {key: f"${position}" for position, key in enumerate(names, start=1)}
+    sql = PLACEHOLDER.sub(lambda match: positions[match.group(1)], compiled.string).replace("%%", "%")
+    connection.exec_driver_sql(f"PREPARE {name} AS {sql}")
+
+    arguments = ", ".join(f":{key}" for key in names)
+    execute = text(f"EXECUTE {name}({arguments})" if names else f"EXECUTE {name}").bindparams(
+        *(bindparam(key, type_=compiled.binds[key].type) for key in names)
+    )
+    return PreparedStatement(compiled, execute.columns(*statement.exported_columns))
+
+
+def execute_prepared(session, statement):
+    """Executes ``statement`` through a prepared statement of the session
+    connection, preparing it the first time that connection runs it.
+
+    Statements differing only in their values share the prepared statement:
+    it is looked up by the SQLAlchemy cache key of the statement, so it is
+    compiled once per connection too. The result columns are those of the
+    statement, so the rows are the same ``session.execute`` returns. A
+    statement SQLAlchemy does not cache is executed as is.
+    """
+    cache_key = statement._generate_cache_key()
+    if cache_key is None:
+        return session.execute(statement)
+    connection = session.connection()
+    prepared = connection.connection.info.setdefault("prepared_statements", {})
+    entry = prepared.get(cache_key.key)
+    if entry is None:
+        entry = prepared[cache_key.key] = prepare(connection, statement, cache_key)
+    parameters = entry.compiled.construct_params(extracted_parameters=cache_key.bindparams)
+    return session.execute(entry.execute, parameters)
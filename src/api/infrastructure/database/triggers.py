@@ -0,0 +1,199 @@
+"""Database side maintenance of the farmer summary tables.
+
+Statement level triggers read the rows touched by each INSERT, UPDATE or DELETE
+on ``farmer`` from the transition tables and apply the aggregated deltas to
+``farmer_state_summary`` and ``farmer_option_summary``. Every write path (ORM,
+bulk insert, COPY or plain SQL) keeps the summary up to date in the same
+transaction.
+
+The single row of ``farmer_version`` is bumped once per writing transaction,
+giving the listings a cheap validator for conditional GETs. The bump is a
+deferred constraint trigger, so the row is only locked while the transaction
+commits, after it took every summary row it needed: concurrent writers don't
+queue behind it for their whole transaction and always lock in the same order.
+Its ``WHEN`` sets a transaction local flag on the first row, so only one event
+is queued per transaction whatever the rows written.
+
+Row level triggers register every document inserted in ``farmer_document``,
+skipping the insert when it is already registered, and release it on delete.
+A row moved to another state partition by an UPDATE is deleted and inserted,
+so its registry entry follows it.
+"""
+from sqlalchemy import DDL, event
+
+
+SUMMARY_COLUMNS = "state, total_area, agricultural_area, vegetation_area, farming_options"
+
+SUMMARY_DELTAS = {
+    "insert": f"SELECT {SUMMARY_COLUMNS}, 1 AS sign FROM new_rows",
+    "update": f"SELECT {SUMMARY_COLUMNS}, 1 AS sign FROM new_rows "
+              f"UNION ALL SELECT {SUMMARY_COLUMNS}, -1 AS sign FROM old_rows",
+    "delete": f"SELECT {SUMMARY_COLUMNS}, -1 AS sign FROM old_rows",
+}
+
+SUMMARY_TRANSITION_TABLES = {
+    "insert": "NEW TABLE AS new_rows",
+    "update": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "delete": "OLD TABLE AS old_rows",
+}
+
+SUMMARY_FUNCTION = """
+CREATE OR REPLACE FUNCTION farmer_summary_{operation}() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO farmer_state_summary AS summary
+        (state, farm_count, total_area, agricultural_area, vegetation_area)
+    SELECT state, sum(sign), sum(sign * total_area), sum(sign * agricultural_area),
+           sum(sign * vegetation_area)
+    FROM ({delta}) AS delta
+    GROUP BY state
+    HAVING sum(sign) <> 0 OR sum(sign * total_area) <> 0
+        OR sum(sign * agricultural_area) <> 0 OR sum(sign * vegetation_area) <> 0
+    ON CONFLICT (state) DO UPDATE SET
+        farm_count = summary.farm_count + EXCLUDED.farm_count,
+        total_area = summary.total_area + EXCLUDED.total_area,
+        agricultural_area = summary.agricultural_area + EXCLUDED.agricultural_area,
+        vegetation_area = summary.vegetation_area + EXCLUDED.vegetation_area;
+
+    INSERT INTO farmer_option_summary AS summary (farming_option, farm_count)
+    SELECT option.value, sum(delta.sign)
+    FROM ({delta}) AS delta
+    JOIN (VALUES {options}) AS option (value, bit) ON delta.farming_options & option.bit <> 0
+    GROUP BY option.value
+    HAVING sum(delta.sign) <> 0
+    ON CONFLICT (farming_option) DO UPDATE SET
+        farm_count = summary.farm_count + EXCLUDED.farm_count;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+SUMMARY_TRIGGER = """
+CREATE TRIGGER farmer_summary_{operation}
+AFTER {event} ON farmer
+REFERENCING {transition_tables}
+FOR EACH STATEMENT EXECUTE FUNCTION farmer_summary_{operation}()
+"""
+
+VERSION_FUNCTION = """
+CREATE OR REPLACE FUNCTION farmer_version_bump() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO farmer_version AS version (id, version, update_at)
+    VALUES (1, 1, timezone('utc', clock_timestamp()))
+    ON CONFLICT (id) DO UPDATE SET
+        version = version.version + 1,
+        update_at = greatest(version.update_at, EXCLUDED.update_at);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+VERSION_PENDING_FUNCTION = """
+CREATE OR REPLACE FUNCTION farmer_version_pending() RETURNS boolean AS $$
+BEGIN
+    IF current_setting('agro.farmer_version_pending', true) = 'on' THEN
+        RETURN false;
+    END IF;
+    PERFORM set_config('agro.farmer_version_pending', 'on', true);
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+VERSION_TRIGGERS = [
+    """
+CREATE CONSTRAINT TRIGGER farmer_version_bump
+AFTER INSERT OR UPDATE OR DELETE ON farmer
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW WHEN (farmer_version_pending())
+EXECUTE FUNCTION farmer_version_bump()
+""",
+    """
+CREATE TRIGGER farmer_version_truncate
+AFTER TRUNCATE ON farmer
+FOR EACH STATEMENT EXECUTE FUNCTION farmer_version_bump()
+""",
+]
+
+DOCUMENT_FUNCTIONS = {
+    "register": """
+CREATE OR REPLACE FUNCTION farmer_document_register() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO farmer_document (cpf_cnpj, state) VALUES (NEW.cpf_cnpj, NEW.state)
+    ON CONFLICT (cpf_cnpj) DO NOTHING;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+""",
+    "release": """
+CREATE OR REPLACE FUNCTION farmer_document_release() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM farmer_document WHERE cpf_cnpj = OLD.cpf_cnpj;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql
+""",
+}
+
+DOCUMENT_TRIGGERS = {
+    "register": """
+CREATE TRIGGER farmer_document_register
+BEFORE INSERT ON farmer
+FOR EACH ROW EXECUTE FUNCTION farmer_document_register()
+""",
+    "release": """
+CREATE TRIGGER farmer_document_release
+BEFORE DELETE ON farmer
+FOR EACH ROW EXECUTE FUNCTION farmer_document_release()
+""",
+}
+
+
+def summary_create_statements(option_bits: dict) -> list:
+    options = ", ".join(f"('{name}', {bit})" for name, bit in option_bits.items())
+    statements = []
+    for operation, delta in SUMMARY_DELTAS.items():
+        statements.append(SUMMARY_FUNCTION.format(operation=operation, delta=delta, options=options))
+        statements.append(SUMMARY_TRIGGER.format(
+            operation=operation,
+            event=operation.upper(),
+            transition_tables=SUMMARY_TRANSITION_TABLES[operation]))
+    return statements + [VERSION_FUNCTION, VERSION_PENDING_FUNCTION] + VERSION_TRIGGERS
+
+
+def summary_drop_statements() -> list:
+    statements = []
+    for operation in SUMMARY_DELTAS:
+        statements.append(f"DROP TRIGGER IF EXISTS farmer_summary_{operation} ON farmer")
+        statements.append(f"DROP FUNCTION IF EXISTS farmer_summary_{operation}()")
+    return statements + [
+        "DROP TRIGGER IF EXISTS farmer_version_bump ON farmer",
+        "DROP TRIGGER IF EXISTS farmer_version_truncate ON farmer",
+        "DROP FUNCTION IF EXISTS farmer_version_bump()",
+        "DROP FUNCTION IF EXISTS farmer_version_pending()",
+    ]
+
+
+def document_create_statements() -> list:
+    statements = []
+    for name, function in DOCUMENT_FUNCTIONS.items():
+        statements += [function, DOCUMENT_TRIGGERS[name]]
+    return statements
+
+
+def document_drop_statements() -> list:
+    statements = []
+    for name in DOCUMENT_FUNCTIONS:
+        statements.append(f"DROP TRIGGER IF EXISTS farmer_document_{name} ON farmer")
+        statements.append(f"DROP FUNCTION IF EXISTS farmer_document_{name}()")
+    return statements
+
+
+def register_farmer_triggers(table, option_bits: dict) -> None:
+    for statement in summary_create_statements(option_bits) + document_create_statements():
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in summary_drop_statements() + document_drop_statements():
+        event.listen(table, "before_drop", DDL(statement).execute_if(dialect="postgresql"))
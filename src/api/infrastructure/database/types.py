@@ -0,0 +1,46 @@
+from enum import Enum
+from typing import Iterable, List, Optional, Type
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+
+class EnumMask(TypeDecorator):
+    """Set of ``enum`` members stored as a bitmask.
+
+    The Python side keeps working with lists of member names, which are
+    converted to and from the integer when bound and when read. Every member
+    gets the bit of its position in the enum, so new members must be added at
+    the end and never removed or reordered.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum: Type[Enum]) -> None:
+        super().__init__()
+        self.enum = enum
+
+    @property
+    def bits(self) -> dict:
+        return {member.name: 1 << position for position, member in enumerate(self.enum)}
+
+    def mask(self, names: Optional[Iterable[str]]) -> int:
+        bits = self.bits
+        mask = 0
+        for name in names or ():
+            try:
+                mask |= bits[name]
+            except KeyError:
+                raise ValueError(f"Invalid {self.enum.__name__} {name!r}.")
+        return mask
+
+    def names(self, mask: Optional[int]) -> List[str]:
+        return [name for name, bit in self.bits.items() if mask and mask & bit]
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        return self.mask(value)
+
+    def process_result_value(self, value, dialect):
+        return self.names(value)
@@ -0,0 +1,156 @@
+import atexit
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import traceback
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+import json_logging
+from json_logging.formatters import JSONLogWebFormatter, JSONRequestLogFormatter
+
+
+class SuccessSampler(logging.Filter):
+    """Keeps ``rate`` of the success records.
+
+    Records at WARNING and above and request logs of error responses are
+    always kept.
+    """
+
+    def __init__(self, rate: float = 1.0) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1 or record.levelno >= logging.WARNING:
+            return True
+        request_response_data = getattr(record, "request_response_data", None)
+        response = getattr(request_response_data, "_response", None)
+        if getattr(response, "status_code", 0) >= 400:
+            return True
+        return random.random() < self.rate
+
+
+class PipelineFormatter(JSONLogWebFormatter):
+    """Writes the records rendered before queueing as they are."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "preformatted", False):
+            return record.getMessage()
+        return super().format(record)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """``QueueHandler`` that leaves the formatting to the listener thread.
+
+    The stock ``prepare`` renders the message in the caller thread. Here the
+    record only gets what must be read in the request context (the correlation
+    id) and the exception text, so the ``props`` payloads are encoded by the
+    background writer and only for the records that pass the sampling. When the
+    queue is full the record is dropped instead of blocking the request.
+    """
+
+    def __init__(self, pipeline: "LogPipeline") -> None:
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        field = json_logging.CORRELATION_ID_FIELD
+        if not hasattr(record, field):
+            request_util = json_logging._request_util
+            setattr(record, field, request_util.get_correlation_id(within_formatter=True)
+                    if request_util is not None else json_logging.EMPTY_VALUE)
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info))
+            record.exc_info = None
+        if isinstance(getattr(record, "props", None), dict):
+            record.props = dict(record.props)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.pipeline.ensure_started()
+        try:
+            self.pipeline.queue.put_nowait(record)
+        except queue.Full:
+            self.pipeline.dropped += 1
+
+
+class PreformattedQueueHandler(DeferredQueueHandler):
+    """Queues records rendered in the caller thread.
+
+    For the json_logging request logs, whose formatter reads the Flask request
+    proxy and only works inside the request context. The write is still done
+    by the background listener.
+    """
+
+    def __init__(self, pipeline: "LogPipeline") -> None:
+        super().__init__(pipeline)
+        self.setFormatter(JSONRequestLogFormatter())
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = QueueHandler.prepare(self, record)
+        record.preformatted = True
+        return record
+
+
+class LogPipeline:
+    """Queue, handlers and background listener writing the logs to stdout.
+
+    ``handler`` goes in the ``agro`` logger and ``request_handler`` replaces
+    the stdout handler of the json_logging request logger. uwsgi forks the
+    workers after loading the app and threads don't survive a fork, so each
+    process starts its own listener, with a fresh queue, on its first record.
+    """
+
+    def __init__(self, maxsize: int = 10000) -> None:
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.sampler = SuccessSampler()
+        self.handler = DeferredQueueHandler(self)
+        self.handler.addFilter(self.sampler)
+        self.request_handler = PreformattedQueueHandler(self)
+        self.request_handler.addFilter(self.sampler)
+        self.listener: Optional[QueueListener] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def configure(self, sample_rate: float, queue_size: int) -> None:
+        self.sampler.rate = sample_rate
+        self.queue.maxsize = queue_size
+
+    def attach(self, logger: logging.Logger) -> None:
+        if self.handler not in logger.handlers:
+            logger.addHandler(self.handler)
+
+    def attach_requests(self, request_logger: logging.Logger) -> None:
+        for handler in list(request_logger.handlers):
+            request_logger.removeHandler(handler)
+        request_logger.addHandler(self.request_handler)
+
+    def ensure_started(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            output = logging.StreamHandler(sys.stdout)
+            output.setFormatter(PipelineFormatter())
+            self.listener = QueueListener(self.queue, output)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def stop(self) -> None:
+        with self._lock:
+            if self.listener is not None and self._pid == os.getpid():
+                self.listener.stop()
+            self.listener = None
+            self._pid = None
+
+
+log_pipeline = LogPipeline()
+atexit.register(log_pipeline.stop)
@@ -0,0 +1,136 @@
+import asyncio
+import functools
+import os
+import time
+from typing import Callable, Tuple
+
+from flask import Flask, current_app, g, has_request_context, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest
+from prometheus_client import REGISTRY, multiprocess
+from sqlalchemy import event
+
+
+REQUEST_LATENCY = Histogram(
+    "agro_http_request_duration_seconds",
+    "HTTP request latency, the _count series is the request count.",
+    ["method", "route", "status"],
+)
+DB_STATEMENT_LATENCY = Histogram(
+    "agro_db_statement_duration_seconds",
+    "Database statement latency, the _count series is the statement count.",
+    ["operation"],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10),
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    "agro_http_request_db_statements",
+    "Database statements run per HTTP request.",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16, 32, 64),
+)
+REPOSITORY_LATENCY = Histogram(
+    "agro_repository_duration_seconds",
+    "Farmer repository method latency.",
+    ["repository", "method"],
+)
+
+OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "COPY", "WITH"}
+
+
+def timed(method: str) -> Callable:
+    """Observes the duration of a repository method in ``REPOSITORY_LATENCY``.
+
+    Goes below ``@classmethod``. The repository label is the class that
+    defines the method, not the one it is called on, so an override calling
+    its parent through ``super()`` is observed once under each class.
+    """
+    def decorator(func: Callable) -> Callable:
+        repository = func.__qualname__.rsplit(".", 1)[0]
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    REPOSITORY_LATENCY.labels(repository, method).observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                REPOSITORY_LATENCY.labels(repository, method).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def statement_operation(statement: str) -> str:
+    keyword = statement.lstrip()[:6].upper()
+    return keyword if keyword in OPERATIONS else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    DB_STATEMENT_LATENCY.labels(statement_operation(statement)).observe(elapsed)
+    if has_request_context() and "db_statements" in g:
+        g.db_statements += 1
+        g.db_seconds += elapsed
+
+
+def instrument_engine(engine) -> None:
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _start_timer() -> None:
+    g.metrics_start_time = time.perf_counter()
+    g.db_statements = 0
+    g.db_seconds = 0.0
+
+
+def _observe_request(response):
+    """Observes the request latency and statements, and with ``DB_STATS_HEADER``
+    sends them in the ``X-DB-Statements`` and ``X-DB-Time-Ms`` headers.
+
+    A streamed body runs its statements after this, so they aren't counted.
+    """
+    start = g.pop("metrics_start_time", None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        REQUEST_LATENCY.labels(request.method, route, response.status_code).observe(
+            time.perf_counter() - start)
+        REQUEST_DB_STATEMENTS.labels(request.method, route).observe(g.db_statements)
+        if current_app.config["DB_STATS_HEADER"]:
+            response.headers["X-DB-Statements"] = str(g.db_statements)
+            response.headers["X-DB-Time-Ms"] = f"{g.db_seconds * 1000:.3f}"
+    return response
+
+
+def init_app(app: Flask, engine) -> None:
+    app.before_request(_start_timer)
+    app.after_request(_observe_request)
+    instrument_engine(engine)
+
+
+def render() -> Tuple[bytes, str]:
+    """Metrics in the Prometheus text format.
+
+    With ``PROMETHEUS_MULTIPROC_DIR`` set (as in uwsgi.ini) every process writes
+    its samples to that directory and they are aggregated here, so any worker
+    answers with the numbers of all of them.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,90 @@
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, FrozenSet, Hashable, List, Tuple
+
+
+WORD_SEPARATOR = re.compile(r"[^\w]+|_+")
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Trigrams of ``text`` the way ``pg_trgm`` extracts them.
+
+    The text is lowercased and split into words, each word is padded with two
+    spaces in front and one at the end, e.g. ``"Soja"`` gives
+    ``{"  s", " so", "soj", "oja", "ja "}``.
+    """
+    result = set()
+    for word in WORD_SEPARATOR.split(text.lower()):
+        if not word:
+            continue
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(result)
+
+
+def word_similarity(query: FrozenSet[str], target: FrozenSet[str]) -> float:
+    """Share of the query trigrams found in the target, like ``pg_trgm``'s
+    ``word_similarity`` without the contiguous extent restriction."""
+    if not query:
+        return 0.0
+    return len(query & target) / len(query)
+
+
+class TrigramIndex:
+    """In-process trigram index used when ``pg_trgm`` is not available.
+
+    Keeps an inverted index from trigram to keys, so a search only scores the
+    documents sharing at least one trigram with the query.
+    """
+
+    def __init__(self, threshold: float = 0.5) -> None:
+        self.threshold = threshold
+        self._postings: Dict[str, set] = defaultdict(set)
+        self._documents: Dict[Hashable, Tuple[FrozenSet[str], ...]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, key: Hashable, *texts: str) -> None:
+        fields = tuple(trigrams(text or "") for text in texts)
+        with self._lock:
+            self._remove(key)
+            self._documents[key] = fields
+            for trigram in frozenset().union(*fields):
+                self._postings[trigram].add(key)
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+
+    def search(self, query: str, limit: int) -> List[Tuple[Hashable, float]]:
+        """Keys whose best field scores at least ``threshold``, best first."""
+        query_trigrams = trigrams(query)
+        with self._lock:
+            candidates = set()
+            for trigram in query_trigrams:
+                candidates.update(self._postings.get(trigram, ()))
+            scored = []
+            for key in candidates:
+                score = max(word_similarity(query_trigrams, field) for field in self._documents[key])
+                if score >= self.threshold:
+                    scored.append((key, score))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def _remove(self, key: Hashable) -> None:
+        fields = self._documents.pop(key, None)
+        if fields is None:
+            return
+        for trigram in frozenset().union(*fields):
+            postings = self._postings[trigram]
+            postings.discard(key)
+            if not postings:
+                del self._postings[trigram]
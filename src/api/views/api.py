@@ -1,14 +1,26 @@
-from flask import Blueprint, request
+from flask import Blueprint, Response, request
 from flask_restx import Api, Resource
 
 from .schemas import (
     index_model,
     farmer_create_request_model,
     farmer_create_response_model,
+    farmers_page_response_model,
+    farmer_change_model,
+    farmers_changes_response_model,
+    farmers_state_summary_model,
+    farmers_option_summary_model,
+    farmers_summary_model,
+    farmer_bulk_create_result_model,
+    farmer_bulk_delete_result_model,
     farmer_update_request_model,
     generic_response_model
 )
 from .farmer import Farmers
+from api.app import db
+from api.infrastructure.cache import farmer_cache, farmers_page_cache
+from api.infrastructure.database.pool import pool_metrics
+from api.infrastructure import metrics
 
 VERSION = "0.0.1"
 DOC = "Agro API"
@@ -28,6 +40,14 @@ ns = api.namespace("", description=DOC)
 ns.add_model(index_model.name, index_model)
 ns.add_model(farmer_create_request_model.name, farmer_create_request_model)
 ns.add_model(farmer_create_response_model.name, farmer_create_response_model)
+ns.add_model(farmers_page_response_model.name, farmers_page_response_model)
+ns.add_model(farmer_change_model.name, farmer_change_model)
+ns.add_model(farmers_changes_response_model.name, farmers_changes_response_model)
+ns.add_model(farmers_state_summary_model.name, farmers_state_summary_model)
+ns.add_model(farmers_option_summary_model.name, farmers_option_summary_model)
+ns.add_model(farmers_summary_model.name, farmers_summary_model)
+ns.add_model(farmer_bulk_create_result_model.name, farmer_bulk_create_result_model)
+ns.add_model(farmer_bulk_delete_result_model.name, farmer_bulk_delete_result_model)
 ns.add_model(farmer_update_request_model.name, farmer_update_request_model)
 ns.add_model(generic_response_model.name, generic_response_model)
 
@@ -43,3 +63,23 @@ class Index(Resource):
             service=DOC,
             version=VERSION
         ), 200
+
+
+@ns.route("/health/cache")
+class CacheStats(Resource):
+    def get(self) -> tuple[dict, int]:
+        return dict(farmer=farmer_cache.stats(), pages=farmers_page_cache.stats()), 200
+
+
+@ns.route("/health/pool")
+class PoolStats(Resource):
+    def get(self) -> tuple[dict, int]:
+        return dict(database=pool_metrics.stats(db.engine.pool)), 200
+
+
+@ns.route("/metrics")
+class Metrics(Resource):
+    @ns.produces(["text/plain"])
+    def get(self) -> Response:
+        output, content_type = metrics.render()
+        return Response(output, mimetype=content_type)
@@ -0,0 +1,66 @@
+"""Validators for the conditional GETs of the farmers resources.
+
+A single farmer is validated by its ``update_at`` and the listings by the
+``farmer_version`` row, bumped by a trigger after every write on the table, so
+an unchanged poll is answered with 304 before the farmers are even queried.
+The pages served from the shared page cache keep the validators they were
+stored with.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import urlencode
+
+from flask import Response, request
+from flask_restx.representations import output_json
+from werkzeug.http import http_date, is_resource_modified, quote_etag
+
+from api.infrastructure.cache import CachedPage
+
+
+def farmer_etag(farmer) -> str:
+    return f"{farmer.cpf_cnpj}.{farmer.update_at:%Y%m%d%H%M%S%f}"
+
+
+def farmers_etag(version: int) -> str:
+    return f"farmers.{version}"
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    headers = {"ETag": quote_etag(etag), "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified.replace(tzinfo=timezone.utc))
+    return headers
+
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> Optional[Response]:
+    """The 304 response when the request validators still match, else None.
+
+    ``If-None-Match`` takes precedence over ``If-Modified-Since``.
+    """
+    if last_modified is not None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    return Response(status=304, headers=validator_headers(etag, last_modified))
+
+
+def page_cache_key() -> str:
+    """The request path with the query arguments sorted."""
+    return f"{request.path}?{urlencode(sorted(request.args.items(multi=True)))}"
+
+
+def json_response(data, headers: Optional[dict] = None) -> Response:
+    """The response flask_restx would build, rendered now so its body can be cached."""
+    response = output_json(data, 200, headers)
+    response.mimetype = "application/json"
+    return response
+
+
+def cached_response(page: CachedPage) -> Response:
+    if page.etag is None:
+        return Response(page.body, mimetype="application/json")
+    response = not_modified(page.etag, page.last_modified)
+    if response is not None:
+        return response
+    return Response(page.body, mimetype="application/json",
+                    headers=validator_headers(page.etag, page.last_modified))
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+
+EXPORT_FIELDS = [
+    "cpf_cnpj",
+    "name",
+    "farm_name",
+    "city",
+    "state",
+    "total_area",
+    "agricultural_area",
+    "vegetation_area",
+    "farming_options",
+    "insert_at",
+    "update_at",
+]
+
+FARMING_OPTIONS_SEPARATOR = "|"
+
+
+def _to_dict(farmer) -> dict:
+    data = {field: getattr(farmer, field) for field in EXPORT_FIELDS}
+    data["insert_at"] = data["insert_at"].isoformat()
+    data["update_at"] = data["update_at"].isoformat()
+    return data
+
+
+def _chunks(lines: Iterable[str], chunk_size: int) -> Iterator[str]:
+    """Group the lines in chunks, sending the first one alone so the client
+    starts receiving data as soon as the first row arrives."""
+    buffer = []
+    first = True
+    for line in lines:
+        buffer.append(line)
+        if first or len(buffer) >= chunk_size:
+            yield "".join(buffer)
+            buffer.clear()
+            first = False
+    if buffer:
+        yield "".join(buffer)
+
+
+def ndjson_export(farmers: Iterable, chunk_size: int) -> Iterator[str]:
+    lines = (json.dumps(_to_dict(farmer), ensure_ascii=False) + "\n" for farmer in farmers)
+    return _chunks(lines, chunk_size)
+
+
+def csv_export(farmers: Iterable, chunk_size: int) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def take_line() -> str:
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    def lines():
+        writer.writerow(EXPORT_FIELDS)
+        yield take_line()
+        for farmer in farmers:
+            data = _to_dict(farmer)
+            data["farming_options"] = FARMING_OPTIONS_SEPARATOR.join(data["farming_options"] or [])
+            writer.writerow(data[field] for field in EXPORT_FIELDS)
+            yield take_line()
+
+    return _chunks(lines(), chunk_size)
+
+
+EXPORTERS = {
+    "ndjson": (ndjson_export, "application/x-ndjson"),
+    "csv": (csv_export, "text/csv"),
+}
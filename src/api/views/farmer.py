@@ -1,4 +1,4 @@
-from flask import Blueprint, request
+from flask import Blueprint, Response, request, current_app, stream_with_context
 from flask_restx import Api, Resource, marshal, marshal_with
 from werkzeug.exceptions import Unauthorized
 from marshmallow import ValidationError
@@ -6,15 +6,35 @@ from marshmallow import ValidationError
 from .schemas import (
     farmer_create_request_model,
     farmer_create_response_model,
+    farmer_bulk_create_result_model,
+    farmer_bulk_delete_result_model,
+    farmers_summary_model,
+    farmers_changes_response_model,
     farmer_update_request_model,
     farmer_query_args_parser,
     farmers_query_args_parser,
+    farmers_changes_query_args_parser,
+    farmers_export_query_args_parser,
+    farmers_search_query_args_parser,
     generic_response_model,
+    FARMERS_FILTERS,
     FarmerCreateRequestSchema,
     FarmerUpdateRequestSchema
 )
 from api.domain.entities.farmer import Farmer, FarmerNotFound, FarmerAlreadyRegistered
-from api.domain.repositories.farmer_repository import SQLAlchemyFarmerRepository
+from api.domain.repositories.farmer_repository import CachedFarmerRepository
+from api.infrastructure.cache import CachedPage, farmers_page_cache
+from .conditional import (
+    cached_response,
+    farmer_etag,
+    farmers_etag,
+    json_response,
+    not_modified,
+    page_cache_key,
+    validator_headers
+)
+from .exporters import EXPORTERS
+from .serializers import serialize_farmer
 
 
 VERSION = "0.0.1"
@@ -37,19 +57,71 @@ ns = api.namespace("", description=DOC)
 class Farmers(Resource):
     @ns.expect(farmers_query_args_parser)
     @ns.response(201, "OK", farmer_create_response_model)
+    @ns.response(304, "Not modified")
     def get(self) -> tuple[dict, int]:
         query_args = farmers_query_args_parser.parse_args()
-        limit = query_args.get("limit", 20)
-        offset = query_args.get("offset", 0)
+        key = page_cache_key()
+        generation, page = farmers_page_cache.get(key)
+        if page is not None:
+            return cached_response(page)
+        # Read before the listing: a write landing in between makes the next
+        # poll see a newer version instead of hiding the change.
+        try:
+            version, last_modified = Farmer.get_version(repository=CachedFarmerRepository)
+        except Exception as e:
+            return {"message": str(e)}, 400
+        etag = farmers_etag(version)
+        response = not_modified(etag, last_modified)
+        if response is not None:
+            return response
+
+        if query_args.get("cursor") is not None:
+            body, status = self.get_page(query_args)
+            if status != 200:
+                return body, status
+        else:
+            limit = query_args.get("limit", 20)
+            offset = query_args.get("offset", 0)
+            try:
+                farmers = Farmer.get_all(
+                    limit=limit,
+                    offset=offset,
+                    repository=CachedFarmerRepository,
+                    filters=self.get_filters(query_args))
+            except Exception as e:
+                return {"message": str(e)}, 400
+            body = serialize_farmer(farmers)
+
+        response = json_response(body, validator_headers(etag, last_modified))
+        farmers_page_cache.set(key, generation, CachedPage(etag, last_modified, response.get_data()))
+        return response
+
+    @staticmethod
+    def get_filters(query_args: dict) -> dict:
+        return {name: query_args[name] for name in FARMERS_FILTERS
+                if query_args.get(name) is not None}
+
+    @staticmethod
+    def get_page(query_args: dict) -> tuple[dict, int]:
+        max_page_size = current_app.config["FARMERS_MAX_PAGE_SIZE"]
         try:
-            farmers = Farmer.get_all(
+            limit = int(query_args.get("limit") or current_app.config["FARMERS_PAGE_SIZE"])
+        except ValueError:
+            return {"message": "Invalid limit."}, 400
+        limit = max(1, min(limit, max_page_size))
+        try:
+            farmers, next_cursor = Farmer.get_page(
                 limit=limit,
-                offset=offset,
-                repository=SQLAlchemyFarmerRepository)
+                cursor=query_args["cursor"],
+                repository=CachedFarmerRepository,
+                filters=Farmers.get_filters(query_args))
         except Exception as e:
             return {"message": str(e)}, 400
 
-        return marshal(farmers, farmer_create_response_model), 200
+        return {
+            "items": serialize_farmer(farmers),
+            "next_cursor": next_cursor
+        }, 200
 
     @ns.expect(farmer_create_request_model)
     @ns.response(201, "OK", farmer_create_response_model)
@@ -62,20 +134,20 @@ class Farmers(Resource):
         try:
             farmer = Farmer.create(
                 data=validated_data,
-                repository=SQLAlchemyFarmerRepository)
+                repository=CachedFarmerRepository)
         except Exception as e:
             return {"message": str(e)}, 400
 
-        return marshal(farmer, farmer_create_response_model), 201
+        return serialize_farmer(farmer), 201
 
     @ns.expect(farmer_query_args_parser)
     @ns.response(200, "OK", generic_response_model)
     def delete(self) -> tuple[dict, int]:
         query_args = farmer_query_args_parser.parse_args()
         try:
-            farmer = Farmer.delete(
+            Farmer.delete(
                 cpf_cnpj=query_args["cpf_cnpj"],
-                repository=SQLAlchemyFarmerRepository)
+                repository=CachedFarmerRepository)
         except FarmerNotFound as e:
             return {"message": str(e)}, 404
         except Exception as e:
@@ -95,7 +167,7 @@ class Farmers(Resource):
             farmer = Farmer.update(
                 cpf_cnpj=query_args["cpf_cnpj"],
                 data=validated_data,
-                repository=SQLAlchemyFarmerRepository)
+                repository=CachedFarmerRepository)
         except FarmerNotFound as e:
             return {
                 "message": str(e)
@@ -104,6 +176,185 @@ class Farmers(Resource):
             return {
                 "message": str(e)
             }, 400
-        return marshal(farmer, farmer_create_response_model), 200
+        return serialize_farmer(farmer), 200
+
+
+@ns.route("/farmers/bulk")
+class FarmersBulk(Resource):
+    @ns.expect([farmer_create_request_model])
+    @ns.response(200, "OK", [farmer_bulk_create_result_model])
+    def post(self) -> tuple[dict, int]:
+        payload = api.payload
+        if not isinstance(payload, list):
+            return {"message": "Request body must be a list of farmers"}, 400
+        max_items = current_app.config["BULK_MAX_ITEMS"]
+        if len(payload) > max_items:
+            return {"message": f"Request body cannot have more than {max_items} farmers"}, 400
+
+        schema = FarmerCreateRequestSchema.for_batch(payload)
+        results = []
+        validated_data = []
+        for index, item in enumerate(payload):
+            try:
+                data = schema.load(item)
+            except ValidationError as err:
+                cpf_cnpj = item.get("cpf_cnpj") if isinstance(item, dict) else None
+                results.append(dict(index=index, cpf_cnpj=cpf_cnpj,
+                                    status="invalid", message=str(err)))
+                continue
+            validated_data.append(data)
+            results.append(dict(index=index, cpf_cnpj=data["cpf_cnpj"],
+                                status="created", message=None))
+
+        try:
+            created = set(Farmer.bulk_create(
+                data=validated_data,
+                repository=CachedFarmerRepository))
+        except Exception:
+            return {"message": "Farmers could not be saved, none was created"}, 400
+
+        for result in results:
+            if result["status"] != "created":
+                continue
+            if result["cpf_cnpj"] in created:
+                created.discard(result["cpf_cnpj"])
+            else:
+                result["status"] = "duplicated"
+                result["message"] = "Farmer already registered"
+
+        return marshal(results, farmer_bulk_create_result_model), 200
+
+    @ns.response(200, "OK", farmer_bulk_delete_result_model)
+    def delete(self) -> tuple[dict, int]:
+        payload = api.payload
+        if not isinstance(payload, list) or not all(isinstance(item, str) for item in payload):
+            return {"message": "Request body must be a list of cpf_cnpj"}, 400
+        max_items = current_app.config["BULK_MAX_ITEMS"]
+        if len(payload) > max_items:
+            return {"message": f"Request body cannot have more than {max_items} farmers"}, 400
+
+        cpf_cnpjs = list(dict.fromkeys(payload))
+        try:
+            deleted = set(Farmer.bulk_delete(
+                cpf_cnpjs=cpf_cnpjs,
+                repository=CachedFarmerRepository))
+        except Exception as e:
+            return {"message": str(e)}, 400
+
+        return marshal({
+            "deleted": [cpf_cnpj for cpf_cnpj in cpf_cnpjs if cpf_cnpj in deleted],
+            "not_found": [cpf_cnpj for cpf_cnpj in cpf_cnpjs if cpf_cnpj not in deleted]
+        }, farmer_bulk_delete_result_model), 200
+
+
+@ns.route("/farmers/<string:cpf_cnpj>")
+class FarmerDetail(Resource):
+    @ns.response(200, "OK", farmer_create_response_model)
+    @ns.response(304, "Not modified")
+    def get(self, cpf_cnpj: str) -> tuple[dict, int]:
+        try:
+            farmer = Farmer.get_by_cpf_cnpj(
+                cpf_cnpj=cpf_cnpj,
+                repository=CachedFarmerRepository)
+        except FarmerNotFound as e:
+            return {"message": str(e)}, 404
+        except Exception as e:
+            return {"message": str(e)}, 400
+
+        etag = farmer_etag(farmer)
+        response = not_modified(etag, farmer.update_at)
+        if response is not None:
+            return response
+        return serialize_farmer(farmer), 200, validator_headers(etag, farmer.update_at)
+
+
+@ns.route("/farmers/search")
+class FarmersSearch(Resource):
+    @ns.expect(farmers_search_query_args_parser)
+    @ns.response(200, "OK", [farmer_create_response_model])
+    def get(self) -> tuple[dict, int]:
+        query_args = farmers_search_query_args_parser.parse_args()
+        query = query_args["q"].strip()
+        if len(query) < 3:
+            return {"message": "Search query must have at least 3 characters."}, 400
+        max_results = current_app.config["FARMERS_SEARCH_MAX_RESULTS"]
+        limit = max(1, min(query_args.get("limit") or max_results, max_results))
+        try:
+            farmers = Farmer.search(
+                query=query,
+                limit=limit,
+                repository=CachedFarmerRepository)
+        except Exception as e:
+            return {"message": str(e)}, 400
+
+        return serialize_farmer(farmers), 200
+
+
+@ns.route("/farmers/summary")
+class FarmersSummary(Resource):
+    @ns.response(200, "OK", farmers_summary_model)
+    def get(self) -> tuple[dict, int]:
+        generation, page = farmers_page_cache.get("summary")
+        if page is not None:
+            return cached_response(page)
+        try:
+            summary = Farmer.get_summary(repository=CachedFarmerRepository)
+        except Exception as e:
+            return {"message": str(e)}, 400
+
+        response = json_response(marshal(summary, farmers_summary_model))
+        farmers_page_cache.set("summary", generation, CachedPage(None, None, response.get_data()))
+        return response
+
+
+@ns.route("/farmers/changes")
+class FarmersChanges(Resource):
+    @ns.expect(farmers_changes_query_args_parser)
+    @ns.response(200, "OK", farmers_changes_response_model)
+    def get(self) -> tuple[dict, int]:
+        query_args = farmers_changes_query_args_parser.parse_args()
+        max_page_size = current_app.config["FARMERS_CHANGES_MAX_PAGE_SIZE"]
+        limit = query_args.get("limit") or current_app.config["FARMERS_CHANGES_PAGE_SIZE"]
+        limit = max(1, min(limit, max_page_size))
+        try:
+            changes, next_since, has_more = Farmer.get_changes(
+                since=query_args.get("since"),
+                limit=limit,
+                repository=CachedFarmerRepository)
+        except Exception as e:
+            return {"message": str(e)}, 400
+
+        return {
+            "changes": [
+                {
+                    "cpf_cnpj": change.cpf_cnpj,
+                    "changed_at": change.changed_at.isoformat(),
+                    "deleted": change.deleted,
+                    "farmer": None if change.deleted else serialize_farmer(change.farmer)
+                }
+                for change in changes
+            ],
+            "next_since": next_since,
+            "has_more": has_more
+        }, 200
+
 
+@ns.route("/farmers/export")
+class FarmersExport(Resource):
+    @ns.expect(farmers_export_query_args_parser)
+    @ns.produces(["application/x-ndjson", "text/csv"])
+    def get(self) -> Response:
+        query_args = farmers_export_query_args_parser.parse_args()
+        exporter, mimetype = EXPORTERS[query_args["format"]]
+        batch_size = current_app.config["EXPORT_BATCH_SIZE"]
+        farmers = Farmer.export(
+            batch_size=batch_size,
+            repository=CachedFarmerRepository)
 
+        return Response(
+            stream_with_context(exporter(farmers, chunk_size=batch_size)),
+            mimetype=mimetype,
+            headers={
+                "Content-Disposition": f"attachment; filename=farmers.{query_args['format']}"
+            }
+        )
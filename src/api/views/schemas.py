@@ -1,7 +1,9 @@
 from flask_restx import fields, Model, reqparse
-from validate_docbr import CPF, CNPJ
 import marshmallow as ma
 
+from api.domain.documents import normalize_document, validate_document, validate_documents
+from api.infrastructure.database.models import FarmingOptions
+
 
 farmer_query_args_parser = reqparse.RequestParser()
 farmer_query_args_parser.add_argument(
@@ -27,6 +29,96 @@ farmers_query_args_parser.add_argument(
     required=False,
     nullable=False,
 )
+farmers_query_args_parser.add_argument(
+    "cursor",
+    type=str,
+    location="args",
+    required=False,
+    nullable=False,
+    help="Opaque cursor returned in next_cursor. Send it empty to get the first page."
+)
+farmers_query_args_parser.add_argument(
+    "state",
+    type=str,
+    location="args",
+    required=False,
+    nullable=False,
+)
+farmers_query_args_parser.add_argument(
+    "city",
+    type=str,
+    location="args",
+    required=False,
+    nullable=False,
+)
+farmers_query_args_parser.add_argument(
+    "farming_option",
+    type=str,
+    location="args",
+    required=False,
+    nullable=False,
+    choices=FarmingOptions.get_all_values(),
+)
+farmers_query_args_parser.add_argument(
+    "min_total_area",
+    type=int,
+    location="args",
+    required=False,
+    nullable=False,
+)
+farmers_query_args_parser.add_argument(
+    "max_total_area",
+    type=int,
+    location="args",
+    required=False,
+    nullable=False,
+)
+
+FARMERS_FILTERS = ("state", "city", "farming_option", "min_total_area", "max_total_area")
+
+farmers_search_query_args_parser = reqparse.RequestParser()
+farmers_search_query_args_parser.add_argument(
+    "q",
+    type=str,
+    location="args",
+    required=True,
+    nullable=False,
+    help="Farmer or farm name, typos are tolerated."
+)
+farmers_search_query_args_parser.add_argument(
+    "limit",
+    type=int,
+    location="args",
+    required=False,
+    nullable=False,
+)
+
+farmers_changes_query_args_parser = reqparse.RequestParser()
+farmers_changes_query_args_parser.add_argument(
+    "since",
+    type=str,
+    location="args",
+    required=False,
+    nullable=True,
+    help="Token returned as next_since by the previous call, empty to start from the beginning."
+)
+farmers_changes_query_args_parser.add_argument(
+    "limit",
+    type=int,
+    location="args",
+    required=False,
+    nullable=False,
+)
+
+farmers_export_query_args_parser = reqparse.RequestParser()
+farmers_export_query_args_parser.add_argument(
+    "format",
+    type=str,
+    location="args",
+    required=False,
+    default="ndjson",
+    choices=("ndjson", "csv"),
+)
 
 index_model = Model(
     "Health-Status",
@@ -62,7 +154,7 @@ class CustomJsonField(fields.Raw):
             )
 
 
-### CREATE FARMER
+# CREATE FARMER
 class FarmerCreateRequestSchema(ma.Schema):
     cpf_cnpj = ma.fields.String(
         description="CPF or CNPJ",
@@ -132,10 +224,26 @@ class FarmerCreateRequestSchema(ma.Schema):
     
     @ma.validates('cpf_cnpj')
     def validate_cpf_cnpj(self, value):
-        validator = CPF() if len(value) == 11 else CNPJ()
-        if not validator.validate(value):
+        valid_documents = self.context.get("valid_documents", {})
+        valid = valid_documents[value] if value in valid_documents else validate_document(value)
+        if not valid:
             raise ma.ValidationError("Wrong value for CPF or CNPJ")
 
+    @ma.post_load
+    def normalize_cpf_cnpj(self, data, **kwargs):
+        if "cpf_cnpj" in data:
+            data["cpf_cnpj"] = normalize_document(data["cpf_cnpj"])
+        return data
+
+    @classmethod
+    def for_batch(cls, items: list) -> "FarmerCreateRequestSchema":
+        """Schema to load a batch of farmers with the documents validated at once."""
+        documents = [item.get("cpf_cnpj") if isinstance(item, dict) else None for item in items]
+        documents = [document for document in documents if isinstance(document, str)]
+        return cls(context={
+            "valid_documents": dict(zip(documents, validate_documents(documents).tolist()))
+        })
+
 
 farmer_create_request_model = Model(
     "Farmer create request",
@@ -205,7 +313,122 @@ farmer_create_response_model["update_at"] = fields.DateTime(
                                         )
 
 
-### UPDATE FARMER
+farmers_page_response_model = Model(
+    "Farmers page response",
+    {
+        "items": fields.List(fields.Nested(farmer_create_response_model)),
+        "next_cursor": fields.String(
+            description="Cursor of the next page. Null when there are no more farmers",
+            example="eyJjcGZfY25waiI6ICIwMDEwMDIwMDMwNCJ9"
+        )
+    }
+)
+
+
+farmer_change_model = Model(
+    "Farmer change",
+    {
+        "cpf_cnpj": fields.String(description="cpf or cnpj", example="00100200304"),
+        "changed_at": fields.DateTime(description="Time of the write or deletion",
+                                      example="2022-01-01T00:00:00"),
+        "deleted": fields.Boolean(description="Whether the farmer was deleted", example=False),
+        "farmer": fields.Nested(farmer_create_response_model, allow_null=True,
+                                description="Farmer as written, null when deleted")
+    }
+)
+
+farmers_changes_response_model = Model(
+    "Farmers changes response",
+    {
+        "changes": fields.List(fields.Nested(farmer_change_model)),
+        "next_since": fields.String(
+            description="Token to ask for the changes after these ones",
+            example="eyJjaGFuZ2VkX2F0IjogIjIwMjItMDEtMDFUMDA6MDA6MDAiLCAiY3BmX2NucGoiOiAiMDAxMDAyMDAzMDQifQ=="
+        ),
+        "has_more": fields.Boolean(description="Whether more changes can be read right away", example=False)
+    }
+)
+
+
+# FARMERS SUMMARY
+farmers_state_summary_model = Model(
+    "Farmers state summary",
+    {
+        "state": fields.String(example="PB"),
+        "farm_count": fields.Integer(example="10"),
+        "total_area": fields.Integer(example="1000"),
+        "agricultural_area": fields.Integer(example="300"),
+        "vegetation_area": fields.Integer(example="200")
+    }
+)
+
+farmers_option_summary_model = Model(
+    "Farmers farming option summary",
+    {
+        "farming_option": fields.String(example="SOY"),
+        "farm_count": fields.Integer(example="10")
+    }
+)
+
+farmers_summary_model = Model(
+    "Farmers summary",
+    {
+        "farm_count": fields.Integer(description="Amount of farms", example="10"),
+        "total_area": fields.Integer(description="Sum of the farms total area in hectares", example="1000"),
+        "agricultural_area": fields.Integer(description="Sum of the agricultural areas in hectares",
+                                            example="300"),
+        "vegetation_area": fields.Integer(description="Sum of the vegetation areas in hectares",
+                                          example="200"),
+        "states": fields.List(fields.Nested(farmers_state_summary_model)),
+        "farming_options": fields.List(fields.Nested(farmers_option_summary_model))
+    }
+)
+
+
+# BULK CREATE FARMERS
+farmer_bulk_create_result_model = Model(
+    "Farmer bulk create result",
+    {
+        "index": fields.Integer(
+            description="Position of the farmer in the request body",
+            example="0"
+        ),
+        "cpf_cnpj": fields.String(
+            description="cpf or cnpj",
+            example="00100200304|XXXXXXXX0001XX"
+        ),
+        "status": fields.String(
+            description="Result of the farmer creation",
+            enum=["created", "duplicated", "invalid"],
+            example="created"
+        ),
+        "message": fields.String(
+            description="Error details when the farmer was not created",
+            example="Farmer already registered"
+        )
+    }
+)
+
+
+# BULK DELETE FARMERS
+farmer_bulk_delete_result_model = Model(
+    "Farmer bulk delete result",
+    {
+        "deleted": fields.List(
+            fields.String,
+            description="cpf or cnpj of the farmers deleted",
+            example=["00100200304"]
+        ),
+        "not_found": fields.List(
+            fields.String,
+            description="cpf or cnpj of the farmers not registered",
+            example=["XXXXXXXX0001XX"]
+        )
+    }
+)
+
+
+# UPDATE FARMER
 class FarmerUpdateRequestSchema(FarmerCreateRequestSchema):
     name = ma.fields.String(
         description="Name",
@@ -0,0 +1,73 @@
+"""Serializers compiled from flask_restx models.
+
+``marshal`` walks the model fields and calls ``Raw.output`` for every attribute
+of every object. ``compile_serializer`` does that walk once and generates a
+function reading the attributes directly. Values with the expected type take a
+fast path and anything else goes through the field ``output``, so the result is
+the same of ``marshal``.
+"""
+import keyword
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Callable
+
+from flask_restx import fields, marshal, Model
+
+from .schemas import CustomJsonField, farmer_create_response_model
+
+
+FAST_PATHS = {
+    fields.String: "{value} if {value}.__class__ is str else {fallback}",
+    fields.Integer: "{value} if {value}.__class__ is int else {fallback}",
+    fields.DateTime: "{value}.isoformat() if {value}.__class__ is datetime else {fallback}",
+    CustomJsonField: "{value} if {value}.__class__ is list else {fallback}",
+}
+
+
+def _fast_path(field: fields.Raw) -> str:
+    if field.default is not None or field.mask:
+        return None
+    if isinstance(field, fields.DateTime) and field.dt_format != "iso8601":
+        return None
+    return FAST_PATHS.get(type(field))
+
+
+def compile_serializer(model: Model) -> Callable:
+    namespace = {"datetime": datetime, "fields": {}}
+    lines = ["def serialize_one(obj):"]
+    items = []
+    for index, (key, field) in enumerate(model.items()):
+        namespace["fields"][key] = field
+        fallback = f"fields[{key!r}].output({key!r}, obj)"
+        attribute = field.attribute or key
+        fast_path = _fast_path(field)
+        if (fast_path is None or not isinstance(attribute, str)
+                or not attribute.isidentifier() or keyword.iskeyword(attribute)):
+            items.append(f"{key!r}: {fallback}")
+            continue
+        value = f"v{index}"
+        lines.append(f"    {value} = obj.{attribute}")
+        items.append(f"{key!r}: None if {value} is None else "
+                     f"({fast_path.format(value=value, fallback=fallback)})")
+    lines.append("    return {" + ", ".join(items) + "}")
+    exec("\n".join(lines), namespace)
+    compiled = namespace["serialize_one"]
+
+    def serialize_one(item):
+        if isinstance(item, Mapping):
+            return marshal(item, model)
+        try:
+            return compiled(item)
+        except AttributeError:
+            return marshal(item, model)
+
+    def serialize(data):
+        if isinstance(data, (list, tuple)):
+            return [serialize_one(item) for item in data]
+        return serialize_one(data)
+
+    serialize.source = "\n".join(lines)
+    return serialize
+
+
+serialize_farmer = compile_serializer(farmer_create_response_model)
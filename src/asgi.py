@@ -0,0 +1,4 @@
+from api.asgi import create_asgi_app
+
+
+app = create_asgi_app()
@@ -0,0 +1,65 @@
+"""Latency and throughput of the farmers listing under concurrent load.
+
+Start the WSGI deployment (``flask run`` or uwsgi) and the ASGI one
+(``uvicorn asgi:app``) against the same database, then, inside the src dir:
+    python -m benchmarks.asgi_vs_wsgi http://localhost:5000 http://localhost:8000 \
+        --concurrency 200 --requests 20000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+
+async def run_load(base_url: str, path: str, concurrency: int, total: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else None,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base_urls", nargs="+")
+    parser.add_argument("--path", default="/api/v1/farmers?cursor=&limit=20")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    for base_url in args.base_urls:
+        result = asyncio.run(run_load(base_url, args.path, args.concurrency, args.requests))
+        print(f"{base_url}: {result['requests_per_second']:.0f} req/s, "
+              f"p50 {result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms, "
+              f"{result['errors']} errors")
+
+
+if __name__ == "__main__":
+    main()
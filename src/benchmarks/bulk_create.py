@@ -0,0 +1,49 @@
+"""Throughput of the single insert path against the batched bulk insert.
+
+Usage, inside the src dir and with the database configured in the ``.env``:
+    python -m benchmarks.bulk_create --amount 20000
+"""
+import argparse
+
+from api.app import create_app, db
+from api.infrastructure.database.models import Farmer as FarmerTable
+from api.domain.repositories.farmer_repository import SQLAlchemyFarmerRepository
+from benchmarks.common import generate_farmers, timeit
+
+
+def create_one_by_one(farmers):
+    for farmer in farmers:
+        SQLAlchemyFarmerRepository.create(data=dict(farmer))
+
+
+def cleanup(farmers):
+    documents = [farmer["cpf_cnpj"] for farmer in farmers]
+    FarmerTable.query.filter(FarmerTable.cpf_cnpj.in_(documents)).delete()
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--amount", type=int, default=10000)
+    parser.add_argument("--env", default="Development")
+    args = parser.parse_args()
+
+    app = create_app(args.env)
+    with app.app_context():
+        farmers = list(generate_farmers(args.amount))
+        single, bulk = farmers[:len(farmers) // 2], farmers[len(farmers) // 2:]
+
+        elapsed = timeit(create_one_by_one, single)
+        print(f"single insert: {len(single)} farmers in {elapsed:.2f}s "
+              f"({len(single) / elapsed:.0f} farmers/s)")
+
+        elapsed = timeit(SQLAlchemyFarmerRepository.bulk_create, data=bulk)
+        print(f"bulk insert:   {len(bulk)} farmers in {elapsed:.2f}s "
+              f"({len(bulk) / elapsed:.0f} farmers/s, "
+              f"batch size {app.config['BULK_INSERT_BATCH_SIZE']})")
+
+        cleanup(farmers)
+
+
+if __name__ == "__main__":
+    main()
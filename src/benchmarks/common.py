@@ -0,0 +1,61 @@
+import statistics
+import time
+from random import choice, randint
+from typing import Callable, Iterator, List
+
+from validate_docbr import CPF
+
+from api.infrastructure.database.models import FarmingOptions
+
+
+STATES = ["AC", "AL", "AM", "BA", "CE", "DF", "ES", "GO", "MA", "MG", "MS", "MT", "PA",
+          "PB", "PE", "PI", "PR", "RJ", "RN", "RO", "RR", "RS", "SC", "SE", "SP", "TO"]
+
+
+def generate_documents(amount: int) -> List[str]:
+    cpf = CPF()
+    documents = set()
+    while len(documents) < amount:
+        documents.add(cpf.generate())
+    return list(documents)
+
+
+def generate_farmers(amount: int) -> Iterator[dict]:
+    options = FarmingOptions.get_all_values()
+    for index, cpf_cnpj in enumerate(generate_documents(amount)):
+        total_area = randint(10, 10000)
+        agricultural_area = randint(0, total_area)
+        yield {
+            "cpf_cnpj": cpf_cnpj,
+            "name": f"Fazendeiro {index}",
+            "farm_name": f"Fazenda {index}",
+            "city": "Joao Pessoa",
+            "state": choice(STATES),
+            "total_area": total_area,
+            "agricultural_area": agricultural_area,
+            "vegetation_area": randint(0, total_area - agricultural_area),
+            "farming_options": list({choice(options) for _ in range(randint(1, 3))})
+        }
+
+
+def timeit(func: Callable, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> dict:
+    """Percentiles in milliseconds and throughput of a run."""
+    latencies = sorted(latencies)
+
+    def percentile(value: float) -> float:
+        return round(latencies[max(int(len(latencies) * value) - 1, 0)] * 1000, 3)
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+    }
@@ -0,0 +1,50 @@
+"""Compares two result files of ``benchmarks.endpoints``.
+
+Exits with status 1 when the p95 of any scenario got slower than the threshold.
+Usage, inside the src dir:
+    python -m benchmarks.compare benchmark-abc1234.json benchmark-def5678.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "requests_per_second")
+
+
+def change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10, help="allowed p95 slowdown in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.candidate) as file:
+        candidate = json.load(file)
+
+    print(f"{baseline['metadata']['commit']} -> {candidate['metadata']['commit']}")
+    regressions = []
+    for name, old in baseline["results"].items():
+        new = candidate["results"].get(name)
+        if new is None:
+            print(f"{name:>20}: missing in {args.candidate}")
+            continue
+        columns = [f"{metric} {old[metric]:.2f} -> {new[metric]:.2f} ({change(old[metric], new[metric]):+.1f}%)"
+                   for metric in METRICS]
+        print(f"{name:>20}: " + ", ".join(columns))
+        if change(old["p95_ms"], new["p95_ms"]) > args.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print(f"p95 regressions over {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Batch CPF/CNPJ validation against one validate_docbr call per document.
+
+Usage, inside the src dir:
+    python -m benchmarks.documents --amount 1000000
+"""
+import argparse
+from random import random
+
+from validate_docbr import CPF, CNPJ
+
+from api.domain.documents import validate_documents
+from benchmarks.common import timeit
+
+
+def validate_one_by_one(documents):
+    return [(CPF() if len(document) == 11 else CNPJ()).validate(document) for document in documents]
+
+
+def generate(amount):
+    cpf, cnpj = CPF(), CNPJ()
+    return [cpf.generate() if random() < 0.5 else cnpj.generate() for _ in range(amount)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--amount", type=int, default=1000000)
+    args = parser.parse_args()
+
+    documents = generate(args.amount)
+
+    elapsed = timeit(validate_one_by_one, documents)
+    print(f"validate_docbr: {len(documents)} documents in {elapsed:.2f}s "
+          f"({len(documents) / elapsed:.0f} documents/s)")
+
+    elapsed = timeit(validate_documents, documents)
+    print(f"batch:          {len(documents)} documents in {elapsed:.2f}s "
+          f"({len(documents) / elapsed:.0f} documents/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Latency and throughput of the farmer endpoints, stored as JSON.
+
+The app from ``create_app("Testing")`` is driven in process by the Flask test
+client against the database in ``SQLALCHEMY_DATABASE_URI_TEST``, so the numbers
+cover the app and the database without the HTTP server. Usage, inside the src
+dir:
+    python -m benchmarks.endpoints --amount 100000 --requests 500
+    python -m benchmarks.compare benchmark-<old commit>.json benchmark-<new commit>.json
+"""
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from api.app import create_app, db
+from api.domain.entities.farmer import Farmer
+from api.domain.repositories.farmer_repository import SQLAlchemyFarmerRepository
+from api.infrastructure.database.models import Farmer as FarmerTable
+from benchmarks.common import generate_farmers, summarize
+
+
+PAGE_SIZE = 20
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def scenarios(amount: int, seeded: List[str], new_farmers: List[dict]) -> Dict[str, Callable]:
+    middle_cursor = Farmer.encode_cursor(seeded[len(seeded) // 2])
+    return {
+        "list_offset_first": lambda client, i: client.get(
+            f"/api/v1/farmers?limit={PAGE_SIZE}&offset=0"),
+        "list_offset_middle": lambda client, i: client.get(
+            f"/api/v1/farmers?limit={PAGE_SIZE}&offset={amount // 2}"),
+        "list_offset_last": lambda client, i: client.get(
+            f"/api/v1/farmers?limit={PAGE_SIZE}&offset={amount - PAGE_SIZE}"),
+        "list_cursor_first": lambda client, i: client.get(
+            f"/api/v1/farmers?cursor=&limit={PAGE_SIZE}"),
+        "list_cursor_middle": lambda client, i: client.get(
+            f"/api/v1/farmers?cursor={middle_cursor}&limit={PAGE_SIZE}"),
+        "summary": lambda client, i: client.get("/api/v1/farmers/summary"),
+        "post": lambda client, i: client.post("/api/v1/farmers", json=new_farmers[i]),
+        "patch": lambda client, i: client.patch(
+            f"/api/v1/farmers?cpf_cnpj={seeded[i % len(seeded)]}", json={"name": f"Fazendeiro {i}"}),
+        "delete": lambda client, i: client.delete(
+            f"/api/v1/farmers?cpf_cnpj={new_farmers[i]['cpf_cnpj']}"),
+    }
+
+
+def run(client, request: Callable, requests: int, warmup: int) -> dict:
+    for i in range(warmup):
+        request(client, i)
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for i in range(warmup, warmup + requests):
+        request_start = time.perf_counter()
+        response = request(client, i)
+        latencies.append(time.perf_counter() - request_start)
+        errors += response.status_code >= 400
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--amount", type=int, default=100000, help="farmers seeded before the run")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--output", default=None, help="defaults to benchmark-<commit>.json")
+    args = parser.parse_args()
+
+    app = create_app("Testing")
+    # measure the app, not the terminal
+    logging.getLogger("agro").setLevel(logging.WARNING)
+    logging.getLogger("flask-request-logger").setLevel(logging.WARNING)
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        farmers = list(generate_farmers(args.amount + args.requests + args.warmup))
+        seed, new_farmers = farmers[:args.amount], farmers[args.amount:]
+        seeded = sorted(SQLAlchemyFarmerRepository.bulk_create(data=seed))
+
+        results = {}
+        for name, request in scenarios(args.amount, seeded, new_farmers).items():
+            results[name] = run(client, request, args.requests, args.warmup)
+            print(f"{name:>20}: p50 {results[name]['p50_ms']:.2f} ms, p95 {results[name]['p95_ms']:.2f} ms, "
+                  f"p99 {results[name]['p99_ms']:.2f} ms, {results[name]['requests_per_second']:.0f} req/s, "
+                  f"{results[name]['errors']} errors")
+
+        for start in range(0, len(seeded), 10000):
+            FarmerTable.query.filter(FarmerTable.cpf_cnpj.in_(seeded[start:start + 10000])).delete()
+        db.session.commit()
+
+    commit = git_commit()
+    output = args.output or f"benchmark-{commit}.json"
+    with open(output, "w") as file:
+        json.dump({
+            "metadata": {
+                "commit": commit,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "amount": args.amount,
+                "requests": args.requests,
+                "page_size": PAGE_SIZE,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+            },
+            "results": results,
+        }, file, indent=2)
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Latency of the state scoped listing and summary queries, to compare the
+farmer table before and after it is partitioned by state.
+
+Run it against the same database at both revisions. Usage, inside the src
+dir and with the database configured in the ``.env``:
+    flask db downgrade a4d9e2c7b5f8 && python -m benchmarks.partitions --queries 300
+    flask db upgrade && python -m benchmarks.partitions --queries 300
+``--amount`` seeds that many extra farmers first and removes them at the end.
+"""
+import argparse
+import time
+from random import choice, randint
+
+from sqlalchemy import func, inspect, select, text
+
+from api.app import create_app, db
+from api.infrastructure.database.models import Farmer as FarmerTable, FarmingOptions
+from api.domain.repositories.farmer_repository import FARMER_COLUMNS, SQLAlchemyFarmerRepository, farmer_key
+from api.infrastructure.database.prepared import execute_prepared
+from benchmarks.common import STATES, generate_farmers, summarize, timeit
+
+
+def random_document() -> str:
+    return str(randint(0, 10 ** 11 - 1)).zfill(11)
+
+
+def state_summary(state: str):
+    return db.session.execute(
+        select(func.count(), func.sum(FarmerTable.total_area),
+               func.sum(FarmerTable.agricultural_area), func.sum(FarmerTable.vegetation_area))
+        .where(FarmerTable.state == state)
+    ).one()
+
+
+def city_summary(state: str):
+    return db.session.execute(
+        select(FarmerTable.city, func.count(), func.sum(FarmerTable.total_area))
+        .where(FarmerTable.state == state)
+        .group_by(FarmerTable.city)
+    ).all()
+
+
+def by_cpf_cnpj_lookup(registry: bool):
+    """The statement looking a farmer up by document at each revision: the
+    prepared one of the repository once ``farmer_document`` exists, a primary
+    key select of the unpartitioned table before it."""
+    if registry:
+        return lambda cpf_cnpj: execute_prepared(
+            db.session, select(*FARMER_COLUMNS).where(*farmer_key(cpf_cnpj))).one()
+    return lambda cpf_cnpj: db.session.execute(
+        select(*FARMER_COLUMNS).where(FarmerTable.cpf_cnpj == cpf_cnpj)).one()
+
+
+def scenarios(documents: list) -> dict:
+    options = FarmingOptions.get_all_values()
+    by_cpf_cnpj = by_cpf_cnpj_lookup(inspect(db.engine).has_table("farmer_document"))
+    return {
+        "page": lambda state: SQLAlchemyFarmerRepository.get_page(
+            limit=50, after=random_document(), filters={"state": state}),
+        "page_option": lambda state: SQLAlchemyFarmerRepository.get_page(
+            limit=50, after=random_document(), filters={"state": state, "farming_option": choice(options)}),
+        "offset_1000": lambda state: SQLAlchemyFarmerRepository.get_all(
+            limit=50, offset=1000, filters={"state": state}),
+        "state_summary": state_summary,
+        "city_summary": city_summary,
+        "by_cpf_cnpj": lambda state: by_cpf_cnpj(choice(documents)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--amount", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--env", default="Development")
+    args = parser.parse_args()
+
+    app = create_app(args.env)
+    with app.app_context():
+        seeded = SQLAlchemyFarmerRepository.bulk_create(data=list(generate_farmers(args.amount)))
+        db.session.execute(text("ANALYZE farmer"))
+        db.session.commit()
+        documents = db.session.execute(
+            select(FarmerTable.cpf_cnpj).order_by(func.random()).limit(1000)).scalars().all()
+        try:
+            for name, query in scenarios(documents).items():
+                for state in STATES:
+                    query(state)
+                latencies = []
+                start = time.perf_counter()
+                for _ in range(args.queries):
+                    latencies.append(timeit(query, choice(STATES)))
+                    db.session.remove()
+                result = summarize(latencies, time.perf_counter() - start)
+                print(f"{name:>13}: p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, "
+                      f"p99 {result['p99_ms']:.2f} ms")
+        finally:
+            for start in range(0, len(seeded), 10000):
+                FarmerTable.query.filter(FarmerTable.cpf_cnpj.in_(seeded[start:start + 10000])).delete()
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""CPU and memory of reading farmers as ORM instances against the Core read
+path building slotted ``Farmer`` entities.
+
+Every page is read as in a request: the session lives until the page is
+returned, so the ORM instances stay in the identity map. Usage, inside the
+src dir and with the database configured in the ``.env``:
+    python -m benchmarks.read_path --amount 10000 --page-size 1000 --pages 50
+"""
+import argparse
+import time
+import tracemalloc
+
+from api.app import create_app, db
+from api.infrastructure.database.models import Farmer as FarmerTable
+from api.domain.repositories.farmer_repository import SQLAlchemyFarmerRepository
+from benchmarks.common import generate_farmers
+
+
+def orm_page(limit: int, offset: int) -> list:
+    return FarmerTable.query.limit(limit).offset(offset).all()
+
+
+def core_page(limit: int, offset: int) -> list:
+    return SQLAlchemyFarmerRepository.get_all(limit=limit, offset=offset)
+
+
+def measure(read, page_size: int, pages: int, total: int) -> tuple:
+    """CPU time and memory held by the result, both per 1k rows. The memory
+    is traced in a second pass since tracemalloc slows the reads down."""
+    offsets = [page * page_size % max(total - page_size, 1) for page in range(pages)]
+    cpu = 0.0
+    for offset in offsets:
+        start = time.process_time()
+        read(page_size, offset)
+        cpu += time.process_time() - start
+        db.session.remove()
+    memory = 0
+    for offset in offsets:
+        tracemalloc.start()
+        farmers = read(page_size, offset)
+        memory += tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del farmers
+        db.session.remove()
+    scale = 1000 / page_size / pages
+    return cpu * scale * 1000, memory * scale / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--amount", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--env", default="Development")
+    args = parser.parse_args()
+
+    app = create_app(args.env)
+    with app.app_context():
+        documents = SQLAlchemyFarmerRepository.bulk_create(data=list(generate_farmers(args.amount)))
+        total = FarmerTable.query.count()
+        try:
+            for read in (orm_page, core_page):
+                read(args.page_size, 0)
+                db.session.remove()
+                cpu, memory = measure(read, args.page_size, args.pages, total)
+                print(f"{read.__name__:>9}: {cpu:.2f} ms CPU and {memory:.0f} KiB retained per 1k rows")
+        finally:
+            SQLAlchemyFarmerRepository.bulk_delete(cpf_cnpjs=documents)
+
+
+if __name__ == "__main__":
+    main()
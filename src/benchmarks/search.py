@@ -0,0 +1,85 @@
+"""Latency of the trigram search against the ILIKE scan it replaces.
+
+Needs the pg_trgm indexes, so run ``flask db upgrade`` first. Usage, inside
+the src dir and with the database configured in the ``.env``:
+    python -m benchmarks.search --amount 1000000 --queries 200
+"""
+import argparse
+import statistics
+from random import choice, randint
+
+from sqlalchemy import text
+
+from api.app import create_app, db
+from api.infrastructure.database.models import Farmer as FarmerTable
+from api.domain.repositories.farmer_repository import SQLAlchemyFarmerRepository
+from benchmarks.common import generate_farmers, timeit
+
+
+FIRST_NAMES = ["Joao", "Maria", "Jose", "Ana", "Antonio", "Francisca", "Carlos", "Paulo",
+               "Adriana", "Lucas", "Juliana", "Marcos", "Raimundo", "Sebastiao", "Tereza"]
+LAST_NAMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves",
+              "Pereira", "Lima", "Gomes", "Ribeiro", "Carvalho", "Almeida", "Nascimento"]
+FARM_NAMES = ["Boa Vista", "Santa Rita", "Esperanca", "Sao Jose", "Bela Vista", "Primavera",
+              "Tres Irmaos", "Recanto", "Santa Luzia", "Agua Limpa", "Monte Alegre"]
+
+
+def person_name() -> str:
+    return f"{choice(FIRST_NAMES)} {choice(LAST_NAMES)} {choice(LAST_NAMES)}"
+
+
+def misspell(name: str) -> str:
+    position = randint(1, len(name) - 2)
+    return name[:position] + name[position + 1:]
+
+
+def seed(amount: int) -> list:
+    farmers = []
+    for farmer in generate_farmers(amount):
+        farmer["name"] = person_name()
+        farmer["farm_name"] = f"Fazenda {choice(FARM_NAMES)} {randint(1, 999)}"
+        farmers.append(farmer)
+    SQLAlchemyFarmerRepository.bulk_create(data=farmers)
+    db.session.execute(text("ANALYZE farmer"))
+    db.session.commit()
+    return [farmer["cpf_cnpj"] for farmer in farmers]
+
+
+def ilike(query: str, limit: int):
+    pattern = f"%{query}%"
+    return (FarmerTable.query
+            .filter(FarmerTable.name.ilike(pattern) | FarmerTable.farm_name.ilike(pattern))
+            .limit(limit).all())
+
+
+def report(name: str, latencies: list) -> None:
+    latencies = sorted(latencies)
+    print(f"{name:>8}: p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--amount", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--env", default="Development")
+    args = parser.parse_args()
+
+    app = create_app(args.env)
+    with app.app_context():
+        documents = seed(args.amount)
+        queries = [person_name() for _ in range(args.queries)]
+
+        report("ilike", [timeit(ilike, query, args.limit) for query in queries])
+        report("trigram", [timeit(SQLAlchemyFarmerRepository.search, misspell(query), args.limit)
+                           for query in queries])
+
+        for start in range(0, len(documents), 10000):
+            batch = documents[start:start + 10000]
+            FarmerTable.query.filter(FarmerTable.cpf_cnpj.in_(batch)).delete()
+        db.session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Throughput of flask_restx marshal against the compiled farmer serializer.
+
+Usage, inside the src dir:
+    python -m benchmarks.serializer --page-size 100 --pages 2000
+"""
+import argparse
+from datetime import datetime
+
+from flask_restx import marshal
+
+from api.infrastructure.database.models import Farmer as FarmerTable
+from api.views.schemas import farmer_create_response_model
+from api.views.serializers import serialize_farmer
+from benchmarks.common import generate_farmers, timeit
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=2000)
+    args = parser.parse_args()
+
+    now = datetime.utcnow()
+    page = [FarmerTable(**farmer, insert_at=now, update_at=now)
+            for farmer in generate_farmers(args.page_size)]
+    assert serialize_farmer(page) == marshal(page, farmer_create_response_model)
+
+    for name, serializer in [
+        ("marshal", lambda: marshal(page, farmer_create_response_model)),
+        ("compiled", lambda: serialize_farmer(page)),
+    ]:
+        elapsed = timeit(lambda: [serializer() for _ in range(args.pages)])
+        print(f"{name:>8}: {args.pages / elapsed:.0f} pages/s of {args.page_size} farmers "
+              f"({elapsed / args.pages * 1000:.3f} ms per page)")
+
+
+if __name__ == "__main__":
+    main()
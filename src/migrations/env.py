@@ -5,6 +5,8 @@ from flask import current_app
 
 from alembic import context
 
+from api.infrastructure.database.partitions import partition_names
+
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -90,9 +92,23 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # the pg_trgm indexes are created only by the migrations, so the models
+    # (and the test database built from them) don't need the extension; the
+    # state partitions of farmer aren't models either
+    partitions = set(partition_names("farmer").values())
+
+    def include_object(object, name, type_, reflected, compare_to):
+        if type_ == "table" and reflected and name in partitions:
+            return False
+        if type_ == "index" and reflected and object.table.name in partitions:
+            return False
+        return not (type_ == "index" and reflected and name.endswith("_trgm"))
+
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
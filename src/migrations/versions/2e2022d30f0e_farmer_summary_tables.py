@@ -0,0 +1,123 @@
+"""farmer summary tables maintained by triggers
+
+Revision ID: 2e2022d30f0e
+Revises: aabe6b36869c
+Create Date: 2026-10-18 09:12:41.203114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e2022d30f0e'
+down_revision = 'aabe6b36869c'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = "state, total_area, agricultural_area, vegetation_area, farming_options"
+
+DELTAS = {
+    "insert": f"SELECT {COLUMNS}, 1 AS sign FROM new_rows",
+    "update": f"SELECT {COLUMNS}, 1 AS sign FROM new_rows "
+              f"UNION ALL SELECT {COLUMNS}, -1 AS sign FROM old_rows",
+    "delete": f"SELECT {COLUMNS}, -1 AS sign FROM old_rows",
+}
+
+TRANSITION_TABLES = {
+    "insert": "NEW TABLE AS new_rows",
+    "update": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "delete": "OLD TABLE AS old_rows",
+}
+
+FUNCTION = """
+CREATE OR REPLACE FUNCTION farmer_summary_{operation}() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO farmer_state_summary AS summary
+        (state, farm_count, total_area, agricultural_area, vegetation_area)
+    SELECT state, sum(sign), sum(sign * total_area), sum(sign * agricultural_area),
+           sum(sign * vegetation_area)
+    FROM ({delta}) AS delta
+    GROUP BY state
+    HAVING sum(sign) <> 0 OR sum(sign * total_area) <> 0
+        OR sum(sign * agricultural_area) <> 0 OR sum(sign * vegetation_area) <> 0
+    ON CONFLICT (state) DO UPDATE SET
+        farm_count = summary.farm_count + EXCLUDED.farm_count,
+        total_area = summary.total_area + EXCLUDED.total_area,
+        agricultural_area = summary.agricultural_area + EXCLUDED.agricultural_area,
+        vegetation_area = summary.vegetation_area + EXCLUDED.vegetation_area;
+
+    INSERT INTO farmer_option_summary AS summary (farming_option, farm_count)
+    SELECT option.value, sum(delta.sign)
+    FROM ({delta}) AS delta,
+         LATERAL (SELECT DISTINCT value
+                  FROM json_array_elements_text(COALESCE(delta.farming_options::json, '[]'))
+                 ) AS option
+    GROUP BY option.value
+    HAVING sum(delta.sign) <> 0
+    ON CONFLICT (farming_option) DO UPDATE SET
+        farm_count = summary.farm_count + EXCLUDED.farm_count;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+TRIGGER = """
+CREATE TRIGGER farmer_summary_{operation}
+AFTER {event} ON farmer
+REFERENCING {transition_tables}
+FOR EACH STATEMENT EXECUTE FUNCTION farmer_summary_{operation}()
+"""
+
+
+def upgrade():
+    op.create_table(
+        'farmer_state_summary',
+        sa.Column('state', sa.String(length=2), nullable=False),
+        sa.Column('farm_count', sa.Integer(), nullable=False),
+        sa.Column('total_area', sa.BigInteger(), nullable=False),
+        sa.Column('agricultural_area', sa.BigInteger(), nullable=False),
+        sa.Column('vegetation_area', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('state', name=op.f('farmer_state_summary_pkey'))
+    )
+    op.create_table(
+        'farmer_option_summary',
+        sa.Column('farming_option', sa.String(length=20), nullable=False),
+        sa.Column('farm_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('farming_option', name=op.f('farmer_option_summary_pkey'))
+    )
+
+    # No write can land between the trigger creation and the backfill
+    op.execute("LOCK TABLE farmer IN SHARE ROW EXCLUSIVE MODE")
+    for operation, delta in DELTAS.items():
+        op.execute(FUNCTION.format(operation=operation, delta=delta))
+        op.execute(TRIGGER.format(operation=operation,
+                                  event=operation.upper(),
+                                  transition_tables=TRANSITION_TABLES[operation]))
+
+    op.execute("""
+        INSERT INTO farmer_state_summary
+            (state, farm_count, total_area, agricultural_area, vegetation_area)
+        SELECT state, count(*), sum(total_area), sum(agricultural_area), sum(vegetation_area)
+        FROM farmer
+        GROUP BY state
+    """)
+    op.execute("""
+        INSERT INTO farmer_option_summary (farming_option, farm_count)
+        SELECT option.value, count(*)
+        FROM farmer,
+             LATERAL (SELECT DISTINCT value
+                      FROM json_array_elements_text(COALESCE(farmer.farming_options::json, '[]'))
+                     ) AS option
+        GROUP BY option.value
+    """)
+
+
+def downgrade():
+    for operation in DELTAS:
+        op.execute(f"DROP TRIGGER IF EXISTS farmer_summary_{operation} ON farmer")
+        op.execute(f"DROP FUNCTION IF EXISTS farmer_summary_{operation}()")
+    op.drop_table('farmer_option_summary')
+    op.drop_table('farmer_state_summary')
@@ -0,0 +1,64 @@
+"""farmer version bumped once per transaction at commit
+
+Revision ID: 5f2b8e6a1c94
+Revises: c8f1e5a3d7b2
+Create Date: 2026-10-19 10:12:37.218406
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5f2b8e6a1c94'
+down_revision = 'c8f1e5a3d7b2'
+branch_labels = None
+depends_on = None
+
+
+PENDING_FUNCTION = """
+CREATE OR REPLACE FUNCTION farmer_version_pending() RETURNS boolean AS $$
+BEGIN
+    IF current_setting('agro.farmer_version_pending', true) = 'on' THEN
+        RETURN false;
+    END IF;
+    PERFORM set_config('agro.farmer_version_pending', 'on', true);
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+TRIGGERS = [
+    """
+CREATE CONSTRAINT TRIGGER farmer_version_bump
+AFTER INSERT OR UPDATE OR DELETE ON farmer
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW WHEN (farmer_version_pending())
+EXECUTE FUNCTION farmer_version_bump()
+""",
+    """
+CREATE TRIGGER farmer_version_truncate
+AFTER TRUNCATE ON farmer
+FOR EACH STATEMENT EXECUTE FUNCTION farmer_version_bump()
+""",
+]
+
+STATEMENT_TRIGGER = """
+CREATE TRIGGER farmer_version_bump
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON farmer
+FOR EACH STATEMENT EXECUTE FUNCTION farmer_version_bump()
+"""
+
+
+def upgrade():
+    # Catalog only changes, the rows of farmer are not touched.
+    op.execute('DROP TRIGGER IF EXISTS farmer_version_bump ON farmer')
+    op.execute(PENDING_FUNCTION)
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade():
+    op.execute('DROP TRIGGER IF EXISTS farmer_version_truncate ON farmer')
+    op.execute('DROP TRIGGER IF EXISTS farmer_version_bump ON farmer')
+    op.execute('DROP FUNCTION IF EXISTS farmer_version_pending()')
+    op.execute(STATEMENT_TRIGGER)
@@ -0,0 +1,41 @@
+"""farming_options as JSONB and indexes for the farmers filters
+
+Revision ID: 7c41d9a2b8e3
+Revises: 2e2022d30f0e
+Create Date: 2026-10-18 11:02:17.530214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7c41d9a2b8e3'
+down_revision = '2e2022d30f0e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rewrites the table under an ACCESS EXCLUSIVE lock, run it in a quiet window.
+    op.alter_column('farmer', 'farming_options',
+                    existing_type=sa.JSON(),
+                    type_=postgresql.JSONB(astext_type=sa.Text()),
+                    existing_nullable=True,
+                    postgresql_using='farming_options::jsonb')
+    op.create_index('ix_farmer_farming_options', 'farmer', ['farming_options'],
+                    unique=False, postgresql_using='gin')
+    op.create_index('ix_farmer_state_city', 'farmer', ['state', 'city'], unique=False)
+    op.create_index('ix_farmer_total_area', 'farmer', ['total_area'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_farmer_total_area', table_name='farmer')
+    op.drop_index('ix_farmer_state_city', table_name='farmer')
+    op.drop_index('ix_farmer_farming_options', table_name='farmer')
+    op.alter_column('farmer', 'farming_options',
+                    existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                    type_=sa.JSON(),
+                    existing_nullable=True,
+                    postgresql_using='farming_options::json')
@@ -0,0 +1,39 @@
+"""farmer tombstones and the index of the changes feed
+
+Revision ID: a4d9e2c7b5f8
+Revises: f3c8a2d6b9e1
+Create Date: 2026-10-18 21:40:12.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d9e2c7b5f8'
+down_revision = 'f3c8a2d6b9e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'farmer_tombstone',
+        sa.Column('cpf_cnpj', sa.String(length=15), nullable=False),
+        sa.Column('delete_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('cpf_cnpj')
+    )
+    op.create_index('ix_farmer_tombstone_delete_at_cpf_cnpj', 'farmer_tombstone',
+                    ['delete_at', 'cpf_cnpj'], unique=False)
+    # Built concurrently so the registry keeps taking writes meanwhile.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_farmer_update_at_cpf_cnpj', 'farmer', ['update_at', 'cpf_cnpj'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_farmer_update_at_cpf_cnpj', table_name='farmer', postgresql_concurrently=True,
+                      if_exists=True)
+    op.drop_index('ix_farmer_tombstone_delete_at_cpf_cnpj', table_name='farmer_tombstone')
+    op.drop_table('farmer_tombstone')
@@ -0,0 +1,38 @@
+"""pg_trgm indexes for the farmers search
+
+Revision ID: b5e8f3c1d7a4
+Revises: 7c41d9a2b8e3
+Create Date: 2026-10-18 14:26:53.871402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e8f3c1d7a4'
+down_revision = '7c41d9a2b8e3'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    'ix_farmer_name_trgm': 'name',
+    'ix_farmer_farm_name_trgm': 'farm_name',
+}
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Built concurrently so the registry keeps taking writes meanwhile.
+    with op.get_context().autocommit_block():
+        for name, column in INDEXES.items():
+            op.create_index(name, 'farmer', [sa.text(f'{column} gin_trgm_ops')],
+                            unique=False, postgresql_using='gin',
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='farmer', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,176 @@
+"""farmer list partitioned by state with a registry of the documents
+
+Revision ID: c8f1e5a3d7b2
+Revises: a4d9e2c7b5f8
+Create Date: 2026-10-18 23:12:44.903117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8f1e5a3d7b2'
+down_revision = 'a4d9e2c7b5f8'
+branch_labels = None
+depends_on = None
+
+
+STATES = (
+    'AC', 'AL', 'AM', 'AP', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MG', 'MS', 'MT', 'PA',
+    'PB', 'PE', 'PI', 'PR', 'RJ', 'RN', 'RO', 'RR', 'RS', 'SC', 'SE', 'SP', 'TO',
+)
+
+OPTION_BITS = {'soy': 1, 'corn': 2, 'coffee': 4, 'cotton': 8, 'sugarcane': 16}
+
+TRGM_INDEXES = {
+    'ix_farmer_name_trgm': 'name',
+    'ix_farmer_farm_name_trgm': 'farm_name',
+}
+
+COLUMNS = ('cpf_cnpj, name, farm_name, city, state, total_area, agricultural_area, '
+           'vegetation_area, farming_options, insert_at, update_at')
+
+TRIGGERS = [
+    """
+CREATE TRIGGER farmer_summary_insert
+AFTER INSERT ON farmer
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION farmer_summary_insert()
+""",
+    """
+CREATE TRIGGER farmer_summary_update
+AFTER UPDATE ON farmer
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION farmer_summary_update()
+""",
+    """
+CREATE TRIGGER farmer_summary_delete
+AFTER DELETE ON farmer
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION farmer_summary_delete()
+""",
+    """
+CREATE TRIGGER farmer_version_bump
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON farmer
+FOR EACH STATEMENT EXECUTE FUNCTION farmer_version_bump()
+""",
+]
+
+DOCUMENT_FUNCTIONS = [
+    """
+CREATE OR REPLACE FUNCTION farmer_document_register() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO farmer_document (cpf_cnpj, state) VALUES (NEW.cpf_cnpj, NEW.state)
+    ON CONFLICT (cpf_cnpj) DO NOTHING;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+""",
+    """
+CREATE OR REPLACE FUNCTION farmer_document_release() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM farmer_document WHERE cpf_cnpj = OLD.cpf_cnpj;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql
+""",
+]
+
+DOCUMENT_TRIGGERS = [
+    """
+CREATE TRIGGER farmer_document_register
+BEFORE INSERT ON farmer
+FOR EACH ROW EXECUTE FUNCTION farmer_document_register()
+""",
+    """
+CREATE TRIGGER farmer_document_release
+BEFORE DELETE ON farmer
+FOR EACH ROW EXECUTE FUNCTION farmer_document_release()
+""",
+]
+
+
+def create_farmer_table(primary_key: list, **kwargs):
+    op.create_table(
+        'farmer',
+        sa.Column('cpf_cnpj', sa.String(length=15), nullable=False),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('farm_name', sa.String(length=200), nullable=False),
+        sa.Column('city', sa.String(length=200), nullable=False),
+        sa.Column('state', sa.String(length=2), nullable=False),
+        sa.Column('total_area', sa.Integer(), nullable=False),
+        sa.Column('agricultural_area', sa.Integer(), nullable=False),
+        sa.Column('vegetation_area', sa.Integer(), nullable=False),
+        sa.Column('farming_options', sa.SmallInteger(), server_default='0', nullable=False),
+        sa.Column('insert_at', sa.DateTime(), nullable=False),
+        sa.Column('update_at', sa.DateTime(), nullable=False),
+        sa.CheckConstraint('agricultural_area + vegetation_area <= total_area', name='farmer_area_check'),
+        sa.PrimaryKeyConstraint(*primary_key, name='farmer_pkey'),
+        **kwargs
+    )
+
+
+def create_indexes_and_triggers():
+    """Indexes and statement triggers of farmer, created after the rows are
+    copied so the copy neither maintains the indexes nor touches the summary."""
+    for name, bit in OPTION_BITS.items():
+        op.create_index(f'ix_farmer_option_{name}', 'farmer', ['cpf_cnpj'], unique=False,
+                        postgresql_where=sa.text(f'farming_options & {bit} <> 0'))
+    op.create_index('ix_farmer_state_city', 'farmer', ['state', 'city'], unique=False)
+    op.create_index('ix_farmer_total_area', 'farmer', ['total_area'], unique=False)
+    op.create_index('ix_farmer_update_at_cpf_cnpj', 'farmer', ['update_at', 'cpf_cnpj'], unique=False)
+    has_trgm = op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar()
+    if has_trgm:
+        for name, column in TRGM_INDEXES.items():
+            op.create_index(name, 'farmer', [sa.text(f'{column} gin_trgm_ops')],
+                            unique=False, postgresql_using='gin')
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+
+def replace_farmer_table(primary_key: list, **kwargs):
+    """Recreates farmer with ``kwargs`` and copies the rows over.
+
+    The old table is renamed, so its indexes and triggers go away with it
+    once the rows are copied.
+    """
+    op.execute('LOCK TABLE farmer IN ACCESS EXCLUSIVE MODE')
+    op.rename_table('farmer', 'farmer_replaced')
+    op.execute('ALTER TABLE farmer_replaced RENAME CONSTRAINT farmer_pkey TO farmer_replaced_pkey')
+    create_farmer_table(primary_key, **kwargs)
+    if kwargs:
+        for state in STATES:
+            op.execute(f"CREATE TABLE farmer_{state.lower()} PARTITION OF farmer FOR VALUES IN ('{state}')")
+        op.execute('CREATE TABLE farmer_default PARTITION OF farmer DEFAULT')
+    op.execute(f'INSERT INTO farmer ({COLUMNS}) SELECT {COLUMNS} FROM farmer_replaced')
+    op.drop_table('farmer_replaced')
+    create_indexes_and_triggers()
+
+
+def upgrade():
+    # Copies the whole table under an ACCESS EXCLUSIVE lock, run it in a quiet window.
+    replace_farmer_table(['cpf_cnpj', 'state'], postgresql_partition_by='LIST (state)')
+    op.create_table(
+        'farmer_document',
+        sa.Column('cpf_cnpj', sa.String(length=15), nullable=False),
+        sa.Column('state', sa.String(length=2), nullable=False),
+        sa.PrimaryKeyConstraint('cpf_cnpj')
+    )
+    op.execute('INSERT INTO farmer_document (cpf_cnpj, state) SELECT cpf_cnpj, state FROM farmer')
+    for statement in DOCUMENT_FUNCTIONS + DOCUMENT_TRIGGERS:
+        op.execute(statement)
+    op.execute('ANALYZE farmer')
+
+
+def downgrade():
+    # The partitions are dropped with the partitioned table.
+    replace_farmer_table(['cpf_cnpj'])
+    op.execute('DROP FUNCTION IF EXISTS farmer_document_register()')
+    op.execute('DROP FUNCTION IF EXISTS farmer_document_release()')
+    op.drop_table('farmer_document')
+    op.execute('ANALYZE farmer')
@@ -0,0 +1,50 @@
+"""check constraint on the farmer areas
+
+Revision ID: d2a6c9e4f1b7
+Revises: b5e8f3c1d7a4
+Create Date: 2026-10-18 16:40:09.114587
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a6c9e4f1b7'
+down_revision = 'b5e8f3c1d7a4'
+branch_labels = None
+depends_on = None
+
+
+AREA_CHECK = 'agricultural_area + vegetation_area <= total_area'
+
+
+def upgrade():
+    # Rows written before the API checked the areas would fail the VALIDATE
+    # after the constraint is committed. They are looked for first, so the
+    # upgrade stops before touching the table; fix them and run it again.
+    invalid = op.get_bind().execute(sa.text(
+        f'SELECT cpf_cnpj FROM farmer WHERE NOT ({AREA_CHECK}) ORDER BY cpf_cnpj LIMIT 10')).scalars().all()
+    if invalid:
+        raise RuntimeError(f'farmers with agricultural plus vegetation area above the total area, '
+                           f'fix them before upgrading: {", ".join(invalid)}')
+    # NOT VALID only holds the ACCESS EXCLUSIVE lock for the catalog change.
+    # The VALIDATE runs after that is committed, under a SHARE UPDATE EXCLUSIVE
+    # lock, so the existing rows are checked while the writes go on. A run that
+    # stopped between the two finds the constraint in place and validates it.
+    op.execute(f"""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'farmer_area_check'
+                           AND conrelid = 'farmer'::regclass) THEN
+                ALTER TABLE farmer ADD CONSTRAINT farmer_area_check CHECK ({AREA_CHECK}) NOT VALID;
+            END IF;
+        END
+        $$
+    """)
+    with op.get_context().autocommit_block():
+        op.execute('ALTER TABLE farmer VALIDATE CONSTRAINT farmer_area_check')
+
+
+def downgrade():
+    op.drop_constraint('farmer_area_check', 'farmer', type_='check')
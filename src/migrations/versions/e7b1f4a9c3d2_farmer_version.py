@@ -0,0 +1,56 @@
+"""farmer version row bumped by a trigger
+
+Revision ID: e7b1f4a9c3d2
+Revises: d2a6c9e4f1b7
+Create Date: 2026-10-18 17:25:51.630942
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b1f4a9c3d2'
+down_revision = 'd2a6c9e4f1b7'
+branch_labels = None
+depends_on = None
+
+
+FUNCTION = """
+CREATE OR REPLACE FUNCTION farmer_version_bump() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO farmer_version AS version (id, version, update_at)
+    VALUES (1, 1, timezone('utc', clock_timestamp()))
+    ON CONFLICT (id) DO UPDATE SET
+        version = version.version + 1,
+        update_at = greatest(version.update_at, EXCLUDED.update_at);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+TRIGGER = """
+CREATE TRIGGER farmer_version_bump
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON farmer
+FOR EACH STATEMENT EXECUTE FUNCTION farmer_version_bump()
+"""
+
+
+def upgrade():
+    op.create_table(
+        'farmer_version',
+        sa.Column('id', sa.SmallInteger(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('update_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO farmer_version (id, version, update_at) "
+               "SELECT 1, 1, coalesce(max(update_at), timezone('utc', now())) FROM farmer")
+    op.execute(FUNCTION)
+    op.execute(TRIGGER)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS farmer_version_bump ON farmer")
+    op.execute("DROP FUNCTION IF EXISTS farmer_version_bump()")
+    op.drop_table('farmer_version')
@@ -0,0 +1,114 @@
+"""farming_options as a smallint bitmask
+
+Revision ID: f3c8a2d6b9e1
+Revises: e7b1f4a9c3d2
+Create Date: 2026-10-18 18:03:27.418350
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8a2d6b9e1'
+down_revision = 'e7b1f4a9c3d2'
+branch_labels = None
+depends_on = None
+
+
+BITS = {"SOY": 1, "CORN": 2, "COFFEE": 4, "COTTON": 8, "SUGARCANE": 16}
+
+COLUMNS = "state, total_area, agricultural_area, vegetation_area, farming_options"
+
+DELTAS = {
+    "insert": f"SELECT {COLUMNS}, 1 AS sign FROM new_rows",
+    "update": f"SELECT {COLUMNS}, 1 AS sign FROM new_rows "
+              f"UNION ALL SELECT {COLUMNS}, -1 AS sign FROM old_rows",
+    "delete": f"SELECT {COLUMNS}, -1 AS sign FROM old_rows",
+}
+
+FUNCTION = """
+CREATE OR REPLACE FUNCTION farmer_summary_{operation}() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO farmer_state_summary AS summary
+        (state, farm_count, total_area, agricultural_area, vegetation_area)
+    SELECT state, sum(sign), sum(sign * total_area), sum(sign * agricultural_area),
+           sum(sign * vegetation_area)
+    FROM ({delta}) AS delta
+    GROUP BY state
+    HAVING sum(sign) <> 0 OR sum(sign * total_area) <> 0
+        OR sum(sign * agricultural_area) <> 0 OR sum(sign * vegetation_area) <> 0
+    ON CONFLICT (state) DO UPDATE SET
+        farm_count = summary.farm_count + EXCLUDED.farm_count,
+        total_area = summary.total_area + EXCLUDED.total_area,
+        agricultural_area = summary.agricultural_area + EXCLUDED.agricultural_area,
+        vegetation_area = summary.vegetation_area + EXCLUDED.vegetation_area;
+
+    {options}
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+MASK_OPTIONS = """INSERT INTO farmer_option_summary AS summary (farming_option, farm_count)
+    SELECT option.value, sum(delta.sign)
+    FROM ({delta}) AS delta
+    JOIN (VALUES {values}) AS option (value, bit) ON delta.farming_options & option.bit <> 0
+    GROUP BY option.value
+    HAVING sum(delta.sign) <> 0
+    ON CONFLICT (farming_option) DO UPDATE SET
+        farm_count = summary.farm_count + EXCLUDED.farm_count;"""
+
+JSON_OPTIONS = """INSERT INTO farmer_option_summary AS summary (farming_option, farm_count)
+    SELECT option.value, sum(delta.sign)
+    FROM ({delta}) AS delta,
+         LATERAL (SELECT DISTINCT value
+                  FROM json_array_elements_text(COALESCE(delta.farming_options::json, '[]'))
+                 ) AS option
+    GROUP BY option.value
+    HAVING sum(delta.sign) <> 0
+    ON CONFLICT (farming_option) DO UPDATE SET
+        farm_count = summary.farm_count + EXCLUDED.farm_count;"""
+
+
+def replace_summary_functions(options):
+    values = ", ".join(f"('{name}', {bit})" for name, bit in BITS.items())
+    for operation, delta in DELTAS.items():
+        op.execute(FUNCTION.format(operation=operation, delta=delta,
+                                   options=options.format(delta=delta, values=values)))
+
+
+def upgrade():
+    # Rewrites the table under an ACCESS EXCLUSIVE lock, run it in a quiet window.
+    op.drop_index('ix_farmer_farming_options', table_name='farmer', postgresql_using='gin')
+    # NULL options fall in the ELSE branches and become 0.
+    to_mask = " | ".join(f"(CASE WHEN farming_options ? '{name}' THEN {bit} ELSE 0 END)"
+                         for name, bit in BITS.items())
+    op.alter_column('farmer', 'farming_options',
+                    existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                    type_=sa.SmallInteger(),
+                    nullable=False,
+                    server_default='0',
+                    postgresql_using=to_mask)
+    replace_summary_functions(MASK_OPTIONS)
+    for name, bit in BITS.items():
+        op.create_index(f'ix_farmer_option_{name.lower()}', 'farmer', ['cpf_cnpj'], unique=False,
+                        postgresql_where=sa.text(f'farming_options & {bit} <> 0'))
+
+
+def downgrade():
+    for name in BITS:
+        op.drop_index(f'ix_farmer_option_{name.lower()}', table_name='farmer')
+    to_json = ", ".join(f"CASE WHEN farming_options & {bit} <> 0 THEN '{name}' END"
+                        for name, bit in BITS.items())
+    op.alter_column('farmer', 'farming_options', existing_type=sa.SmallInteger(), server_default=None)
+    op.alter_column('farmer', 'farming_options',
+                    existing_type=sa.SmallInteger(),
+                    type_=postgresql.JSONB(astext_type=sa.Text()),
+                    nullable=True,
+                    postgresql_using=f"to_jsonb(array_remove(ARRAY[{to_json}], NULL))")
+    replace_summary_functions(JSON_OPTIONS)
+    op.create_index('ix_farmer_farming_options', 'farmer', ['farming_options'],
+                    unique=False, postgresql_using='gin')
@@ -1,10 +1,14 @@
 import pytest
+from contextlib import contextmanager
 from datetime import datetime
 from copy import deepcopy
 
+from sqlalchemy import event
+
 from api.app import create_app, db
 from api.infrastructure.database.models import Farmer as FarmerTable
 from api.domain.repositories.farmer_repository import FarmerRepository
+from api.infrastructure.cache import farmers_page_cache
 
 
 @pytest.fixture(scope="package")
@@ -20,6 +24,33 @@ def app():
 def run_around_tests():
     yield
     db.session.rollback()
+    farmers_page_cache.store.clear()
+
+
+@pytest.fixture
+def assert_max_queries(app):
+    """Context manager failing the test when its block runs more than
+    ``count`` SQL statements, e.g. ``with assert_max_queries(2): app.patch(...)``.
+
+    Yields the list of statements run so far.
+    """
+    @contextmanager
+    def assert_max_queries(count: int):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        assert len(statements) <= count, (
+            f"{len(statements)} statements run, expected at most {count}:\n" + "\n".join(statements))
+
+    return assert_max_queries
+
 
 def pytest_addoption(parser):
     parser.addoption("--skip-startfinish", default=False, action="store_true")
@@ -0,0 +1,63 @@
+import csv
+import json
+
+from api.app import db
+from api.infrastructure.database.models import Farmer as FarmerTable
+from api.domain.repositories.farmer_repository import SQLAlchemyFarmerRepository
+
+
+HEADER = ["cpf_cnpj", "name", "farm_name", "city", "state", "total_area",
+          "agricultural_area", "vegetation_area", "farming_options"]
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="") as output:
+        writer = csv.writer(output)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+
+
+def test_import_farmers_success(create_farmer_cpf_dict, tmp_path, app):
+    create_farmer_cpf_dict["cpf_cnpj"] = "46763789556"
+    SQLAlchemyFarmerRepository.create(data=create_farmer_cpf_dict)
+    file = tmp_path / "farmers.csv"
+    _write_csv(file, [
+        ["46763789556", "Imported name", "Fazenda", "Recife", "PE", 100, 10, 10, "SOY|CORN"],
+        ["98877409000195", "Fazendeiro", "Fazenda", "Recife", "PE", 100, 10, 10, "COFFEE"],
+        ["98877409000195", "Fazendeiro 2", "Fazenda", "Recife", "PE", 100, 10, 10, "COFFEE"],
+        ["00100200499", "Fazendeiro", "Fazenda", "Recife", "PE", 100, 10, 10, "SOY"],
+        ["73111607585", "Fazendeiro", "Fazenda", "Recife", "PEE", 100, 10, 10, "SOY"],
+    ])
+
+    result = app.application.test_cli_runner().invoke(args=["farmers", "import", str(file)])
+
+    assert result.exit_code == 0, result.output
+    assert "'inserted': 1, 'updated': 1, 'unchanged': 0, 'rejected': 2" in result.output
+    db.session.expire_all()
+    assert FarmerTable.query.filter_by(cpf_cnpj="46763789556").one().farming_options == ["SOY", "CORN"]
+    assert FarmerTable.query.filter_by(cpf_cnpj="98877409000195").one().name == "Fazendeiro 2"
+    with open(f"{file}.rejected.csv") as rejected:
+        rejected_rows = list(csv.DictReader(rejected))
+    assert [row["cpf_cnpj"] for row in rejected_rows] == ["00100200499", "73111607585"]
+    assert rejected_rows[0]["error"] == "{'cpf_cnpj': ['Wrong value for CPF or CNPJ']}"
+
+
+def test_report_farmers(tmp_path, app):
+    file = tmp_path / "report.json"
+
+    result = app.application.test_cli_runner().invoke(args=["farmers", "report", "--output", str(file)])
+
+    assert result.exit_code == 0, result.output
+    with open(file) as output:
+        report = json.load(output)
+    assert report["farmers"] == FarmerTable.query.count()
+    assert sum(state["farmers"] for state in report["states"]) == report["farmers"]
+
+
+def test_report_farmers_csv(app):
+    result = app.application.test_cli_runner().invoke(args=["farmers", "report", "--format", "csv"])
+
+    assert result.exit_code == 0, result.output
+    rows = list(csv.reader(result.stdout.splitlines()))
+    assert rows[0] == ["section", "group", "metric", "value"]
+    assert rows[1] == ["registry", "", "farmers", str(FarmerTable.query.count())]
@@ -3,7 +3,9 @@ import pytest
 from datetime import datetime
 
 from api.domain.repositories.farmer_repository import SQLAlchemyFarmerRepository
-from api.domain.entities.farmer import Farmer, FarmerAreaInvalid, FarmerAlreadyRegistered, FarmerNotFound
+from api.domain.entities.farmer import (
+    Farmer, FarmerAreaInvalid, FarmerAlreadyRegistered, FarmerChange, FarmerNotFound, InvalidCursor
+)
 
 
 @mock.patch.object(SQLAlchemyFarmerRepository, "get_all")
@@ -14,8 +16,8 @@ def test_get_all_success(get_all_mock, create_farmer_cpf_dict, return_farmer_cpf
 
     assert farmer.name == create_farmer_cpf_dict["name"]
     create_farmer_mock.assert_called_once_with(create_farmer_cpf_dict)
-    
-    
+
+
 @mock.patch.object(SQLAlchemyFarmerRepository, "create")
 def test_create_farmer_cpf_success(create_farmer_mock, create_farmer_cpf_dict, return_farmer_cpf_model, app):
     create_farmer_mock.return_value = return_farmer_cpf_model
@@ -38,9 +40,9 @@ def test_create_farmer_cnpj_success(create_farmer_mock, create_farmer_cnpj_dict,
 
 @mock.patch.object(SQLAlchemyFarmerRepository, "delete")
 def test_delete_farmer_cpf_success(delete_farmer_mock, app):
-    farmer = Farmer.delete(cpf_cnpj="00100200304", repository=SQLAlchemyFarmerRepository)
+    Farmer.delete(cpf_cnpj="00100200304", repository=SQLAlchemyFarmerRepository)
     delete_farmer_mock.assert_called_once_with("00100200304")
-    
+
 
 @mock.patch.object(SQLAlchemyFarmerRepository, "get_by_cpf_cnpj")
 @mock.patch.object(SQLAlchemyFarmerRepository, "update")
@@ -50,27 +52,89 @@ def test_update_farmer_success(update_farmer_mock,
                                return_farmer_cpf_model,
                                app):
     update_farmer_mock.return_value = return_farmer_cpf_model
-    get_by_cpf_cnpj_mock.return_value = return_farmer_cpf_model
-    
+
     farmer = Farmer.update(cpf_cnpj="42063478082", data=update_farmer_cpf_dict, repository=SQLAlchemyFarmerRepository)
-    
-    update_farmer_mock.assert_called_once_with(farmer=return_farmer_cpf_model, data=update_farmer_cpf_dict)
-    get_by_cpf_cnpj_mock.assert_called_once_with("42063478082")
+
+    assert farmer == return_farmer_cpf_model
+    update_farmer_mock.assert_called_once_with(cpf_cnpj="42063478082", data=update_farmer_cpf_dict)
+    get_by_cpf_cnpj_mock.assert_not_called()
 
 
-@mock.patch.object(SQLAlchemyFarmerRepository, "get_by_cpf_cnpj")
 @mock.patch.object(SQLAlchemyFarmerRepository, "update")
-def test_update_farmer_error(update_farmer_mock,
-                             get_by_cpf_cnpj_mock,
-                             update_farmer_cpf_dict,
-                             return_farmer_cpf_model,
-                             app):
-    get_by_cpf_cnpj_mock.return_value = return_farmer_cpf_model
+def test_update_farmer_error(update_farmer_mock, update_farmer_cpf_dict, app):
     update_farmer_cpf_dict["agricultural_area"] = 100
-    
+
     with pytest.raises(FarmerAreaInvalid) as e:
         Farmer.update(cpf_cnpj="42063478082", data=update_farmer_cpf_dict, repository=SQLAlchemyFarmerRepository)
-    
+
     update_farmer_mock.assert_not_called()
-    get_by_cpf_cnpj_mock.assert_called_once_with("42063478082")
     assert str(e.value) == "Agricultural area 100 plus vegetation area 50 cannot be greater than total area 100"
+
+
+@mock.patch.object(SQLAlchemyFarmerRepository, "update")
+def test_update_farmer_partial_areas_left_to_repository(update_farmer_mock, return_farmer_cpf_model, app):
+    update_farmer_mock.return_value = return_farmer_cpf_model
+
+    Farmer.update(cpf_cnpj="42063478082", data={"agricultural_area": 10}, repository=SQLAlchemyFarmerRepository)
+
+    update_farmer_mock.assert_called_once_with(cpf_cnpj="42063478082", data={"agricultural_area": 10})
+
+
+@mock.patch.object(SQLAlchemyFarmerRepository, "get_page")
+def test_get_page_with_next_cursor(get_page_mock, return_farmer_cpf_model, return_farmer_cpf_model_2, app):
+    get_page_mock.return_value = [return_farmer_cpf_model_2, return_farmer_cpf_model]
+
+    farmers, next_cursor = Farmer.get_page(limit=1, cursor=Farmer.encode_cursor("00100200304"),
+                                           repository=SQLAlchemyFarmerRepository)
+
+    assert farmers == [return_farmer_cpf_model_2]
+    assert Farmer.decode_cursor(next_cursor) == return_farmer_cpf_model_2.cpf_cnpj
+    get_page_mock.assert_called_once_with(limit=2, after="00100200304", filters=None)
+
+
+@mock.patch.object(SQLAlchemyFarmerRepository, "get_page")
+def test_get_page_last_page(get_page_mock, return_farmer_cpf_model, app):
+    get_page_mock.return_value = [return_farmer_cpf_model]
+
+    farmers, next_cursor = Farmer.get_page(limit=1, cursor="", repository=SQLAlchemyFarmerRepository)
+
+    assert farmers == [return_farmer_cpf_model]
+    assert next_cursor is None
+    get_page_mock.assert_called_once_with(limit=2, after=None, filters=None)
+
+
+@mock.patch.object(SQLAlchemyFarmerRepository, "get_page")
+def test_get_page_invalid_cursor(get_page_mock, app):
+    with pytest.raises(InvalidCursor) as e:
+        Farmer.get_page(limit=1, cursor="invalid", repository=SQLAlchemyFarmerRepository)
+
+    get_page_mock.assert_not_called()
+    assert str(e.value) == "Invalid cursor."
+
+
+@mock.patch.object(SQLAlchemyFarmerRepository, "get_changes_until")
+@mock.patch.object(SQLAlchemyFarmerRepository, "get_changes")
+def test_get_changes_with_more(get_changes_mock, get_changes_until_mock, return_farmer_cpf_model, app):
+    changed_at = datetime(2024, 10, 21, 12, 0, 0)
+    get_changes_until_mock.return_value = 1000
+    get_changes_mock.return_value = [FarmerChange("00100200304", changed_at, return_farmer_cpf_model, 998),
+                                     FarmerChange("00100200305", changed_at, None, 999)]
+
+    changes, next_since, has_more = Farmer.get_changes(since=None, limit=1,
+                                                       repository=SQLAlchemyFarmerRepository)
+
+    assert [change.cpf_cnpj for change in changes] == ["00100200304"]
+    assert has_more
+    assert Farmer.decode_since(next_since) == (998, "00100200304")
+    assert get_changes_mock.call_args.kwargs["after"] is None
+    assert get_changes_mock.call_args.kwargs["limit"] == 2
+    assert get_changes_mock.call_args.kwargs["until"] == 1000
+
+
+@mock.patch.object(SQLAlchemyFarmerRepository, "get_changes")
+def test_get_changes_invalid_since(get_changes_mock, app):
+    with pytest.raises(InvalidCursor) as e:
+        Farmer.get_changes(since="invalid", limit=1, repository=SQLAlchemyFarmerRepository)
+
+    get_changes_mock.assert_not_called()
+    assert str(e.value) == "Invalid since token."
@@ -1,8 +1,16 @@
+import threading
+
 import mock
 import pytest
-from api.infrastructure.database.models import Farmer as FarmerTable
-from api.domain.repositories.farmer_repository import SQLAlchemyFarmerRepository
-from api.domain.entities.farmer import FarmerAlreadyRegistered, FarmerNotFound
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, text, update
+from sqlalchemy.exc import IntegrityError
+from api.infrastructure.database.models import Farmer as FarmerTable, FarmerDocument
+from api.domain.repositories.farmer_repository import SQLAlchemyFarmerRepository, CachedFarmerRepository
+from api.app import db
+from api.domain.entities.farmer import Farmer, FarmerAlreadyRegistered, FarmerAreaInvalid, FarmerNotFound
+from api.domain.repositories.memory_farmer_repository import InMemoryFarmerRepository
 
 
 def test_farmer_create_success(create_farmer_cpf_dict, app):
@@ -41,6 +49,24 @@ def test_farmer_delete_error_not_found(create_farmer_cpf_dict, app):
     assert str(e.value) == "Farmer not found."
 
 
+def test_farmer_document_unique_across_states(create_farmer_cpf_dict, app):
+    SQLAlchemyFarmerRepository.create(data=dict(create_farmer_cpf_dict, cpf_cnpj="00100200340", state="PB"))
+
+    with pytest.raises(FarmerAlreadyRegistered):
+        SQLAlchemyFarmerRepository.create(data=dict(create_farmer_cpf_dict, cpf_cnpj="00100200340", state="SP"))
+    created = SQLAlchemyFarmerRepository.bulk_create(
+        data=[dict(create_farmer_cpf_dict, cpf_cnpj="00100200340", state="MT")])
+    moved = SQLAlchemyFarmerRepository.update(cpf_cnpj="00100200340", data={"state": "SP"})
+
+    assert created == []
+    assert moved.state == "SP"
+    assert SQLAlchemyFarmerRepository.get_by_cpf_cnpj("00100200340").state == "SP"
+    assert db.session.execute(text("SELECT tableoid::regclass::text, count(*) OVER () FROM farmer "
+                                   "WHERE cpf_cnpj = '00100200340'")).one() == ("farmer_sp", 1)
+    assert db.session.execute(select(FarmerDocument.state).where(
+        FarmerDocument.cpf_cnpj == "00100200340")).scalar_one() == "SP"
+
+
 def test_farmer_get_by_cpf_cnpj_success(create_farmer_cpf_dict, app):
     create_farmer_cpf_dict["cpf_cnpj"] = "00100200306"
     SQLAlchemyFarmerRepository.create(data=create_farmer_cpf_dict)
@@ -63,6 +89,336 @@ def test_farmer_update_success(create_farmer_cpf_dict, app):
     create_farmer_cpf_dict["cpf_cnpj"] = "00100200308"
     update_data = {"name": "Farm name updated 123"}
     farmer = SQLAlchemyFarmerRepository.create(data=create_farmer_cpf_dict)
-    farmer_updated = SQLAlchemyFarmerRepository.update(farmer=farmer, data=update_data)
+    farmer_updated = SQLAlchemyFarmerRepository.update(cpf_cnpj=farmer.cpf_cnpj, data=update_data)
     
     assert farmer_updated.name == "Farm name updated 123"
+
+
+def test_farmer_bulk_delete_success(create_farmer_cpf_dict, app):
+    SQLAlchemyFarmerRepository.bulk_create(data=[dict(create_farmer_cpf_dict, cpf_cnpj="00100200333"),
+                                                 dict(create_farmer_cpf_dict, cpf_cnpj="00100200334")])
+
+    deleted = SQLAlchemyFarmerRepository.bulk_delete(cpf_cnpjs=["00100200333", "00100200334", "00100200335"])
+
+    assert sorted(deleted) == ["00100200333", "00100200334"]
+    assert FarmerTable.query.filter(FarmerTable.cpf_cnpj.in_(deleted)).count() == 0
+
+
+def test_farmer_version_follows_writes(create_farmer_cpf_dict, app):
+    version, _ = SQLAlchemyFarmerRepository.get_version()
+    SQLAlchemyFarmerRepository.create(data=dict(create_farmer_cpf_dict, cpf_cnpj="00100200336"))
+    created_version, created_at = SQLAlchemyFarmerRepository.get_version()
+    SQLAlchemyFarmerRepository.delete(cpf_cnpj="00100200336")
+    deleted_version, deleted_at = SQLAlchemyFarmerRepository.get_version()
+
+    assert created_version == version + 1
+    assert deleted_version == version + 2
+    assert deleted_at >= created_at
+
+
+def test_farmer_update_while_moved_to_another_state(create_farmer_cpf_dict, app):
+    SQLAlchemyFarmerRepository.create(data=dict(create_farmer_cpf_dict, cpf_cnpj="00100200379"))
+    with db.engine.connect() as mover:
+        mover.execute(update(FarmerTable).where(FarmerTable.cpf_cnpj == "00100200379").values(state="SE"))
+        commit = threading.Timer(0.3, mover.commit)
+        commit.start()
+
+        farmer = SQLAlchemyFarmerRepository.update(cpf_cnpj="00100200379", data={"name": "Moved"})
+        commit.join()
+
+    assert (farmer.state, farmer.name) == ("SE", "Moved")
+
+
+def test_farmer_version_bumped_once_per_transaction(create_farmer_cpf_dict, app):
+    version, _ = SQLAlchemyFarmerRepository.get_version()
+    rows = [dict(create_farmer_cpf_dict, cpf_cnpj=cpf_cnpj, insert_at=datetime.utcnow(),
+                 update_at=datetime.utcnow()) for cpf_cnpj in ("00100200344", "00100200345")]
+    with db.engine.begin() as connection:
+        for row in rows:
+            connection.execute(FarmerTable.__table__.insert().values(**row))
+        connection.execute(FarmerTable.__table__.delete().where(FarmerTable.cpf_cnpj == "00100200344"))
+
+    assert SQLAlchemyFarmerRepository.get_version()[0] == version + 1
+
+
+def test_farmer_writers_do_not_wait_on_the_version_row(create_farmer_cpf_dict, app):
+    # Another state and no farming options, so the pending write shares no summary row.
+    row = dict(create_farmer_cpf_dict, cpf_cnpj="00100200352", state="SE", farming_options=[],
+               insert_at=datetime.utcnow(), update_at=datetime.utcnow())
+    with db.engine.connect() as pending:
+        pending.execute(FarmerTable.__table__.insert().values(**row))
+
+        db.session.execute(text("SET LOCAL lock_timeout = '1s'"))
+        SQLAlchemyFarmerRepository.create(data=dict(create_farmer_cpf_dict, cpf_cnpj="00100200360"))
+        pending.rollback()
+
+    assert FarmerTable.query.filter_by(cpf_cnpj="00100200360").count() == 1
+
+
+def test_farmer_changes_with_tombstones(create_farmer_cpf_dict, app):
+    start = SQLAlchemyFarmerRepository.get_changes_until()
+    SQLAlchemyFarmerRepository.create(data=dict(create_farmer_cpf_dict, cpf_cnpj="00100200338"))
+    SQLAlchemyFarmerRepository.create(data=dict(create_farmer_cpf_dict, cpf_cnpj="00100200339"))
+    SQLAlchemyFarmerRepository.delete(cpf_cnpj="00100200338")
+
+    changes = [change for change in SQLAlchemyFarmerRepository.get_changes(limit=1000, after=(start, ""))
+               if change.cpf_cnpj in ("00100200338", "00100200339")]
+
+    assert [(change.cpf_cnpj, change.deleted) for change in changes] == [
+        ("00100200339", False), ("00100200338", True)]
+    assert changes[0].farmer.cpf_cnpj == "00100200339"
+    last = changes[-1]
+    assert SQLAlchemyFarmerRepository.get_changes(
+        limit=1000, after=(last.change_xid, last.cpf_cnpj), until=last.change_xid) == []
+
+
+def test_farmer_changes_wait_for_running_writes(create_farmer_cpf_dict, app):
+    start = SQLAlchemyFarmerRepository.get_changes_until()
+    documents = ("00100200363", "00100200364")
+    with db.engine.connect() as pending:
+        # Another state and no farming options, so the pending write shares no summary row.
+        pending.execute(FarmerTable.__table__.insert().values(
+            **dict(create_farmer_cpf_dict, cpf_cnpj="00100200363", state="SE", farming_options=[])))
+        SQLAlchemyFarmerRepository.create(data=dict(create_farmer_cpf_dict, cpf_cnpj="00100200364"))
+        held = SQLAlchemyFarmerRepository.get_changes(
+            limit=1000, after=(start, ""), until=SQLAlchemyFarmerRepository.get_changes_until())
+        pending.commit()
+
+    changes = SQLAlchemyFarmerRepository.get_changes(
+        limit=1000, after=(start, ""), until=SQLAlchemyFarmerRepository.get_changes_until())
+
+    assert [change.cpf_cnpj for change in held if change.cpf_cnpj in documents] == []
+    assert [change.cpf_cnpj for change in changes if change.cpf_cnpj in documents] == list(documents)
+
+
+def test_farmer_changes_not_held_by_reads(create_farmer_cpf_dict, app):
+    start = SQLAlchemyFarmerRepository.get_changes_until()
+    with db.engine.connect() as reader:
+        reader.execute(select(FarmerTable.cpf_cnpj).limit(1)).all()
+        SQLAlchemyFarmerRepository.create(data=dict(create_farmer_cpf_dict, cpf_cnpj="00100200367"))
+
+        changes = SQLAlchemyFarmerRepository.get_changes(
+            limit=1000, after=(start, ""), until=SQLAlchemyFarmerRepository.get_changes_until())
+
+    assert "00100200367" in [change.cpf_cnpj for change in changes]
+
+
+def test_farmer_reads_build_entities_without_orm(create_farmer_cpf_dict, app):
+    SQLAlchemyFarmerRepository.create(data=dict(create_farmer_cpf_dict, cpf_cnpj="00100200337"))
+    db.session.expunge_all()
+
+    farmer = SQLAlchemyFarmerRepository.get_by_cpf_cnpj("00100200337")
+    farmers = SQLAlchemyFarmerRepository.get_all(limit=None, offset=None, filters={"state": farmer.state})
+
+    assert isinstance(farmer, Farmer)
+    assert not hasattr(farmer, "__dict__")
+    assert farmer in farmers
+    assert farmer.farming_options == ["SUGARCANE"]
+    assert len(db.session.identity_map) == 0
+
+
+def test_farmer_update_area_check_violation(create_farmer_cpf_dict, app):
+    create_farmer_cpf_dict["cpf_cnpj"] = "00100200331"
+    SQLAlchemyFarmerRepository.create(data=create_farmer_cpf_dict)
+
+    with pytest.raises(FarmerAreaInvalid) as e:
+        SQLAlchemyFarmerRepository.update(cpf_cnpj="00100200331", data={"agricultural_area": 60})
+
+    assert str(e.value) == "Agricultural area 60 plus vegetation area 50 cannot be greater than total area 100"
+    assert SQLAlchemyFarmerRepository.get_by_cpf_cnpj("00100200331").agricultural_area == 40
+
+
+def test_farmer_update_not_found(app):
+    with pytest.raises(FarmerNotFound) as e:
+        SQLAlchemyFarmerRepository.update(cpf_cnpj="00100200332", data={"name": "Nobody"})
+
+    assert str(e.value) == "Farmer not found."
+
+
+def test_farmer_bulk_create_success(create_farmer_cpf_dict, create_farmer_cpf_dict_2, app):
+    create_farmer_cpf_dict["cpf_cnpj"] = "00100200309"
+    create_farmer_cpf_dict_2["cpf_cnpj"] = "00100200310"
+    created = SQLAlchemyFarmerRepository.bulk_create(data=[create_farmer_cpf_dict, create_farmer_cpf_dict_2])
+
+    assert sorted(created) == ["00100200309", "00100200310"]
+    assert FarmerTable.query.filter(FarmerTable.cpf_cnpj.in_(created)).count() == 2
+
+
+def test_farmer_bulk_create_skip_duplicated(create_farmer_cpf_dict, create_farmer_cpf_dict_2, app):
+    create_farmer_cpf_dict["cpf_cnpj"] = "00100200311"
+    create_farmer_cpf_dict_2["cpf_cnpj"] = "00100200312"
+    SQLAlchemyFarmerRepository.create(data=dict(create_farmer_cpf_dict))
+
+    created = SQLAlchemyFarmerRepository.bulk_create(
+        data=[create_farmer_cpf_dict, create_farmer_cpf_dict_2, create_farmer_cpf_dict_2])
+
+    assert created == ["00100200312"]
+    assert FarmerTable.query.filter_by(cpf_cnpj="00100200312").count() == 1
+
+
+def test_farmer_bulk_create_failed_batch_saves_nothing(create_farmer_cpf_dict, app):
+    invalid_areas = dict(create_farmer_cpf_dict, cpf_cnpj="00100200366", agricultural_area=100)
+
+    with mock.patch.dict(current_app.config, {"BULK_INSERT_BATCH_SIZE": 1}):
+        with pytest.raises(IntegrityError):
+            SQLAlchemyFarmerRepository.bulk_create(
+                data=[dict(create_farmer_cpf_dict, cpf_cnpj="00100200365"), invalid_areas])
+
+    assert FarmerTable.query.filter(FarmerTable.cpf_cnpj.in_(["00100200365", "00100200366"])).count() == 0
+
+
+def test_farmer_get_page_success(create_farmer_cpf_dict, app):
+    for cpf_cnpj in ["00100200315", "00100200313", "00100200314"]:
+        SQLAlchemyFarmerRepository.create(data=dict(create_farmer_cpf_dict, cpf_cnpj=cpf_cnpj))
+
+    farmers = SQLAlchemyFarmerRepository.get_page(limit=2, after="00100200312")
+
+    assert [farmer.cpf_cnpj for farmer in farmers] == ["00100200313", "00100200314"]
+
+
+def test_farmer_get_all_filters(create_farmer_cpf_dict, app):
+    farmers = [
+        dict(create_farmer_cpf_dict, cpf_cnpj="00100200320", state="MT", city="Sorriso",
+             total_area=500, farming_options=["SOY", "CORN"]),
+        dict(create_farmer_cpf_dict, cpf_cnpj="00100200321", state="MT", city="Sorriso",
+             total_area=5000, farming_options=["SOY"]),
+        dict(create_farmer_cpf_dict, cpf_cnpj="00100200322", state="MT", city="Sinop",
+             total_area=800, farming_options=["CORN"]),
+    ]
+    for farmer in farmers:
+        SQLAlchemyFarmerRepository.create(data=farmer)
+
+    def get_all(**filters):
+        return sorted(farmer.cpf_cnpj for farmer in
+                      SQLAlchemyFarmerRepository.get_all(limit=10, offset=0, filters=filters))
+
+    assert get_all(state="MT", city="Sorriso") == ["00100200320", "00100200321"]
+    assert get_all(state="MT", farming_option="CORN") == ["00100200320", "00100200322"]
+    assert get_all(state="MT", min_total_area=600, max_total_area=5000) == ["00100200321", "00100200322"]
+    assert get_all(state="MT", city="Sorriso", farming_option="CORN", max_total_area=500) == ["00100200320"]
+
+
+def test_cached_farmer_get_by_cpf_cnpj_read_through(create_farmer_cpf_dict, app):
+    create_farmer_cpf_dict["cpf_cnpj"] = "00100200302"
+    CachedFarmerRepository.create(data=create_farmer_cpf_dict)
+    farmer = CachedFarmerRepository.get_by_cpf_cnpj(cpf_cnpj="00100200302")
+
+    with mock.patch.object(SQLAlchemyFarmerRepository, "get_by_cpf_cnpj") as get_by_cpf_cnpj_mock:
+        cached_farmer = CachedFarmerRepository.get_by_cpf_cnpj(cpf_cnpj="00100200302")
+
+    get_by_cpf_cnpj_mock.assert_not_called()
+    assert cached_farmer == farmer
+    assert cached_farmer is not farmer
+    assert not isinstance(cached_farmer, FarmerTable)
+
+
+def test_cached_farmer_update_invalidates(create_farmer_cpf_dict, app):
+    create_farmer_cpf_dict["cpf_cnpj"] = "00100200303"
+    CachedFarmerRepository.create(data=create_farmer_cpf_dict)
+    farmer = CachedFarmerRepository.get_by_cpf_cnpj(cpf_cnpj="00100200303")
+
+    farmer_updated = CachedFarmerRepository.update(cpf_cnpj=farmer.cpf_cnpj, data={"name": "Farm name updated 123"})
+
+    assert farmer_updated.name == "Farm name updated 123"
+    assert CachedFarmerRepository.get_by_cpf_cnpj(cpf_cnpj="00100200303").name == "Farm name updated 123"
+    assert FarmerTable.query.filter_by(cpf_cnpj="00100200303").one().name == "Farm name updated 123"
+
+
+def _state_summary(state):
+    summary = SQLAlchemyFarmerRepository.get_summary()
+    states = {item.state: item for item in summary["states"]}
+    options = {item.farming_option: item.farm_count for item in summary["farming_options"]}
+    return states.get(state), options
+
+
+def test_farmer_summary_follows_writes(create_farmer_cpf_dict, app):
+    _, options_before = _state_summary("RR")
+    create_farmer_cpf_dict.update(cpf_cnpj="00100200316", state="RR", farming_options=["SOY", "CORN"])
+    farmer = SQLAlchemyFarmerRepository.create(data=create_farmer_cpf_dict)
+    SQLAlchemyFarmerRepository.bulk_create(data=[dict(create_farmer_cpf_dict, cpf_cnpj="00100200317")])
+
+    state, options = _state_summary("RR")
+    assert (state.farm_count, state.total_area, state.agricultural_area, state.vegetation_area) == (2, 200, 80, 100)
+    assert options["SOY"] == options_before.get("SOY", 0) + 2
+
+    SQLAlchemyFarmerRepository.update(cpf_cnpj=farmer.cpf_cnpj, data={"state": "AP", "farming_options": ["CORN"]})
+    SQLAlchemyFarmerRepository.delete(cpf_cnpj="00100200317")
+
+    state, options = _state_summary("RR")
+    assert state is None
+    assert _state_summary("AP")[0].farm_count == 1
+    assert options.get("SOY", 0) == options_before.get("SOY", 0)
+    assert options["CORN"] == options_before.get("CORN", 0) + 1
+
+
+def test_farmer_iter_all_success(create_farmer_cpf_dict, app):
+    create_farmer_cpf_dict["cpf_cnpj"] = "00100200318"
+    SQLAlchemyFarmerRepository.create(data=create_farmer_cpf_dict)
+
+    farmers = list(SQLAlchemyFarmerRepository.iter_all(batch_size=2))
+
+    assert "00100200318" in [farmer.cpf_cnpj for farmer in farmers]
+    assert len(farmers) == FarmerTable.query.count()
+    assert not isinstance(farmers[0], FarmerTable)
+
+
+def test_async_repository_roundtrip(create_farmer_cpf_dict, app):
+    import asyncio
+    from api.config import TestingConfig
+    from api.domain.entities.farmer import Farmer, FarmerNotFound
+    from api.domain.repositories.async_farmer_repository import AsyncSQLAlchemyFarmerRepository
+    from api.infrastructure.database.async_engine import async_db
+
+    create_farmer_cpf_dict["cpf_cnpj"] = "00100200399"
+
+    async def roundtrip():
+        async_db.init(TestingConfig)
+        try:
+            created = await AsyncSQLAlchemyFarmerRepository.create(create_farmer_cpf_dict)
+            fetched = await AsyncSQLAlchemyFarmerRepository.get_by_cpf_cnpj(created.cpf_cnpj)
+            page = await AsyncSQLAlchemyFarmerRepository.get_page(limit=1, after="00100200398")
+            updated = await AsyncSQLAlchemyFarmerRepository.update(created.cpf_cnpj, {"name": "Async name"})
+            with pytest.raises(FarmerAreaInvalid):
+                await AsyncSQLAlchemyFarmerRepository.update(created.cpf_cnpj, {"vegetation_area": 70})
+            await AsyncSQLAlchemyFarmerRepository.delete(created.cpf_cnpj)
+            with pytest.raises(FarmerNotFound):
+                await AsyncSQLAlchemyFarmerRepository.get_by_cpf_cnpj(created.cpf_cnpj)
+        finally:
+            await async_db.dispose()
+        return created, fetched, page, updated
+
+    created, fetched, page, updated = asyncio.run(roundtrip())
+
+    assert isinstance(created, Farmer)
+    assert fetched == created
+    assert [farmer.cpf_cnpj for farmer in page] == [created.cpf_cnpj]
+    assert updated.name == "Async name"
+
+
+def test_in_memory_farmer_search(create_farmer_cpf_dict):
+    InMemoryFarmerRepository.reset(threshold=0.5)
+    InMemoryFarmerRepository.create(dict(create_farmer_cpf_dict, cpf_cnpj="1", name="Joao da Silva"))
+    InMemoryFarmerRepository.create(dict(create_farmer_cpf_dict, cpf_cnpj="2", name="Maria Souza",
+                                         farm_name="Sitio Esperanca"))
+
+    assert [farmer.cpf_cnpj for farmer in InMemoryFarmerRepository.search("Joao Silvq", limit=10)] == ["1"]
+    assert [farmer.cpf_cnpj for farmer in InMemoryFarmerRepository.search("esperansa", limit=10)] == ["2"]
+
+    InMemoryFarmerRepository.delete("2")
+    assert InMemoryFarmerRepository.search("esperansa", limit=10) == []
+
+
+def test_farmer_search_pg_trgm(create_farmer_cpf_dict, app):
+    from sqlalchemy import text
+    from api.app import db
+    available = db.session.execute(
+        text("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar()
+    if not available:
+        pytest.skip("pg_trgm extension is not available")
+    db.session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    SQLAlchemyFarmerRepository.create(data=dict(create_farmer_cpf_dict, cpf_cnpj="00100200330",
+                                                name="Joaquim Trigueiro"))
+
+    farmers = SQLAlchemyFarmerRepository.search(query="Joakim Trigeiro", limit=10)
+
+    assert [farmer.cpf_cnpj for farmer in farmers] == ["00100200330"]
@@ -0,0 +1,32 @@
+import pytest
+from validate_docbr import CPF, CNPJ
+
+from api.domain.documents import validate_document, validate_documents
+
+
+@pytest.mark.parametrize("document,expected", [
+    ("42063478082", True),
+    ("42063478083", False),
+    ("98877409000195", True),
+    ("98.877.409/0001-95", True),
+    ("98877409000196", False),
+    ("11111111111", False),
+    ("00000000000000", False),
+    ("420.634.780-82", False),
+    ("4206347808a", False),
+    ("", False),
+])
+def test_validate_document(document, expected):
+    assert validate_document(document) is expected
+
+
+def test_validate_documents_same_result_of_validate_docbr():
+    cpf, cnpj = CPF(), CNPJ()
+    documents = cpf.generate_list(200) + cnpj.generate_list(200) + cnpj.generate_list(20, mask=True)
+    documents += [document[:-1] + str((int(document[-1]) + 1) % 10) for document in documents[:100]]
+    documents += ["00100200304", "1234", None, "1234567890123456"]
+
+    expected = [bool(document) and (CPF() if len(document) == 11 else CNPJ()).validate(document)
+                for document in documents]
+
+    assert validate_documents(documents).tolist() == expected
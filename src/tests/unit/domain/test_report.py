@@ -0,0 +1,65 @@
+from api.domain.report import build_report, collect_columns, report_rows
+
+
+OPTIONS = {"SOY": 1, "CORN": 2, "COFFEE": 4}
+
+ROWS = [
+    ("PB", 100, 60, 30, 1),
+    ("PB", 200, 150, 20, 3),
+    ("PB", 300, 100, 90, 0),
+    ("SP", 1000, 500, 100, 2),
+    ("SP", 0, 0, 0, 4),
+]
+
+
+def test_collect_columns_joins_the_chunks():
+    columns = collect_columns([ROWS[:2], [], ROWS[2:]])
+
+    assert columns["state"].tolist() == ["PB", "PB", "PB", "SP", "SP"]
+    assert columns["total_area"].tolist() == [100, 200, 300, 1000, 0]
+    assert columns["farming_options"].tolist() == [1, 3, 0, 2, 4]
+
+
+def test_build_report():
+    report = build_report(collect_columns([ROWS]), OPTIONS, bins=2, reserve=0.2)
+
+    assert report["farmers"] == 5
+    assert report["areas"]["total_area"]["sum"] == 1600
+    assert report["areas"]["total_area"]["percentiles"]["p50"] == 200
+    assert report["total_area_histogram"] == dict(edges=[0.0, 500.0, 1000.0], counts=[4, 1])
+    assert report["preservation"]["mean"] == 0.2
+    assert report["preservation"]["below_reserve"] == 2
+    assert report["preservation"]["histogram"]["counts"] == [4, 0]
+    assert report["states"] == [
+        dict(state="PB", farmers=3, total_area=600, agricultural_area=310, vegetation_area=140,
+             median_total_area=200.0, preservation_ratio=0.2333, below_reserve=1),
+        dict(state="SP", farmers=2, total_area=1000, agricultural_area=500, vegetation_area=100,
+             median_total_area=500.0, preservation_ratio=0.1, below_reserve=1),
+    ]
+    assert report["crops"] == [
+        dict(farming_option="SOY", farmers=2, total_area=300, agricultural_area=210,
+             vegetation_area=50, preservation_ratio=0.1667),
+        dict(farming_option="CORN", farmers=2, total_area=1200, agricultural_area=650,
+             vegetation_area=120, preservation_ratio=0.1),
+        dict(farming_option="COFFEE", farmers=1, total_area=0, agricultural_area=0,
+             vegetation_area=0, preservation_ratio=None),
+    ]
+
+
+def test_build_report_of_empty_registry():
+    report = build_report(collect_columns([]), OPTIONS)
+
+    assert report["farmers"] == 0
+    assert report["areas"]["total_area"]["mean"] is None
+    assert report["states"] == []
+    assert [crop["farmers"] for crop in report["crops"]] == [0, 0, 0]
+    assert ("registry", "", "farmers", 0) in list(report_rows(report))
+
+
+def test_report_rows():
+    rows = list(report_rows(build_report(collect_columns([ROWS]), OPTIONS, bins=2)))
+
+    assert rows[0] == ("registry", "", "farmers", 5)
+    assert ("total_area_histogram", "0.0-500.0", "farmers", 4) in rows
+    assert ("state", "SP", "median_total_area", 500.0) in rows
+    assert ("crop", "CORN", "farmers", 2) in rows
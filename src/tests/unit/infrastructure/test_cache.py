@@ -0,0 +1,115 @@
+import mock
+import pickle
+
+from datetime import datetime
+
+from api.infrastructure.cache import CachedPage, LocalStore, LRUCache, PageCache
+
+
+def test_cache_hit_and_miss():
+    cache = LRUCache(maxsize=2, ttl=60)
+
+    assert cache.get("a") is None
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+@mock.patch("api.infrastructure.cache.time.monotonic")
+def test_cache_expires_entries(monotonic_mock):
+    monotonic_mock.return_value = 100
+    cache = LRUCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+
+    monotonic_mock.return_value = 111
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_cache_shared_store():
+    store = mock.Mock()
+    store.get.return_value = pickle.dumps({"name": "Aragorn"})
+    cache = LRUCache(maxsize=2, ttl=10, store=store, prefix="farmer:")
+
+    assert cache.get("a") == {"name": "Aragorn"}
+    store.get.assert_called_once_with("farmer:a")
+
+    cache.delete("a")
+    store.delete.assert_called_once_with("farmer:a")
+
+
+def test_cache_write_in_one_worker_drops_the_local_entries_of_the_others():
+    store = LocalStore()
+    worker_a = LRUCache(maxsize=2, ttl=60, store=store, prefix="farmer:")
+    worker_b = LRUCache(maxsize=2, ttl=60, store=store, prefix="farmer:")
+    worker_a.set("a", {"name": "Aragorn"})
+    assert worker_b.get("a") == {"name": "Aragorn"}
+
+    worker_a.delete("a")
+
+    assert worker_b.get("a") is None
+    worker_a.set("a", {"name": "Elessar"})
+    assert worker_b.get("a") == {"name": "Elessar"}
+
+
+def test_cache_write_keeps_the_local_entries_of_other_shards():
+    store = mock.Mock(wraps=LocalStore())
+    worker_a = LRUCache(maxsize=4, ttl=60, store=store, prefix="farmer:", shards=2)
+    worker_b = LRUCache(maxsize=4, ttl=60, store=store, prefix="farmer:", shards=2)
+    # in shards 0 and 1
+    worker_a.set("00100200304", 1)
+    worker_a.set("98877409000195", 2)
+    assert worker_b.get("00100200304") == 1
+    assert worker_b.get("98877409000195") == 2
+
+    worker_a.delete("00100200304")
+    store.get.reset_mock()
+
+    assert worker_b.get("98877409000195") == 2
+    store.get.assert_not_called()
+    assert worker_b.get("00100200304") is None
+
+
+def test_local_store_evicts_under_byte_budget():
+    store = LocalStore(max_bytes=10)
+    store.set("a", b"aaaa", 60)
+    store.set("b", b"bbbb", 60)
+    store.get("a")
+    store.set("c", b"cccc", 60)
+    store.set("big", b"x" * 11, 60)
+
+    assert store.get("b") is None
+    assert store.get("a") == b"aaaa"
+    assert store.get("big") is None
+    assert store.stats()["bytes"] == 8
+    assert store.stats()["evictions"] == 1
+
+
+def test_page_cache_generation_invalidates_pages():
+    cache = PageCache(prefix="farmers:", ttl=60)
+    page = CachedPage('"farmers.1"', datetime(2024, 10, 21), b"[]")
+
+    generation, cached = cache.get("/farmers?")
+    assert cached is None
+    cache.set("/farmers?", generation, page)
+
+    assert cache.get("/farmers?") == (generation, page)
+    assert cache.bump() == generation + 1
+    assert cache.get("/farmers?") == (generation + 1, None)
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,70 @@
+import json
+import logging
+
+import mock
+
+from api.infrastructure.logs import LogPipeline
+
+
+def make_logger(pipeline: LogPipeline) -> logging.Logger:
+    logger = logging.getLogger(f"agro.test.{id(pipeline)}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    pipeline.attach(logger)
+    return logger
+
+
+@mock.patch.object(LogPipeline, "ensure_started")
+def test_records_are_queued_without_formatting(ensure_started_mock):
+    pipeline = LogPipeline()
+    logger = make_logger(pipeline)
+    data = {"cpf_cnpj": "00100200304"}
+
+    logger.info("Creating farmer %s.", "x", extra={"props": {"service_method": "create", "data": data}})
+
+    record = pipeline.queue.get_nowait()
+    assert record.args == ("x",)
+    assert record.props == {"service_method": "create", "data": data}
+    ensure_started_mock.assert_called_once()
+
+
+@mock.patch.object(LogPipeline, "ensure_started")
+def test_success_logs_are_sampled(ensure_started_mock):
+    pipeline = LogPipeline()
+    pipeline.configure(sample_rate=0, queue_size=100)
+    logger = make_logger(pipeline)
+
+    logger.info("Getting farmers")
+    logger.warning("Slow database connection checkout.")
+
+    assert pipeline.queue.qsize() == 1
+    assert pipeline.queue.get_nowait().levelno == logging.WARNING
+
+
+@mock.patch.object(LogPipeline, "ensure_started")
+def test_full_queue_drops_records(ensure_started_mock):
+    pipeline = LogPipeline()
+    pipeline.configure(sample_rate=1, queue_size=1)
+    logger = make_logger(pipeline)
+
+    logger.info("first")
+    logger.info("second")
+
+    assert pipeline.queue.qsize() == 1
+    assert pipeline.dropped == 1
+
+
+def test_listener_writes_json_lines(capsys):
+    pipeline = LogPipeline()
+    logger = make_logger(pipeline)
+
+    try:
+        logger.info("Creating farmer.", extra={"props": {"service": "PostgreSQL", "service_method": "create"}})
+        logger.exception("Error while trying to create farmer", exc_info=ValueError("boom"))
+    finally:
+        pipeline.stop()
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert lines[0]["msg"] == "Creating farmer."
+    assert lines[0]["service_method"] == "create"
+    assert "ValueError: boom" in lines[1]["exc_info"]
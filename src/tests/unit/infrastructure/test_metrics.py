@@ -0,0 +1,50 @@
+from prometheus_client import REGISTRY
+
+from api.domain.repositories.farmer_repository import CachedFarmerRepository, SQLAlchemyFarmerRepository
+from api.infrastructure.metrics import statement_operation
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_statement_operation():
+    assert statement_operation("SELECT farmer.cpf_cnpj FROM farmer") == "SELECT"
+    assert statement_operation("\n  insert into farmer VALUES (1)") == "INSERT"
+    assert statement_operation("SET LOCAL x = 1") == "OTHER"
+
+
+def test_repository_and_statement_metrics(create_farmer_cpf_dict, app):
+    repository_before = sample("agro_repository_duration_seconds_count",
+                               repository="SQLAlchemyFarmerRepository", method="get_all")
+    select_before = sample("agro_db_statement_duration_seconds_count", operation="SELECT")
+
+    SQLAlchemyFarmerRepository.get_all(limit=1, offset=0)
+
+    assert sample("agro_repository_duration_seconds_count",
+                  repository="SQLAlchemyFarmerRepository", method="get_all") == repository_before + 1
+    assert sample("agro_db_statement_duration_seconds_count", operation="SELECT") == select_before + 1
+
+
+def test_repository_metrics_observe_each_layer_once(create_farmer_cpf_dict, app):
+    cpf_cnpj = SQLAlchemyFarmerRepository.get_all(limit=1, offset=0)[0].cpf_cnpj
+    CachedFarmerRepository.cache.delete(cpf_cnpj)
+    before = {repository: sample("agro_repository_duration_seconds_count",
+                                 repository=repository, method="get_by_cpf_cnpj")
+              for repository in ("CachedFarmerRepository", "SQLAlchemyFarmerRepository")}
+
+    CachedFarmerRepository.get_by_cpf_cnpj(cpf_cnpj)
+
+    for repository, count in before.items():
+        assert sample("agro_repository_duration_seconds_count",
+                      repository=repository, method="get_by_cpf_cnpj") == count + 1
+
+
+def test_metrics_endpoint(app):
+    app.get("/health")
+    response = app.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    assert 'agro_http_request_duration_seconds_count{method="GET",route="/health",status="200"}' \
+        in response.get_data(as_text=True)
@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from api.app import db
+from api.infrastructure.database.pool import MeteredQueuePool, pool_metrics
+
+
+@pytest.fixture()
+def small_engine(app):
+    engine = create_engine(db.engine.url, poolclass=MeteredQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    pool_metrics.instrument(engine.pool)
+    pool_metrics.reset()
+    yield engine
+    engine.dispose()
+
+
+def test_pool_stats_track_checked_out_connections(small_engine):
+    with small_engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        stats = pool_metrics.stats(small_engine.pool)
+
+        assert stats["checked_out"] == 1
+        assert stats["idle"] == 0
+
+    stats = pool_metrics.stats(small_engine.pool)
+    assert stats["checked_out"] == 0
+    assert stats["idle"] == 1
+    assert stats["connects"] == 1
+    assert stats["checkouts"] == 1
+    assert stats["checkins"] == 1
+
+
+def test_pool_stats_record_checkout_timeout(small_engine):
+    with small_engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            small_engine.connect()
+
+    stats = pool_metrics.stats(small_engine.pool)
+    assert stats["timeouts"] == 1
+    assert stats["wait_max_ms"] >= 50
+
+
+def test_pool_health_endpoint(app):
+    response = app.get("/health/pool")
+
+    assert response.status_code == 200
+    assert response.json["database"]["size"] == 5
+    assert {"checked_out", "idle", "wait_avg_ms", "timeouts"} <= set(response.json["database"])
@@ -0,0 +1,21 @@
+from sqlalchemy import select
+
+from api.app import db
+from api.domain.repositories.farmer_repository import SQLAlchemyFarmerRepository
+from api.infrastructure.database.models import Farmer as FarmerTable
+from api.infrastructure.database.prepared import execute_prepared
+
+
+def test_execute_prepared_prepares_once_per_connection(create_farmer_cpf_dict, assert_max_queries, app):
+    SQLAlchemyFarmerRepository.create(data=dict(create_farmer_cpf_dict, cpf_cnpj="00100200417"))
+
+    with assert_max_queries(4) as statements:
+        rows = [
+            execute_prepared(db.session, select(FarmerTable.farming_options, FarmerTable.total_area).where(
+                FarmerTable.cpf_cnpj == cpf_cnpj, FarmerTable.total_area > 50)).all()
+            for cpf_cnpj in ("00100200417", "00100200418", "00100200417")
+        ]
+
+    assert [statement.split()[0] for statement in statements] == ["PREPARE", "EXECUTE", "EXECUTE", "EXECUTE"]
+    assert rows[0] == rows[2] == [(create_farmer_cpf_dict["farming_options"], 100)]
+    assert rows[1] == []
@@ -0,0 +1,27 @@
+from api.infrastructure.search import TrigramIndex, trigrams
+
+
+def test_trigrams_like_pg_trgm():
+    assert trigrams("Soja") == {"  s", " so", "soj", "oja", "ja "}
+    assert trigrams("a-b") == {"  a", " a ", "  b", " b "}
+
+
+def test_search_tolerates_typos_and_ranks_best_first():
+    index = TrigramIndex(threshold=0.5)
+    index.add("1", "Joao da Silva", "Fazenda Boa Vista")
+    index.add("2", "Maria Souza", "Sitio Silveira")
+    index.add("3", "Pedro Santos", "Fazenda Esperanca")
+
+    assert [key for key, _ in index.search("Silvaa", limit=10)] == ["1", "2"]
+    assert [key for key, _ in index.search("Silvaa", limit=1)] == ["1"]
+    assert [key for key, _ in index.search("fazenda esperansa", limit=10)] == ["3"]
+    assert index.search("Zacarias", limit=10) == []
+
+
+def test_remove_drops_the_document():
+    index = TrigramIndex()
+    index.add("1", "Joao da Silva", "Fazenda Boa Vista")
+    index.remove("1")
+
+    assert index.search("Silva", limit=10) == []
+    assert len(index) == 0
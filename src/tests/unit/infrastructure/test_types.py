@@ -0,0 +1,18 @@
+import pytest
+
+from api.infrastructure.database.models import FARMING_OPTIONS_MASK
+
+
+def test_enum_mask_roundtrip():
+    assert FARMING_OPTIONS_MASK.bits == {"SOY": 1, "CORN": 2, "COFFEE": 4, "COTTON": 8, "SUGARCANE": 16}
+    assert FARMING_OPTIONS_MASK.process_bind_param(["SUGARCANE", "SOY", "SOY"], None) == 17
+    assert FARMING_OPTIONS_MASK.process_bind_param(None, None) is None
+    assert FARMING_OPTIONS_MASK.process_result_value(17, None) == ["SOY", "SUGARCANE"]
+    assert FARMING_OPTIONS_MASK.process_result_value(0, None) == []
+
+
+def test_enum_mask_invalid_name():
+    with pytest.raises(ValueError) as e:
+        FARMING_OPTIONS_MASK.mask(["RICE"])
+
+    assert str(e.value) == "Invalid FarmingOptions 'RICE'."
@@ -0,0 +1,73 @@
+import mock
+import pytest
+from starlette.testclient import TestClient
+
+from api.asgi import create_asgi_app
+from api.domain.entities.farmer import Farmer, FarmerNotFound, FarmerAlreadyRegistered
+from api.domain.repositories.async_farmer_repository import AsyncSQLAlchemyFarmerRepository
+
+
+@pytest.fixture(scope="module")
+def asgi_client():
+    return TestClient(create_asgi_app("Testing"))
+
+
+def test_health(asgi_client):
+    response = asgi_client.get("/health")
+
+    assert response.json() == {"service": "Agro API", "version": "0.0.1"}
+    assert response.status_code == 200
+
+
+@mock.patch.object(Farmer, "create", new_callable=mock.AsyncMock)
+def test_create_success(create_mock, create_farmer_cpf_dict, return_farmer_cpf_model, asgi_client):
+
+    create_mock.return_value = return_farmer_cpf_model
+    response = asgi_client.post("/api/v1/farmers", json=create_farmer_cpf_dict)
+
+    assert response.json()["cpf_cnpj"] == return_farmer_cpf_model.cpf_cnpj
+    assert response.status_code == 201
+    create_mock.assert_awaited_once_with(data=create_farmer_cpf_dict,
+                                         repository=AsyncSQLAlchemyFarmerRepository)
+
+
+@mock.patch.object(Farmer, "create", new_callable=mock.AsyncMock)
+def test_create_error_duplicated_farmer(create_mock, create_farmer_cpf_dict, asgi_client):
+
+    create_mock.side_effect = FarmerAlreadyRegistered("Farmer already registered")
+    response = asgi_client.post("/api/v1/farmers", json=create_farmer_cpf_dict)
+
+    assert response.json() == {"message": "Farmer already registered"}
+    assert response.status_code == 400
+
+
+@mock.patch.object(Farmer, "delete", new_callable=mock.AsyncMock)
+def test_delete_farmer_not_found(delete_mock, asgi_client):
+
+    delete_mock.side_effect = FarmerNotFound("Farmer not found")
+    response = asgi_client.delete("/api/v1/farmers?cpf_cnpj=00100200304")
+
+    assert response.json() == {"message": "Farmer not found"}
+    assert response.status_code == 404
+
+
+@mock.patch.object(Farmer, "update_async", new_callable=mock.AsyncMock)
+def test_update_farmer_url_param_missing(update_mock, asgi_client):
+
+    response = asgi_client.patch("/api/v1/farmers", json={})
+
+    assert response.json() == {'errors': {'cpf_cnpj': 'Missing required parameter in the query string'},
+                               'message': 'Input payload validation failed'}
+    assert response.status_code == 400
+    update_mock.assert_not_called()
+
+
+@mock.patch.object(AsyncSQLAlchemyFarmerRepository, "get_page", new_callable=mock.AsyncMock)
+def test_get_page_success(get_page_mock, return_farmer_cpf_model, return_farmer_cpf_model_2, asgi_client):
+
+    get_page_mock.return_value = [return_farmer_cpf_model, return_farmer_cpf_model_2]
+    response = asgi_client.get("/api/v1/farmers?cursor=&limit=1")
+
+    assert [farmer["cpf_cnpj"] for farmer in response.json()["items"]] == ["42063478082"]
+    assert response.json()["next_cursor"] == Farmer.encode_cursor("42063478082")
+    get_page_mock.assert_awaited_once_with(limit=2, after=None, filters={})
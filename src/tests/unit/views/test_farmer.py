@@ -1,15 +1,19 @@
+import json
+from datetime import datetime
+
 import mock
 import pytest
 from flask import request
 
 
-from api.domain.entities.farmer import Farmer, FarmerNotFound, FarmerAlreadyRegistered
-from api.domain.repositories.farmer_repository import SQLAlchemyFarmerRepository
+from api.domain.entities.farmer import Farmer, FarmerChange, FarmerNotFound, FarmerAlreadyRegistered
+from api.domain.repositories.farmer_repository import CachedFarmerRepository
+from api.views.exporters import EXPORT_FIELDS
 
 
 @mock.patch.object(Farmer, "create")
 def test_create_success(create_mock, create_farmer_cpf_dict, return_farmer_cpf_model, app):
-    
+
     create_mock.return_value = return_farmer_cpf_model
     response = app.post(
         "/api/v1/farmers",
@@ -18,12 +22,12 @@ def test_create_success(create_mock, create_farmer_cpf_dict, return_farmer_cpf_m
 
     assert response.json["cpf_cnpj"] == return_farmer_cpf_model.cpf_cnpj
     assert response.status_code == 201
-    create_mock.assert_called_once_with(data=create_farmer_cpf_dict, repository=SQLAlchemyFarmerRepository)
+    create_mock.assert_called_once_with(data=create_farmer_cpf_dict, repository=CachedFarmerRepository)
 
 
 @mock.patch.object(Farmer, "create")
 def test_create_error_invalid_data(create_mock, create_farmer_cpf_dict, app):
-    
+
     create_farmer_cpf_dict["state"] = "PBB"
     response = app.post(
         "/api/v1/farmers",
@@ -37,7 +41,7 @@ def test_create_error_invalid_data(create_mock, create_farmer_cpf_dict, app):
 
 @mock.patch.object(Farmer, "create")
 def test_create_error_duplicated_farmer(create_mock, create_farmer_cpf_dict, app):
-    
+
     create_mock.side_effect = FarmerAlreadyRegistered("Farmer already registered")
     response = app.post(
         "/api/v1/farmers",
@@ -57,7 +61,7 @@ def test_delete_success(delete_mock, app):
 
     assert response.json == {"message": "OK"}
     assert response.status_code == 200
-    delete_mock.assert_called_once_with(cpf_cnpj="00100200304", repository=SQLAlchemyFarmerRepository)
+    delete_mock.assert_called_once_with(cpf_cnpj="00100200304", repository=CachedFarmerRepository)
 
 
 @mock.patch.object(Farmer, "delete")
@@ -70,7 +74,7 @@ def test_delete_farmer_not_found(delete_mock, app):
 
     assert response.json == {"message": "Farmer not found"}
     assert response.status_code == 404
-    delete_mock.assert_called_once_with(cpf_cnpj="00100200304", repository=SQLAlchemyFarmerRepository)
+    delete_mock.assert_called_once_with(cpf_cnpj="00100200304", repository=CachedFarmerRepository)
 
 
 @mock.patch.object(Farmer, "delete")
@@ -89,7 +93,7 @@ def test_delete_farmer_url_param_missing(delete_mock, app):
 
 @mock.patch.object(Farmer, "update")
 def test_update_success(update_mock, update_farmer_cpf_dict, return_farmer_cpf_model, app):
-    
+
     update_mock.return_value = return_farmer_cpf_model
     response = app.patch(
         "/api/v1/farmers?cpf_cnpj=00100200304",
@@ -99,12 +103,12 @@ def test_update_success(update_mock, update_farmer_cpf_dict, return_farmer_cpf_m
     assert response.json["cpf_cnpj"] == return_farmer_cpf_model.cpf_cnpj
     assert response.status_code == 200
     update_mock.assert_called_once_with(cpf_cnpj="00100200304", data=update_farmer_cpf_dict,
-                                        repository=SQLAlchemyFarmerRepository)
+                                        repository=CachedFarmerRepository)
 
 
 @mock.patch.object(Farmer, "update")
 def test_update_farmer_not_found(update_mock, update_farmer_cpf_dict, return_farmer_cpf_model, app):
-    
+
     update_mock.side_effect = FarmerNotFound("Farmer not found")
     response = app.patch(
         "/api/v1/farmers?cpf_cnpj=00100200304",
@@ -114,7 +118,7 @@ def test_update_farmer_not_found(update_mock, update_farmer_cpf_dict, return_far
     assert response.json == {"message": "Farmer not found"}
     assert response.status_code == 404
     update_mock.assert_called_once_with(cpf_cnpj="00100200304", data=update_farmer_cpf_dict,
-                                        repository=SQLAlchemyFarmerRepository)
+                                        repository=CachedFarmerRepository)
 
 
 @mock.patch.object(Farmer, "update")
@@ -127,4 +131,323 @@ def test_update_farmer_url_param_missing(update_mock, app):
     assert response.json == {'errors': {'cpf_cnpj': 'Missing required parameter in the query string'},
                              'message': 'Input payload validation failed'}
     assert response.status_code == 400
-    update_mock.assert_not_called()
\ No newline at end of file
+    update_mock.assert_not_called()
+
+
+@mock.patch.object(Farmer, "bulk_create")
+def test_bulk_create_success(bulk_create_mock, create_farmer_cpf_dict, create_farmer_cnpj_dict, app):
+
+    bulk_create_mock.return_value = [create_farmer_cpf_dict["cpf_cnpj"]]
+    invalid_farmer = dict(create_farmer_cnpj_dict, state="PBB")
+    response = app.post(
+        "/api/v1/farmers/bulk",
+        json=[create_farmer_cpf_dict, create_farmer_cnpj_dict, invalid_farmer, create_farmer_cpf_dict]
+    )
+
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json] == ["created", "duplicated", "invalid", "duplicated"]
+    assert response.json[1]["message"] == "Farmer already registered"
+    assert response.json[2]["message"] == "{'state': ['Length must be between 2 and 2.']}"
+    bulk_create_mock.assert_called_once_with(
+        data=[create_farmer_cpf_dict, create_farmer_cnpj_dict, create_farmer_cpf_dict],
+        repository=CachedFarmerRepository)
+
+
+@mock.patch.object(Farmer, "bulk_create")
+def test_bulk_create_masked_cnpj(bulk_create_mock, create_farmer_cnpj_dict, app):
+
+    bulk_create_mock.return_value = ["98877409000195"]
+    response = app.post(
+        "/api/v1/farmers/bulk",
+        json=[dict(create_farmer_cnpj_dict, cpf_cnpj="98.877.409/0001-95")]
+    )
+
+    assert response.status_code == 200
+    assert response.json[0]["cpf_cnpj"] == "98877409000195"
+    assert response.json[0]["status"] == "created"
+    bulk_create_mock.assert_called_once_with(data=[create_farmer_cnpj_dict], repository=CachedFarmerRepository)
+
+
+@mock.patch.object(Farmer, "bulk_create")
+def test_bulk_create_error_hides_database_error(bulk_create_mock, create_farmer_cpf_dict, app):
+
+    bulk_create_mock.side_effect = Exception("(psycopg2.errors.StringDataRightTruncation) INSERT INTO farmer")
+    response = app.post(
+        "/api/v1/farmers/bulk",
+        json=[create_farmer_cpf_dict]
+    )
+
+    assert response.json == {"message": "Farmers could not be saved, none was created"}
+    assert response.status_code == 400
+
+
+@mock.patch.object(Farmer, "bulk_create")
+def test_bulk_create_error_invalid_payload(bulk_create_mock, create_farmer_cpf_dict, app):
+
+    response = app.post(
+        "/api/v1/farmers/bulk",
+        json=create_farmer_cpf_dict
+    )
+
+    assert response.json == {"message": "Request body must be a list of farmers"}
+    assert response.status_code == 400
+    bulk_create_mock.assert_not_called()
+
+
+@mock.patch.object(Farmer, "bulk_delete")
+def test_bulk_delete_success(bulk_delete_mock, app):
+
+    bulk_delete_mock.return_value = ["00100200304"]
+    response = app.delete(
+        "/api/v1/farmers/bulk",
+        json=["00100200304", "98877409000195", "00100200304"]
+    )
+
+    assert response.status_code == 200
+    assert response.json == {"deleted": ["00100200304"], "not_found": ["98877409000195"]}
+    bulk_delete_mock.assert_called_once_with(
+        cpf_cnpjs=["00100200304", "98877409000195"],
+        repository=CachedFarmerRepository)
+
+
+@mock.patch.object(Farmer, "bulk_delete")
+def test_bulk_delete_error_invalid_payload(bulk_delete_mock, app):
+
+    response = app.delete(
+        "/api/v1/farmers/bulk",
+        json={"cpf_cnpj": "00100200304"}
+    )
+
+    assert response.json == {"message": "Request body must be a list of cpf_cnpj"}
+    assert response.status_code == 400
+    bulk_delete_mock.assert_not_called()
+
+
+@mock.patch.object(Farmer, "get_page")
+def test_get_page_success(get_page_mock, return_farmer_cpf_model, app):
+
+    get_page_mock.return_value = ([return_farmer_cpf_model], "next")
+    response = app.get(
+        "/api/v1/farmers?cursor=&limit=1000",
+    )
+
+    assert response.status_code == 200
+    assert response.json["next_cursor"] == "next"
+    assert response.json["items"][0]["cpf_cnpj"] == return_farmer_cpf_model.cpf_cnpj
+    get_page_mock.assert_called_once_with(limit=100, cursor="", repository=CachedFarmerRepository,
+                                          filters={})
+
+
+@mock.patch.object(Farmer, "get_all")
+def test_get_all_with_filters(get_all_mock, return_farmer_cpf_model, app):
+
+    get_all_mock.return_value = [return_farmer_cpf_model]
+    response = app.get(
+        "/api/v1/farmers?state=PB&city=Joao%20Pessoa&farming_option=SUGARCANE&min_total_area=10&max_total_area=200",
+    )
+
+    assert response.status_code == 200
+    assert response.json[0]["cpf_cnpj"] == return_farmer_cpf_model.cpf_cnpj
+    get_all_mock.assert_called_once_with(
+        limit=None, offset=None, repository=CachedFarmerRepository,
+        filters={"state": "PB", "city": "Joao Pessoa", "farming_option": "SUGARCANE",
+                 "min_total_area": 10, "max_total_area": 200})
+
+
+@mock.patch.object(Farmer, "get_all")
+def test_get_all_invalid_farming_option(get_all_mock, app):
+
+    response = app.get("/api/v1/farmers?farming_option=RICE")
+
+    assert response.status_code == 400
+    assert "farming_option" in response.json["errors"]
+    get_all_mock.assert_not_called()
+
+
+@mock.patch.object(Farmer, "search")
+def test_search_success(search_mock, return_farmer_cpf_model, app):
+
+    search_mock.return_value = [return_farmer_cpf_model]
+    response = app.get("/api/v1/farmers/search?q=Fazendero&limit=500")
+
+    assert response.status_code == 200
+    assert response.json[0]["cpf_cnpj"] == return_farmer_cpf_model.cpf_cnpj
+    search_mock.assert_called_once_with(query="Fazendero", limit=50, repository=CachedFarmerRepository)
+
+
+@mock.patch.object(Farmer, "search")
+def test_search_query_too_short(search_mock, app):
+
+    response = app.get("/api/v1/farmers/search?q=ab")
+
+    assert response.json == {"message": "Search query must have at least 3 characters."}
+    assert response.status_code == 400
+    search_mock.assert_not_called()
+
+
+@mock.patch.object(Farmer, "get_summary")
+def test_get_summary_success(get_summary_mock, app):
+
+    get_summary_mock.return_value = {
+        "farm_count": 2,
+        "total_area": 200,
+        "agricultural_area": 80,
+        "vegetation_area": 100,
+        "states": [{"state": "PB", "farm_count": 2, "total_area": 200,
+                    "agricultural_area": 80, "vegetation_area": 100}],
+        "farming_options": [{"farming_option": "SOY", "farm_count": 2}]
+    }
+    response = app.get(
+        "/api/v1/farmers/summary",
+    )
+
+    assert response.status_code == 200
+    assert response.json == get_summary_mock.return_value
+    get_summary_mock.assert_called_once_with(repository=CachedFarmerRepository)
+
+
+@mock.patch.object(Farmer, "export")
+def test_export_ndjson_success(export_mock, return_farmer_cpf_model, return_farmer_cpf_model_2, app):
+
+    export_mock.return_value = iter([return_farmer_cpf_model, return_farmer_cpf_model_2])
+    response = app.get(
+        "/api/v1/farmers/export",
+    )
+
+    lines = response.get_data(as_text=True).splitlines()
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert [json.loads(line)["cpf_cnpj"] for line in lines] == ["42063478082", "28375661015"]
+    assert json.loads(lines[0])["insert_at"] == "2024-10-21T00:00:00"
+    export_mock.assert_called_once_with(batch_size=1000, repository=CachedFarmerRepository)
+
+
+@mock.patch.object(Farmer, "export")
+def test_export_csv_success(export_mock, return_farmer_cpf_model, app):
+
+    export_mock.return_value = iter([return_farmer_cpf_model])
+    response = app.get(
+        "/api/v1/farmers/export?format=csv",
+    )
+
+    lines = response.get_data(as_text=True).splitlines()
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert lines[0].startswith("cpf_cnpj,name,farm_name")
+    assert lines[1] == ("42063478082,Fazendeiro 123,Fazenda LOTR,Joao Pessoa,PB,100,40,50,SUGARCANE,"
+                        "2024-10-21T00:00:00,2024-10-21T00:00:00")
+
+
+@mock.patch.object(Farmer, "export")
+def test_export_csv_empty(export_mock, app):
+
+    export_mock.return_value = iter([])
+    response = app.get(
+        "/api/v1/farmers/export?format=csv",
+    )
+
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).splitlines() == [",".join(EXPORT_FIELDS)]
+
+
+@mock.patch.object(Farmer, "export")
+def test_export_invalid_format(export_mock, app):
+
+    response = app.get(
+        "/api/v1/farmers/export?format=xml",
+    )
+
+    assert response.status_code == 400
+    export_mock.assert_not_called()
+
+
+@mock.patch.object(Farmer, "get_all")
+@mock.patch.object(Farmer, "get_version")
+def test_get_all_not_modified(get_version_mock, get_all_mock, return_farmer_cpf_model, app):
+
+    get_version_mock.return_value = (7, datetime(2024, 10, 21, 12, 0, 0))
+    get_all_mock.return_value = [return_farmer_cpf_model]
+    response = app.get("/api/v1/farmers")
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"farmers.7"'
+    assert response.headers["Last-Modified"] == "Mon, 21 Oct 2024 12:00:00 GMT"
+
+    get_all_mock.reset_mock()
+    for headers in ({"If-None-Match": '"farmers.7"'},
+                    {"If-Modified-Since": "Mon, 21 Oct 2024 12:00:00 GMT"}):
+        response = app.get("/api/v1/farmers", headers=headers)
+        assert response.status_code == 304
+        assert response.data == b""
+    get_all_mock.assert_not_called()
+
+    response = app.get("/api/v1/farmers", headers={"If-None-Match": '"farmers.6"'})
+    assert response.status_code == 200
+
+
+@mock.patch.object(Farmer, "get_by_cpf_cnpj")
+def test_get_farmer_conditional(get_by_cpf_cnpj_mock, return_farmer_cpf_model, app):
+
+    get_by_cpf_cnpj_mock.return_value = return_farmer_cpf_model
+    response = app.get(f"/api/v1/farmers/{return_farmer_cpf_model.cpf_cnpj}")
+
+    assert response.status_code == 200
+    assert response.json["cpf_cnpj"] == return_farmer_cpf_model.cpf_cnpj
+    assert response.headers["Last-Modified"] == "Mon, 21 Oct 2024 00:00:00 GMT"
+
+    response = app.get(f"/api/v1/farmers/{return_farmer_cpf_model.cpf_cnpj}",
+                       headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+    get_by_cpf_cnpj_mock.assert_called_with(cpf_cnpj=return_farmer_cpf_model.cpf_cnpj,
+                                            repository=CachedFarmerRepository)
+
+
+@mock.patch.object(Farmer, "get_by_cpf_cnpj")
+def test_get_farmer_not_found(get_by_cpf_cnpj_mock, app):
+
+    get_by_cpf_cnpj_mock.side_effect = FarmerNotFound("Farmer not found.")
+    response = app.get("/api/v1/farmers/00100200304")
+
+    assert response.status_code == 404
+    assert response.json == {"message": "Farmer not found."}
+
+
+@mock.patch.object(Farmer, "get_all")
+@mock.patch.object(Farmer, "get_version")
+def test_get_all_served_from_page_cache(get_version_mock, get_all_mock, return_farmer_cpf_model, app):
+
+    get_version_mock.return_value = (7, datetime(2024, 10, 21, 12, 0, 0))
+    get_all_mock.return_value = [return_farmer_cpf_model]
+    first = app.get("/api/v1/farmers?state=PB&limit=10")
+    second = app.get("/api/v1/farmers?limit=10&state=PB")
+
+    assert second.status_code == 200
+    assert second.data == first.data
+    assert second.headers["ETag"] == '"farmers.7"'
+    assert app.get("/api/v1/farmers?limit=10&state=PB",
+                   headers={"If-None-Match": '"farmers.7"'}).status_code == 304
+    get_all_mock.assert_called_once()
+
+    CachedFarmerRepository.pages.bump()
+    app.get("/api/v1/farmers?state=PB&limit=10")
+
+    assert get_all_mock.call_count == 2
+    assert get_version_mock.call_count == 2
+
+
+@mock.patch.object(Farmer, "get_changes")
+def test_get_changes_success(get_changes_mock, return_farmer_cpf_model, app):
+
+    changed_at = datetime(2024, 10, 21, 12, 0, 0)
+    get_changes_mock.return_value = ([FarmerChange("00100200304", changed_at, return_farmer_cpf_model),
+                                      FarmerChange("00100200305", changed_at)], "next", False)
+    response = app.get("/api/v1/farmers/changes?since=previous&limit=10")
+
+    assert response.status_code == 200
+    assert response.json["next_since"] == "next"
+    assert response.json["has_more"] is False
+    assert response.json["changes"][0]["farmer"]["cpf_cnpj"] == return_farmer_cpf_model.cpf_cnpj
+    assert response.json["changes"][1] == {"cpf_cnpj": "00100200305", "changed_at": "2024-10-21T12:00:00",
+                                           "deleted": True, "farmer": None}
+    assert get_changes_mock.call_args.kwargs["since"] == "previous"
+    assert get_changes_mock.call_args.kwargs["limit"] == 10
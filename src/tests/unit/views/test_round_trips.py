@@ -0,0 +1,55 @@
+from validate_docbr import CPF
+
+
+def test_farmer_endpoints_round_trips(create_farmer_cpf_dict, assert_max_queries, app):
+    cpf_cnpj = CPF().generate()
+    # The reads and writes by document are prepared once per connection, the
+    # budgets below are the ones after that.
+    missing = CPF().generate()
+    app.get(f"/api/v1/farmers/{missing}")
+    app.patch(f"/api/v1/farmers?cpf_cnpj={missing}", json={"name": "Fazendeiro 456"})
+    app.delete(f"/api/v1/farmers?cpf_cnpj={missing}")
+
+    with assert_max_queries(1):
+        response = app.post("/api/v1/farmers", json=dict(create_farmer_cpf_dict, cpf_cnpj=cpf_cnpj))
+    assert response.status_code == 201
+
+    with assert_max_queries(1):
+        response = app.get(f"/api/v1/farmers/{cpf_cnpj}")
+    assert response.status_code == 200
+
+    with assert_max_queries(0):
+        response = app.get(f"/api/v1/farmers/{cpf_cnpj}")
+    assert response.status_code == 200
+
+    with assert_max_queries(1):
+        response = app.patch(f"/api/v1/farmers?cpf_cnpj={cpf_cnpj}", json={"name": "Fazendeiro 456"})
+    assert response.status_code == 200
+
+    with assert_max_queries(2):
+        response = app.get("/api/v1/farmers?state=PB&limit=10")
+    assert response.status_code == 200
+
+    with assert_max_queries(0):
+        response = app.get("/api/v1/farmers?state=PB&limit=10")
+    assert response.status_code == 200
+
+    with assert_max_queries(2):
+        response = app.get("/api/v1/farmers/summary")
+    assert response.status_code == 200
+
+    with assert_max_queries(3):
+        response = app.get("/api/v1/farmers/changes?limit=10")
+    assert response.status_code == 200
+
+    with assert_max_queries(1):
+        response = app.delete(f"/api/v1/farmers?cpf_cnpj={cpf_cnpj}")
+    assert response.status_code == 200
+
+
+def test_db_stats_headers(assert_max_queries, app):
+    with assert_max_queries(2) as statements:
+        response = app.get("/api/v1/farmers?limit=1")
+
+    assert response.headers["X-DB-Statements"] == str(len(statements))
+    assert float(response.headers["X-DB-Time-Ms"]) > 0
@@ -0,0 +1,50 @@
+import pytest
+from datetime import date
+from flask_restx import marshal, fields
+
+from api.domain.repositories.farmer_repository import SQLAlchemyFarmerRepository
+from api.views.schemas import farmer_create_response_model
+from api.views.serializers import compile_serializer, serialize_farmer
+
+
+def test_serialize_farmer_same_as_marshal(return_farmer_cpf_model, return_farmer_cnpj_model):
+    farmers = [return_farmer_cpf_model, return_farmer_cnpj_model]
+
+    assert serialize_farmer(farmers) == marshal(farmers, farmer_create_response_model)
+    assert serialize_farmer(return_farmer_cpf_model) == marshal(return_farmer_cpf_model,
+                                                                farmer_create_response_model)
+
+
+def test_serialize_farmer_entity_same_as_marshal(return_farmer_cpf_model):
+    farmer = SQLAlchemyFarmerRepository._build_farmer(return_farmer_cpf_model)
+
+    assert serialize_farmer(farmer) == marshal(farmer, farmer_create_response_model)
+
+
+def test_serialize_farmer_unusual_values_same_as_marshal(create_farmer_cpf_dict, return_farmer_cpf_model):
+    return_farmer_cpf_model.name = None
+    return_farmer_cpf_model.total_area = "100"
+    return_farmer_cpf_model.insert_at = date(2024, 10, 21)
+
+    assert serialize_farmer(return_farmer_cpf_model) == marshal(return_farmer_cpf_model,
+                                                                farmer_create_response_model)
+    assert serialize_farmer(create_farmer_cpf_dict) == marshal(create_farmer_cpf_dict,
+                                                               farmer_create_response_model)
+
+
+def test_serialize_farmer_invalid_value_error(return_farmer_cpf_model):
+    return_farmer_cpf_model.farming_options = "SOY"
+
+    with pytest.raises(fields.MarshallingError) as e:
+        serialize_farmer(return_farmer_cpf_model)
+
+    assert str(e.value) == 'Unable to marshal field "farming_options" value "SOY": Invalid type. Allowed type is list.'
+
+
+def test_compile_serializer_with_attribute_and_default():
+    serialize = compile_serializer({
+        "document": fields.String(attribute="cpf_cnpj"),
+        "total_area": fields.Integer(default=0),
+    })
+
+    assert serialize({"cpf_cnpj": "00100200304"}) == {"document": "00100200304", "total_area": 0}